@@ -0,0 +1,123 @@
+"""
+忽略规则基准测试 - benchmarks/bench_ignore.py
+功能：在含有数千条规则的合成仓库上，对比“遍历后再过滤”与“读取目录时剪枝”的耗时和读取的目录数，
+      并对比编译后的匹配器与逐条 fnmatch 的匹配速度
+用法：python benchmarks/bench_ignore.py [--rules N] [--packages N]
+"""
+
+import argparse
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tree_core  # noqa: E402
+from bench_scandir import build_tree  # noqa: E402
+from tree_ignore import IgnoreFilter, IgnoreMatcher, parse_pattern  # noqa: E402
+
+
+def make_rules(count):
+    """生成 count 条混合规则：字面名称、扩展名、带路径的模式和通配模式各占约四分之一"""
+    rules = ['node_modules/', 'build/', '*.pyc', '!keep.pyc']
+    for i in range(count // 4):
+        rules.append(f'generated_{i}')
+        rules.append(f'*.ext{i}')
+        rules.append(f'/src/d{i % 4}/out_{i}.txt')
+        rules.append(f'**/cache{i}/*.tmp')
+    return rules
+
+
+def build_repo(root, packages, args):
+    """合成仓库：源码目录 + 庞大的 node_modules + build 输出"""
+    parts = [('src', args.dirs, args.files, args.depth), ('build', 4, 10, 3)]
+    parts += [(os.path.join('node_modules', f'pkg{i}'), 2, 8, 2) for i in range(packages)]
+    entries = 0
+    for path, dirs, files, depth in parts:
+        path = os.path.join(root, path)
+        os.makedirs(path)
+        entries += build_tree(path, dirs, files, depth)
+    return entries
+
+
+def counting(lister, counter):
+    """包装 lister，统计读取的目录数"""
+    def wrapper(dir_path):
+        counter[0] += 1
+        return lister(dir_path)
+    return wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', type=int, default=4000, help='.gitignore 中的规则数')
+    parser.add_argument('--packages', type=int, default=300, help='node_modules 中的包数')
+    parser.add_argument('--dirs', type=int, default=4, help='src 每层子目录数')
+    parser.add_argument('--files', type=int, default=10, help='src 每个目录的文件数')
+    parser.add_argument('--depth', type=int, default=3, help='src 目录层数')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='tree_bench_')
+    try:
+        entries = build_repo(root, args.packages, args)
+        rules = make_rules(args.rules)
+        with open(os.path.join(root, '.gitignore'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(rules) + '\n')
+        print(f"synthetic repo: {entries} entries, {len(rules)} rules")
+
+        # 1. 遍历所有目录后再过滤（规则同样只编译一次，只比较剪枝的效果）
+        start = time.perf_counter()
+        read = [0]
+        matcher = IgnoreMatcher(rules)
+        kept = 0
+        skipped_dirs = []  # 被忽略目录的相对路径前缀
+        for node in tree_core.walk_tree(root, lister=counting(tree_core.list_dir, read)):
+            if not node.depth:
+                continue
+            rel = os.path.relpath(node.path, root).replace(os.sep, '/')
+            if any(rel.startswith(prefix) for prefix in skipped_dirs):
+                continue
+            if matcher.match(rel, node.name, node.is_dir):
+                if node.is_dir:
+                    skipped_dirs.append(rel + '/')
+                continue
+            kept += 1
+        post_time = time.perf_counter() - start
+        print(f"filter after walk  {post_time * 1000:9.1f} ms  "
+              f"{read[0]:6} folders read  {kept} entries kept")
+
+        # 2. 读取目录时剪枝
+        start = time.perf_counter()
+        read = [0]
+        ignore = IgnoreFilter(root, lister=counting(tree_core.list_dir, read))
+        pruned = sum(1 for node in tree_core.walk_tree(root, lister=ignore.list_dir) if node.depth)
+        prune_time = time.perf_counter() - start
+        print(f"prune while walk   {prune_time * 1000:9.1f} ms  "
+              f"{read[0]:6} folders read  {pruned} entries kept  "
+              f"speedup x{post_time / prune_time:.2f}  same result: {pruned == kept}")
+
+        # 3. 匹配速度：编译后的匹配器 vs 逐条规则 fnmatch
+        names = [f'file_{i}.txt' for i in range(500)] + [f'generated_{i}' for i in range(500)]
+        start = time.perf_counter()
+        for name in names:
+            matcher.match(f'src/d0/{name}', name, False)
+        compiled_time = time.perf_counter() - start
+        patterns = [parsed[0] for parsed in map(parse_pattern, rules) if parsed]
+        start = time.perf_counter()
+        for name in names:
+            for pattern in patterns:
+                if fnmatch.fnmatchcase(name, pattern):
+                    break
+        naive_time = time.perf_counter() - start
+        print(f"match {len(names)} names: compiled {compiled_time * 1000:.1f} ms, "
+              f"per-rule fnmatch {naive_time * 1000:.1f} ms "
+              f"(x{naive_time / compiled_time:.0f})")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+按需浏览基准测试 - benchmarks/bench_lazy.py
+功能：在不同大小的合成目录树上，比较树形视图显示首屏的耗时与完整遍历的耗时，
+      并在模拟延迟的文件系统上测量展开视口中的目录时，有无后台预取（tree_listing）的等待时间
+说明：首屏只读取根目录，耗时应与目录树的总大小无关；
+      预取的测量中，显示首屏后停顿 --think 毫秒（模拟用户浏览），再依次展开首屏中的每个目录
+用法：python benchmarks/bench_lazy.py [--dirs N] [--files N] [--depths 2,3,4,5]
+                                      [--latency 毫秒] [--think 毫秒]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tree_core  # noqa: E402
+from bench_parallel import make_slow_lister  # noqa: E402
+from bench_scandir import build_tree  # noqa: E402
+from tree_listing import ListingCache  # noqa: E402
+from tree_view import LazyTreeModel  # noqa: E402
+
+PAGE_ROWS = 40  # 首屏行数
+
+
+def first_view(root, lister, prefetch=True):
+    """显示首屏：读取根目录，生成前 PAGE_ROWS 行文本，并提交视口中目录的预取；返回 (模型, 缓存)"""
+    cache = ListingCache(lister)
+    model = LazyTreeModel(root, cache.list_dir)
+    model.expand(0)
+    for row in range(min(PAGE_ROWS, len(model.rows))):
+        model.row_text(row)
+    if prefetch:
+        rows = model.rows[:PAGE_ROWS]
+        cache.prefetch(model.path(node) for node in rows
+                       if model.is_dir(node) and not model.is_loaded(node))
+    return model, cache
+
+
+def expand_page(model):
+    """依次展开首屏中的每个目录（从下往上，行号不受之前展开的影响），返回展开的目录数"""
+    count = 0
+    for row in range(min(PAGE_ROWS, len(model.rows)) - 1, 0, -1):
+        if model.is_dir(model.rows[row]):
+            model.expand(row)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dirs', type=int, default=6, help='每层子目录数')
+    parser.add_argument('--files', type=int, default=10, help='每个目录的文件数')
+    parser.add_argument('--depths', default='2,3,4,5', help='要测试的目录层数，逗号分隔')
+    parser.add_argument('--latency', type=float, default=5.0, help='每次读取目录的模拟延迟（毫秒）')
+    parser.add_argument('--think', type=float, default=100.0, help='显示首屏后到开始展开的停顿（毫秒）')
+    args = parser.parse_args()
+
+    print(f"{'entries':>9} {'first view ms':>14} {'full walk ms':>13}")
+    for depth in (int(d) for d in args.depths.split(',')):
+        root = tempfile.mkdtemp(prefix='tree_bench_')
+        try:
+            entries = build_tree(root, args.dirs, args.files, depth)
+            start = time.perf_counter()
+            model, cache = first_view(root, tree_core.list_dir, prefetch=False)
+            view_time = (time.perf_counter() - start) * 1000
+            cache.close()
+            start = time.perf_counter()
+            sum(1 for _ in tree_core.iter_tree_lines(root))
+            walk_time = (time.perf_counter() - start) * 1000
+            print(f"{entries:9} {view_time:14.2f} {walk_time:13.1f}")
+        finally:
+            shutil.rmtree(root)
+
+    # 模拟延迟：展开首屏中的目录时的等待时间
+    lister = make_slow_lister(args.latency / 1000)
+    root = tempfile.mkdtemp(prefix='tree_bench_')
+    try:
+        build_tree(root, args.dirs, args.files, 3)
+        print(f"\nlatency {args.latency} ms per directory, "
+              f"{args.think:.0f} ms pause before expanding")
+        for prefetch in (False, True):
+            model, cache = first_view(root, lister, prefetch)
+            time.sleep(args.think / 1000)
+            start = time.perf_counter()
+            count = expand_page(model)
+            expand_time = (time.perf_counter() - start) * 1000
+            print(f"prefetch {'on ' if prefetch else 'off'}: expanding {count} folders waited "
+                  f"{expand_time:7.1f} ms  (cache hits {cache.hits}, misses {cache.misses})")
+            cache.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
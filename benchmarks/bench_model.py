@@ -0,0 +1,117 @@
+"""
+紧凑树模型基准测试 - benchmarks/bench_model.py
+功能：在内存中合成的大型目录树上，比较保存为 TreeNode 列表与 tree_model.CompactTree 的
+      内存峰值、建立耗时，以及统计大小、按其他方式重新排序并输出先序节点的耗时
+用法：python benchmarks/bench_model.py [--entries N]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_core import TreeNode, render_lines  # noqa: E402
+from tree_model import CompactTree  # noqa: E402
+
+WORDS = ('src', 'lib', 'test', 'utils', 'core', 'config', 'build', 'docs', 'assets', 'main',
+         'index', 'parser', 'render', 'cache', 'model', 'view', 'helper', 'data', 'api', 'io')
+EXTENSIONS = ('.py', '.js', '.txt', '.md', '.json', '.c', '.h', '.png', '.yml', '.log')
+
+
+def synthetic_nodes(entries, seed=1):
+    """按先序产出约 entries 个 TreeNode：每个目录 2~6 个子目录、5~30 个文件，最深 10 层"""
+    rnd = random.Random(seed)
+    count = 0
+    stack = [TreeNode('root', '/bench/root', True, 0)]  # 尚未输出的节点
+    while stack:
+        node = stack.pop()
+        count += 1
+        yield node
+        if not node.is_dir or count + len(stack) >= entries:
+            continue
+        depth = node.depth + 1
+        names = set()
+        if depth < 10:
+            names.update(f"{rnd.choice(WORDS)}{rnd.randint(0, 99)}"
+                         for _ in range(rnd.randint(2, 6)))
+        dirs = sorted(names)
+        files = sorted({f"{rnd.choice(WORDS)}_{rnd.randint(0, 999)}{rnd.choice(EXTENSIONS)}"
+                        for _ in range(rnd.randint(5, 30))} - names)
+        children = [TreeNode(name, os.path.join(node.path, name), True, depth)
+                    for name in dirs]
+        children += [TreeNode(name, os.path.join(node.path, name), False, depth,
+                              size=rnd.randint(0, 1 << 20), mtime=rnd.randint(0, 1 << 60))
+                     for name in files]
+        children[-1].is_last = True
+        for child in children[:-1]:
+            child.is_last = False
+        stack.extend(reversed(children))
+
+
+def measure(func):
+    """执行两次 func，返回 (结果, 耗时（毫秒）, 内存峰值（MB）)
+
+    tracemalloc 会使分配变慢数倍，因此耗时取自不跟踪内存的第一次执行。
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * 1000
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=500000, help='合成的条目数')
+    args = parser.parse_args()
+
+    nodes, node_time, node_peak = measure(lambda: list(synthetic_nodes(args.entries)))
+    del nodes
+    tree, tree_time, tree_peak = measure(
+        lambda: CompactTree.from_nodes(synthetic_nodes(args.entries)))
+    count = len(tree)
+    print(f"{count} entries")
+    print(f"{'model':14} {'build ms':>9} {'peak MB':>9} {'bytes/entry':>12}")
+    print(f"{'TreeNode list':14} {node_time:9.0f} {node_peak:9.1f} "
+          f"{node_peak * (1 << 20) / count:12.0f}")
+    print(f"{'CompactTree':14} {tree_time:9.0f} {tree_peak:9.1f} "
+          f"{tree_peak * (1 << 20) / count:12.0f}"
+          f"   (columns {tree.nbytes() / (1 << 20):.1f} MB)")
+
+    start = time.perf_counter()
+    tree.aggregate()
+    aggregate_time = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    lines = sum(1 for _ in tree.iter_lines())
+    render_time = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sum(1 for _ in tree.iter_nodes(key=tree.size_key))
+    sort_time = (time.perf_counter() - start) * 1000
+    assert lines == sum(1 for _ in render_lines(synthetic_nodes(args.entries)))
+    print(f"aggregate {aggregate_time:.0f} ms, render {lines} lines {render_time:.0f} ms, "
+          f"re-emit sorted by size {sort_time:.0f} ms")
+
+    # 其他排序方式：第一次计算每个条目的排序键并记下名次，之后切换回来时直接复用
+    for mode in ('natural', 'ext', 'name'):
+        start = time.perf_counter()
+        key = tree.order_key(mode)
+        rank_time = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        sum(1 for _ in tree.iter_nodes(key=key))
+        emit_time = (time.perf_counter() - start) * 1000
+        print(f"sort by {mode}: rank {rank_time:.0f} ms, re-emit {emit_time:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+并行遍历基准测试 - benchmarks/bench_parallel.py
+功能：用模拟延迟的文件系统（每次读取目录前等待固定时间）测量不同线程数下的遍历加速比
+用法：python benchmarks/bench_parallel.py [--latency 毫秒] [--workers 1,2,4,8,16]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tree_core  # noqa: E402
+from bench_scandir import build_tree  # noqa: E402
+
+
+def make_slow_lister(latency):
+    """返回每次调用前等待 latency 秒的 list_dir，模拟 NFS/SMB 的往返延迟"""
+    def slow_list_dir(dir_path):
+        time.sleep(latency)
+        return tree_core.list_dir(dir_path)
+    return slow_list_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=5.0, help='每次读取目录的模拟延迟（毫秒）')
+    parser.add_argument('--workers', default='1,2,4,8,16', help='要测试的线程数，逗号分隔')
+    parser.add_argument('--dirs', type=int, default=4, help='每层子目录数')
+    parser.add_argument('--files', type=int, default=10, help='每个目录的文件数')
+    parser.add_argument('--depth', type=int, default=4, help='目录层数')
+    args = parser.parse_args()
+
+    lister = make_slow_lister(args.latency / 1000)
+    root = tempfile.mkdtemp(prefix='tree_bench_')
+    try:
+        entries = build_tree(root, args.dirs, args.files, args.depth)
+        print(f"synthetic tree: {entries} entries, latency {args.latency} ms per directory")
+
+        baseline_time = None
+        baseline_output = None
+        for workers in (int(w) for w in args.workers.split(',')):
+            start = time.perf_counter()
+            nodes = tree_core.walk_tree(root, workers=workers, lister=lister)
+            output = list(tree_core.render_lines(nodes))
+            elapsed = time.perf_counter() - start
+            if baseline_time is None:
+                baseline_time, baseline_output = elapsed, output
+            print(f"workers={workers:<3} {elapsed * 1000:9.1f} ms  "
+                  f"speedup x{baseline_time / elapsed:5.2f}  "
+                  f"same output: {output == baseline_output}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
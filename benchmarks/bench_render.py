@@ -0,0 +1,73 @@
+"""
+文本风格基准测试 - benchmarks/bench_render.py
+功能：在内存中合成的大型目录树上，比较各文本风格（tree_core.RENDER_STYLES）的行数、输出大小、
+      渲染耗时，以及渲染并写入文本流（io.StringIO，经 tree_export.write_lines 逐批写出）的耗时；
+      另以旧版的字符串拼接（+=）方式生成同样的 spacious 文本作为对照
+说明：节点列表在计时前准备好，耗时只包含渲染和写出，不包含遍历
+用法：python benchmarks/bench_render.py [--entries N] [--repeat N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_model import synthetic_nodes  # noqa: E402
+from tree_core import RENDER_STYLES, make_renderer, render_lines  # noqa: E402
+from tree_export import write_lines  # noqa: E402
+
+
+def best_of(repeat, func):
+    """执行 repeat 次 func，返回 (最后一次的结果, 最短耗时（毫秒）)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def concat_text(nodes):
+    """对照组：逐行以 += 拼接成一个字符串（旧版 generate_tree 的输出方式）"""
+    text = ''
+    for line in render_lines(nodes):
+        text += line + '\n'
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=300000, help='合成的条目数')
+    parser.add_argument('--repeat', type=int, default=3, help='每一项重复的次数（取最短）')
+    args = parser.parse_args()
+
+    nodes = list(synthetic_nodes(args.entries))
+    print(f"{len(nodes)} entries")
+    print(f"{'style':10} {'lines':>9} {'MB':>7} {'render ms':>10} {'write ms':>9}")
+    sizes = {}
+    for style in RENDER_STYLES:
+        lines, render_time = best_of(args.repeat, lambda: sum(
+            1 for _ in render_lines(nodes, renderer=make_renderer(style))))
+
+        def write():
+            out = io.StringIO()
+            write_lines(out, render_lines(nodes, renderer=make_renderer(style)))
+            return out
+        out, write_time = best_of(args.repeat, write)
+        sizes[style] = size = len(out.getvalue().encode('utf-8'))
+        print(f"{style:10} {lines:9} {size / (1 << 20):7.1f} {render_time:10.0f} "
+              f"{write_time:9.0f}")
+
+    text, concat_time = best_of(args.repeat, lambda: concat_text(nodes))
+    assert len(text.encode('utf-8')) == sizes['spacious']
+    print(f"spacious text built with +=: {concat_time:.0f} ms")
+    for style in RENDER_STYLES[1:]:
+        print(f"{style} output is {sizes[style] / sizes['spacious']:.0%} of spacious")
+
+
+if __name__ == '__main__':
+    main()
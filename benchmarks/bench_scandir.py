@@ -0,0 +1,159 @@
+"""
+遍历引擎基准测试 - benchmarks/bench_scandir.py
+功能：对比旧版 listdir + isdir 实现与 scandir 遍历引擎的系统调用次数和耗时
+用法：python benchmarks/bench_scandir.py [--dirs N] [--files N] [--depth N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tree_core  # noqa: E402
+
+
+def legacy_generate_tree(dir_path, prefix='', is_root=True):
+    """旧版 generate_tree 的原样拷贝（listdir + 多次 isdir），作为对照组"""
+    if is_root:
+        tree_str = f"{os.path.basename(dir_path)}/\n"
+        tree_str += "│\n"
+    else:
+        tree_str = ""
+
+    try:
+        entries = sorted(os.listdir(dir_path))
+        entries = [e for e in entries if not e.startswith('.')]
+
+        dirs = [e for e in entries if os.path.isdir(os.path.join(dir_path, e))]
+        files = [e for e in entries if not os.path.isdir(os.path.join(dir_path, e))]
+
+        items = dirs + files
+        total_items = len(items)
+
+        for i, item in enumerate(items):
+            item_path = os.path.join(dir_path, item)
+            is_last = (i == total_items - 1)
+
+            connector = "├── " if not is_last else "└── "
+            vertical = "│   " if not is_last else "    "
+
+            if is_root:
+                if i == 0:
+                    tree_str += prefix + "├── "
+                else:
+                    tree_str += prefix + connector
+
+                if os.path.isdir(item_path):
+                    tree_str += f"{item}/\n"
+                else:
+                    tree_str += f"{item}\n"
+
+                if os.path.isdir(item_path):
+                    new_prefix = prefix + vertical
+                    tree_str += legacy_generate_tree(item_path, new_prefix, False)
+            else:
+                tree_str += prefix + connector
+
+                if os.path.isdir(item_path):
+                    tree_str += f"{item}/\n"
+                    new_prefix = prefix + vertical
+                    tree_str += legacy_generate_tree(item_path, new_prefix, False)
+                else:
+                    tree_str += f"{item}\n"
+
+                if not is_last:
+                    tree_str += prefix + vertical + "\n"
+
+    except PermissionError:
+        tree_str += prefix + "│   [Permission Denied]\n"
+    except Exception as e:
+        tree_str += prefix + f"│   [Error: {str(e)}]\n"
+
+    return tree_str
+
+
+def build_tree(root, dirs, files, depth):
+    """构建测试目录树：每层 dirs 个子目录、files 个文件，共 depth 层"""
+    count = 0
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for f in range(files):
+                with open(os.path.join(parent, f"file_{f}.txt"), 'w'):
+                    pass
+                count += 1
+            for d in range(dirs):
+                path = os.path.join(parent, f"dir_{d}")
+                os.mkdir(path)
+                next_level.append(path)
+                count += 1
+        level = next_level
+    return count
+
+
+class SyscallCounter:
+    """在 os 模块层面统计 stat / listdir / scandir 调用次数"""
+
+    NAMES = ('stat', 'lstat', 'listdir', 'scandir')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.NAMES, 0)
+        self._originals = {}
+
+    def _wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            self.counts[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        for name in self.NAMES:
+            self._originals[name] = getattr(os, name)
+            setattr(os, name, self._wrap(name, self._originals[name]))
+        return self
+
+    def __exit__(self, *exc):
+        for name, func in self._originals.items():
+            setattr(os, name, func)
+
+
+def measure(label, func, root, entries):
+    """运行一次并统计调用次数，再单独计时（计时不包含计数包装的开销）"""
+    with SyscallCounter() as counter:
+        output = func(root)
+    start = time.perf_counter()
+    func(root)
+    elapsed = time.perf_counter() - start
+    calls = ', '.join(f"{k}={v}" for k, v in counter.counts.items())
+    per_entry = (counter.counts['stat'] + counter.counts['lstat']) / max(entries, 1)
+    print(f"{label:<10} {elapsed * 1000:9.1f} ms  {calls}  (stat/entry={per_entry:.2f})")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dirs', type=int, default=4, help='每层子目录数')
+    parser.add_argument('--files', type=int, default=20, help='每个目录的文件数')
+    parser.add_argument('--depth', type=int, default=5, help='目录层数')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='tree_bench_')
+    try:
+        entries = build_tree(root, args.dirs, args.files, args.depth)
+        print(f"synthetic tree: {entries} entries under {root}")
+        # 说明：DirEntry.is_dir() 在文件系统提供类型信息时不经过 os.stat，
+        # 因此新引擎的 stat 计数即为真实的额外 stat 次数（Linux/Windows 上通常为 0）
+        old = measure('legacy', legacy_generate_tree, root, entries)
+        new = measure('scandir', tree_core.render_tree, root, entries)
+        print("output identical:", old == new)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+搜索基准测试 - benchmarks/bench_search.py
+功能：在内存中合成的大型目录树索引上，测量建立索引和各种选择性的查询耗时，
+      并与逐个名称转小写后判断子串的朴素做法对比
+用法：python benchmarks/bench_search.py [--entries N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_search import SearchIndex  # noqa: E402
+
+WORDS = ('src', 'lib', 'test', 'utils', 'core', 'config', 'build', 'docs', 'assets', 'Main',
+         'index', 'parser', 'render', 'cache', 'model', 'view', 'helper', 'data', 'api', 'io')
+EXTENSIONS = ('.py', '.js', '.txt', '.md', '.json', '.c', '.h', '.png', '.yml', '.log')
+
+
+def synthetic_index(entries, seed=1):
+    """按先序合成约 entries 个条目：每个目录 2~6 个子目录、5~30 个文件，最深 10 层"""
+    rnd = random.Random(seed)
+    line_nos, depths, names, dirs = [], [], [], []
+    stack = [(0, 'root', True)]  # 尚未输出的条目：(深度, 名称, 是否目录)
+    while stack:
+        depth, name, is_dir = stack.pop()
+        line_nos.append(len(line_nos))
+        depths.append(depth)
+        names.append(name)
+        dirs.append(is_dir)
+        if not is_dir or len(names) + len(stack) >= entries:
+            continue
+        children = []
+        if depth < 9:
+            children += [(depth + 1, f"{rnd.choice(WORDS)}{rnd.randint(0, 99)}", True)
+                         for _ in range(rnd.randint(2, 6))]
+        children += [(depth + 1, f"{rnd.choice(WORDS)}_{rnd.randint(0, 999)}"
+                                 f"{rnd.choice(EXTENSIONS)}", False)
+                     for _ in range(rnd.randint(5, 30))]
+        stack.extend(reversed(children))
+    return line_nos, depths, names, dirs
+
+
+def best_of(repeat, func):
+    """重复执行 repeat 次，返回 (最短耗时（毫秒）, 结果)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=500000, help='合成的条目数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复的次数（取最短）')
+    args = parser.parse_args()
+
+    columns = synthetic_index(args.entries)
+    names = columns[2]
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.extend(*columns)
+    extend_time = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.search('x')  # 第一次查找时建立小写名称串和上层目录下标
+    build_time = (time.perf_counter() - start) * 1000
+    print(f"{len(index)} entries: extend {extend_time:.1f} ms, "
+          f"first-search build {build_time:.1f} ms")
+
+    queries = ('parser_42', 'config', 'Main', '.json', '_1', 'zzz', 'lib/core', 'test7/')
+    print(f"{'query':12} {'matches':>8} {'index ms':>9} {'naive ms':>9}  speedup")
+    for query in queries:
+        index_time, found = best_of(args.repeat, lambda: index.search(query))
+        if '/' in query:
+            naive = ''  # 路径查询没有对应的朴素做法（需要逐个拼出路径）
+        else:
+            lowered = query.lower()
+            naive_time, expected = best_of(args.repeat, lambda: [
+                i for i, name in enumerate(names) if lowered in name.lower()])
+            assert found == expected, query
+            naive = f"{naive_time:9.1f}  x{naive_time / index_time:.1f}"
+        print(f"{query:12} {len(found):8} {index_time:9.2f} {naive}")
+
+    limit_time, found = best_of(args.repeat, lambda: index.search('_', 10000))
+    print(f"{'_ (limit)':12} {len(found):8} {limit_time:9.2f}   first 10000 matches, as in the GUI")
+
+
+if __name__ == '__main__':
+    main()
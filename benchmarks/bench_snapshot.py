@@ -0,0 +1,132 @@
+"""
+快照浏览基准测试 - benchmarks/bench_snapshot.py
+功能：将内存中合成的大型目录树分别保存为目录树文本和快照文件（tree_snapshot），
+      比较重新打开时的耗时和 Python 内存峰值：读入整个文本文件，与映射快照并显示树形视图的首屏
+      （tree_view.SnapshotTreeModel）；并测量在快照中逐层展开到最深处、以及展开首屏中每个目录的耗时
+说明：快照的各列通过 mmap 映射，用到的页面由操作系统按需读入，不计入 Python 内存；
+      两种文件都刚刚写出，均在系统的文件缓存中
+用法：python benchmarks/bench_snapshot.py [--entries N]
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_model import synthetic_nodes  # noqa: E402
+from tree_core import render_lines  # noqa: E402
+from tree_export import write_lines  # noqa: E402
+from tree_snapshot import Snapshot, write_snapshot  # noqa: E402
+from tree_view import SnapshotTreeModel  # noqa: E402
+
+PAGE_ROWS = 40  # 首屏行数
+
+
+def measure(func):
+    """执行两次 func，返回 (第二次的结果, 耗时（毫秒）, Python 内存峰值（MB）)
+
+    tracemalloc 会使分配变慢数倍，因此耗时取自不跟踪内存的第一次执行。
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * 1000
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def read_text(path):
+    """旧的方式：把整个目录树文本读入内存（之后还要插入文本框）"""
+    with open(path, encoding='utf-8') as f:
+        return f.read().split('\n')
+
+
+def open_snapshot(path):
+    """映射快照，展开根目录并生成首屏的文本，返回模型（关闭时调用 model.snapshot.close()）"""
+    model = SnapshotTreeModel(Snapshot(path))
+    model.expand(0)
+    for row in range(min(PAGE_ROWS, len(model.rows))):
+        model.row_text(row)
+    return model
+
+
+def expand_deepest(model):
+    """从根目录起每次展开第一个子目录，直到没有子目录，返回展开的层数"""
+    row = 0
+    levels = 0
+    while True:
+        end = model._subtree_end(row)
+        row = next((r for r in range(row + 1, end) if model.is_dir(model.rows[r])), None)
+        if row is None:
+            return levels
+        model.expand(row)
+        levels += 1
+
+
+def expand_page(model):
+    """展开首屏中的每个目录（从下往上，行号不受之前展开的影响），返回展开的目录数"""
+    count = 0
+    for row in range(min(PAGE_ROWS, len(model.rows)) - 1, 0, -1):
+        if model.is_dir(model.rows[row]) and not model.expanded[model.rows[row]]:
+            model.expand(row)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1000000, help='合成的条目数')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='tree_bench_')
+    try:
+        text_path = os.path.join(work, 'tree.txt')
+        snap_path = os.path.join(work, 'tree.treesnap')
+        start = time.perf_counter()
+        with open(text_path, 'w', encoding='utf-8') as f:
+            write_lines(f, render_lines(synthetic_nodes(args.entries)))
+        count = write_snapshot(snap_path, '/bench/root', synthetic_nodes(args.entries))
+        print(f"{count} entries, written in {time.perf_counter() - start:.1f} s: "
+              f"text {os.path.getsize(text_path) / (1 << 20):.1f} MB, "
+              f"snapshot {os.path.getsize(snap_path) / (1 << 20):.1f} MB")
+
+        print(f"{'reopen':24} {'ms':>9} {'peak MB':>9}")
+        lines, text_time, text_peak = measure(lambda: read_text(text_path))
+        print(f"{'read text file':24} {text_time:9.1f} {text_peak:9.1f}   ({len(lines)} lines)")
+        del lines
+        models = []  # measure 打开两次，最后一起关闭
+
+        def reopen():
+            models.append(open_snapshot(snap_path))
+            return models[-1]
+        model, snap_time, snap_peak = measure(reopen)
+        print(f"{'snapshot first screen':24} {snap_time:9.2f} {snap_peak:9.2f}")
+
+        start = time.perf_counter()
+        levels = expand_deepest(model)
+        deep_time = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        folders = expand_page(model)
+        page_time = (time.perf_counter() - start) * 1000
+        print(f"expand to the deepest folder ({levels} levels): {deep_time:.2f} ms; "
+              f"every folder on the first screen ({folders}): {page_time:.2f} ms")
+        del model
+        for opened in models:
+            opened.snapshot.close()
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+启动耗时基准测试 - benchmarks/bench_startup.py
+功能：测量图形界面的启动耗时：在新进程中导入 show_tree_gui 的耗时、进程总耗时，
+      以及从启动进程到窗口第一次绘制完成的耗时；列出导入时加载了哪些较重的可选模块，
+      可设置耗时上限用于发现启动变慢
+说明：每次测量都启动新的进程，模块不会因已导入而被跳过；
+      首次绘制通过环境变量 TREE_STARTUP_PROBE 让程序在绘制后写入时间戳并退出（见 show_tree_gui.startup_probe），
+      因此也可以测量 PyInstaller 打包后的程序（--exe）；没有显示器时跳过这一项
+用法：python benchmarks/bench_startup.py [--repeat N] [--exe PATH] [--json FILE|-] [--max-ms MS]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_VERSION = 1
+
+# 启动时不应加载的模块（只在使用相应功能时才需要）
+HEAVY_MODULES = ('pypinyin', 'sqlite3', 'subprocess', 'ctypes', 'tkinterdnd2', 'tree_cache',
+                 'tree_export', 'tree_snapshot', 'tree_view', 'tree_watch')
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import show_tree_gui
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import():
+    """在新进程中导入 show_tree_gui，返回 (导入耗时, 进程总耗时, 已加载的较重模块)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=ROOT,
+                            capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    data = json.loads(result.stdout)
+    return data['seconds'], total, data['loaded']
+
+
+def measure_paint(exe=None, timeout=60):
+    """启动图形界面，返回从启动进程到窗口第一次绘制完成的秒数；无法显示窗口时返回 (None, 原因)"""
+    command = [exe] if exe else [sys.executable, os.path.join(ROOT, 'show_tree_gui.py')]
+    fd, probe = tempfile.mkstemp(prefix='tree_startup_', suffix='.txt')
+    os.close(fd)
+    os.remove(probe)  # 由程序在绘制后创建
+    env = dict(os.environ, TREE_STARTUP_PROBE=probe)
+    try:
+        start = time.time()
+        result = subprocess.run(command, env=env, capture_output=True, text=True,
+                                timeout=timeout)
+        if not os.path.exists(probe):
+            lines = (result.stderr or result.stdout).strip().splitlines()
+            return None, lines[-1] if lines else f"exit status {result.returncode}"
+        with open(probe, encoding='utf-8') as f:
+            return float(f.read()) - start, None
+    except subprocess.TimeoutExpired:
+        return None, f"no paint within {timeout} s"
+    finally:
+        if os.path.exists(probe):
+            os.remove(probe)
+
+
+def summarize(values):
+    """最短和中位数（毫秒）"""
+    return {'best_ms': min(values) * 1000, 'median_ms': statistics.median(values) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='每一项重复的次数')
+    parser.add_argument('--exe', help='测量打包后的程序（如 PyInstaller 生成的可执行文件）的首次绘制')
+    parser.add_argument('--no-paint', action='store_true', help='只测量导入，不启动窗口')
+    parser.add_argument('--json', metavar='FILE', help='将结果保存为 JSON，- 表示标准输出')
+    parser.add_argument('--max-ms', type=float,
+                        help='耗时上限（毫秒）：首次绘制（跳过时为导入）的最短耗时超过它时以状态 1 退出')
+    args = parser.parse_args()
+
+    imports, processes, loaded = [], [], set()
+    if not args.exe:
+        for _ in range(args.repeat):
+            seconds, total, modules = measure_import()
+            imports.append(seconds)
+            processes.append(total)
+            loaded.update(modules)
+    paints, skipped = [], None
+    if not args.no_paint:
+        for _ in range(args.repeat):
+            seconds, skipped = measure_paint(args.exe)
+            if seconds is None:
+                break
+            paints.append(seconds)
+
+    # JSON 结构：环境信息；import（进程内导入耗时）、process（导入的进程从启动到退出）、
+    # paint（从启动进程到窗口绘制完成），各为 best_ms 和 median_ms，未测量时为 null；
+    # loaded 为导入时加载的较重模块，paint_skipped 为跳过首次绘制的原因
+    results = {
+        'import': summarize(imports) if imports else None,
+        'process': summarize(processes) if processes else None,
+        'paint': summarize(paints) if paints else None,
+        'loaded': sorted(loaded),
+        'paint_skipped': skipped,
+    }
+    for name in ('import', 'process', 'paint'):
+        if results[name]:
+            print(f"{name:8} best {results[name]['best_ms']:7.1f} ms   "
+                  f"median {results[name]['median_ms']:7.1f} ms", file=sys.stderr)
+    if skipped:
+        print(f"paint    skipped: {skipped}", file=sys.stderr)
+    if not args.exe:
+        print(f"heavy modules loaded at import: {', '.join(sorted(loaded)) or 'none'}",
+              file=sys.stderr)
+
+    if args.json:
+        report = {
+            'version': SCHEMA_VERSION,
+            'created': datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'exe': args.exe,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+
+    if args.max_ms is not None:
+        checked = results['paint'] or results['import']
+        if checked and checked['best_ms'] > args.max_ms:
+            print(f"startup {checked['best_ms']:.1f} ms exceeds --max-ms {args.max_ms:.0f}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
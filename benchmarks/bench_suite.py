@@ -0,0 +1,366 @@
+"""
+综合基准测试 - benchmarks/bench_suite.py
+功能：构建不同形状的合成目录树（宽、深、大量小文件、长 Unicode 名称），
+      分别测量遍历、渲染、控件插入和各种导出格式的耗时、吞吐量（条目/秒）和内存峰值（RSS），
+      结果可保存为 JSON，并与之前保存的结果对比
+说明：每个阶段在单独的子进程中运行，输入（节点列表、文本行）在计时前准备好，
+      因此各阶段的耗时互不包含，RSS 峰值也不受之前阶段的影响；
+      控件插入需要图形界面，没有显示器时跳过
+用法：python benchmarks/bench_suite.py [--scale 倍数] [--shapes wide,deep] [--stages walk,render]
+                                       [--repeat N] [--json FILE|-] [--compare OLD.json]
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCHEMA_VERSION = 1
+GUI_BATCH_LINES = 2000  # 与 show_tree_gui.BATCH_LINES 相同
+UNICODE_PARTS = ('目录结构', 'ドキュメント', '한국어파일', 'Ünïcödé', 'Ελληνικά', 'русский',
+                 '🌲🌳', 'emoji✨', 'naïve café', 'مرحبا')
+
+
+# ======================== 合成目录树 ========================
+def _make_files(dir_path, names, content=b''):
+    for name in names:
+        with open(os.path.join(dir_path, name), 'wb') as f:
+            f.write(content)
+    return len(names)
+
+
+def _scaled(count, scale):
+    """count×scale 取整（至少为 1），scale 可以是小数，如 0.05 用于快速试运行"""
+    return max(1, round(count * scale))
+
+
+def build_wide(root, scale):
+    """宽：根目录下 200×scale 个子目录，每个 100 个文件"""
+    count = 0
+    for d in range(_scaled(200, scale)):
+        path = os.path.join(root, f"dir_{d:05}")
+        os.mkdir(path)
+        count += 1 + _make_files(path, [f"file_{f:03}.txt" for f in range(100)])
+    return count
+
+
+def build_deep(root, scale):
+    """深：10×scale 条深 200 层的目录链，每层 5 个文件"""
+    count = 0
+    for chain in range(_scaled(10, scale)):
+        path = os.path.join(root, f"chain_{chain}")
+        for level in range(200):
+            os.mkdir(path)
+            count += 1 + _make_files(path, [f"f{f}.c" for f in range(5)])
+            path = os.path.join(path, f"d{level}")
+    return count
+
+
+def build_small_files(root, scale):
+    """大量小文件：每个目录 4 个子目录、30×scale 个 1~64 字节的文件，共 5 层"""
+    count = 0
+    level = [root]
+    for depth in range(5):
+        next_level = []
+        files = _scaled(30, scale)
+        for parent in level:
+            for f in range(files):
+                with open(os.path.join(parent, f"s{f}.dat"), 'wb') as fh:
+                    fh.write(b'x' * (1 + (f * 7 + depth) % 64))
+                count += 1
+            if depth < 4:
+                for d in range(4):
+                    path = os.path.join(parent, f"sub{d}")
+                    os.mkdir(path)
+                    next_level.append(path)
+                    count += 1
+        level = next_level
+    return count
+
+
+def build_unicode(root, scale):
+    """长 Unicode 名称：100×scale 个子目录，每个 100 个文件，名称约 60~120 个字符"""
+    count = 0
+    parts = len(UNICODE_PARTS)
+    for d in range(_scaled(100, scale)):
+        dir_name = f"{UNICODE_PARTS[d % parts]} {d} " + UNICODE_PARTS[(d + 3) % parts] * 2
+        path = os.path.join(root, dir_name)
+        os.mkdir(path)
+        names = [' '.join(UNICODE_PARTS[(d + f + i) % parts] for i in range(f % 5 + 4))
+                 + f" {f}.txt" for f in range(100)]
+        count += 1 + _make_files(path, names)
+    return count
+
+
+SHAPES = {
+    'wide': build_wide,
+    'deep': build_deep,
+    'small_files': build_small_files,
+    'unicode': build_unicode,
+}
+
+
+# ======================== 各阶段 ========================
+def _walk(root):
+    from tree_core import list_dir, walk_tree
+    return list(walk_tree(root, lister=list_dir))
+
+
+def _walk_stat(root):
+    from tree_core import list_dir_stat, walk_tree
+    return list(walk_tree(root, lister=list_dir_stat))
+
+
+def _render_lines(root):
+    from tree_core import render_lines
+    return list(render_lines(_walk(root)))
+
+
+def _discard(items):
+    for _ in items:
+        pass
+
+
+def stage_walk(root):
+    """遍历（list_dir，只读取类型）"""
+    return None, _walk
+
+
+def stage_walk_stat(root):
+    """遍历并读取大小和修改时间（list_dir_stat，导出和大小统计使用）"""
+    return None, _walk_stat
+
+
+def stage_render(root):
+    """将节点渲染为目录树文本行"""
+    from tree_core import render_lines
+    return _walk(root), lambda nodes: _discard(render_lines(nodes))
+
+
+def _render_stage(style):
+    def stage(root):
+        from tree_core import make_renderer, render_lines
+
+        def render(nodes):
+            _discard(render_lines(nodes, renderer=make_renderer(style)))
+        return _walk(root), render
+    stage.__doc__ = f"将节点渲染为 {style} 风格的文本行"
+    return stage
+
+
+def stage_widget(root):
+    """按界面的批大小将文本行插入 Tk 文本框"""
+    try:
+        import tkinter as tk
+        window = tk.Tk()
+    except (ImportError, RuntimeError) as e:
+        raise SkipStage(str(e))
+    except Exception as e:  # tkinter.TclError：没有显示器
+        raise SkipStage(str(e).splitlines()[0])
+    window.withdraw()
+    text = tk.Text(window)
+    text.pack()
+
+    def insert(lines):
+        text.delete('1.0', tk.END)
+        for start in range(0, len(lines), GUI_BATCH_LINES):
+            text.insert(tk.END, '\n'.join(lines[start:start + GUI_BATCH_LINES]) + '\n')
+        window.update_idletasks()
+
+    return _render_lines(root), insert
+
+
+def _export_stage(fmt):
+    def stage(root):
+        from tree_export import _json_tree, _jsonl_record, write_lines
+        from tree_snapshot import write_snapshot
+        target = os.path.join(tempfile.gettempdir(), f"bench_suite_{os.getpid()}.{fmt}")
+
+        def write(nodes):
+            try:
+                if fmt == 'snapshot':
+                    write_snapshot(target, root, nodes)
+                    return
+                from tree_core import render_lines
+                with open(target, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                    if fmt == 'text':
+                        write_lines(f, render_lines(nodes))
+                    elif fmt == 'jsonl':
+                        write_lines(f, map(_jsonl_record, nodes))
+                    else:
+                        write_lines(f, _json_tree(nodes))
+            finally:
+                if os.path.exists(target):
+                    os.remove(target)
+
+        return _walk_stat(root), write
+    stage.__doc__ = f"由已遍历的节点写出 {fmt} 文件"
+    return stage
+
+
+STAGES = {
+    'walk': stage_walk,
+    'walk_stat': stage_walk_stat,
+    'render': stage_render,
+    'render_compact': _render_stage('compact'),
+    'render_ascii': _render_stage('ascii'),
+    'render_markdown': _render_stage('markdown'),
+    'widget': stage_widget,
+    'export_text': _export_stage('text'),
+    'export_jsonl': _export_stage('jsonl'),
+    'export_json': _export_stage('json'),
+    'export_snapshot': _export_stage('snapshot'),
+}
+
+
+class SkipStage(Exception):
+    """当前环境无法运行该阶段（如没有显示器）"""
+
+
+def peak_rss_mb():
+    """进程的 RSS 峰值（MB），无法获取时为 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(stage, root, repeat):
+    """在子进程中运行：准备输入后执行 repeat 次，返回结果字典（见 main 中的 JSON 说明）"""
+    try:
+        data, func = STAGES[stage](root)
+    except SkipStage as e:
+        return {'skipped': str(e)}
+    rss_before = peak_rss_mb()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(root if data is None else data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rss_after = peak_rss_mb()
+    return {
+        'seconds': best,
+        'peak_rss_mb': rss_after,
+        'rss_growth_mb': None if rss_after is None else rss_after - rss_before,
+    }
+
+
+# ======================== 运行与报告 ========================
+def run_suite(shapes, stages, scale, repeat, base_dir=None, isolate=True):
+    """构建每种形状的目录树并运行各阶段，返回结果列表"""
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for shape in shapes:
+        root = tempfile.mkdtemp(prefix=f'tree_bench_{shape}_', dir=base_dir)
+        try:
+            start = time.perf_counter()
+            entries = SHAPES[shape](root, scale)
+            build = time.perf_counter() - start
+            print(f"{shape}: {entries} entries (built in {build:.1f} s)", file=sys.stderr)
+            for stage in stages:
+                if isolate:
+                    with ProcessPoolExecutor(1, mp_context=context) as pool:
+                        result = pool.submit(run_stage, stage, root, repeat).result()
+                else:
+                    result = run_stage(stage, root, repeat)
+                result = dict(shape=shape, stage=stage, entries=entries, **result)
+                if 'seconds' in result:
+                    result['entries_per_sec'] = entries / max(result['seconds'], 1e-9)
+                results.append(result)
+                print_result(result, file=sys.stderr)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def print_result(result, baseline=None, file=None):
+    """输出一行结果；baseline 为之前保存的同一形状和阶段的结果"""
+    label = f"  {result['shape']:12} {result['stage']:16}"
+    if 'skipped' in result:
+        print(f"{label} skipped: {result['skipped']}", file=file)
+        return
+    rss = result['peak_rss_mb']
+    rss_text = '' if rss is None else (f"  peak RSS {rss:7.1f} MB "
+                                       f"(+{result['rss_growth_mb']:.1f})")
+    line = (f"{label} {result['seconds'] * 1000:9.1f} ms "
+            f"{result['entries_per_sec']:12,.0f} entries/s{rss_text}")
+    if baseline and baseline.get('seconds'):
+        line += f"  x{baseline['seconds'] / result['seconds']:.2f} vs baseline"
+    print(line, file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1, help='目录树规模的倍数（可以是小数）')
+    parser.add_argument('--shapes', default=','.join(SHAPES),
+                        help=f"要测试的形状，逗号分隔（{', '.join(SHAPES)}）")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"要测试的阶段，逗号分隔（{', '.join(STAGES)}）")
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段重复的次数（取最短）')
+    parser.add_argument('--dir', help='在此目录下构建目录树（如网络盘），默认为系统临时目录')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='所有阶段在同一进程中运行（更快，但 RSS 峰值会累积）')
+    parser.add_argument('--json', metavar='FILE', help='将结果保存为 JSON，- 表示标准输出')
+    parser.add_argument('--compare', metavar='OLD', help='与之前保存的 JSON 结果对比')
+    args = parser.parse_args()
+
+    shapes = [s for s in args.shapes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [s for s in shapes if s not in SHAPES] + [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown shape or stage: {', '.join(unknown)}")
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            for result in json.load(f)['results']:
+                baseline[result['shape'], result['stage']] = result
+
+    results = run_suite(shapes, stages, args.scale, args.repeat, args.dir, not args.no_isolate)
+
+    if baseline:
+        print(f"compared with {args.compare} (x > 1 is faster now):", file=sys.stderr)
+        for result in results:
+            print_result(result, baseline.get((result['shape'], result['stage'])),
+                         file=sys.stderr)
+    if args.json:
+        # JSON 结构：环境信息，以及每个 (形状, 阶段) 一项：entries、seconds（最短耗时）、
+        # entries_per_sec、peak_rss_mb（子进程的 RSS 峰值）、rss_growth_mb（阶段本身增加的部分），
+        # 无法运行的阶段只有 skipped（原因）
+        report = {
+            'version': SCHEMA_VERSION,
+            'created': datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'isolated': not args.no_isolate,
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,26 @@
 版本：v1.1.1
 """
 
+import functools
 import os
+import queue
 import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, PhotoImage
-from pypinyin import pinyin, Style
-from tkinterdnd2 import DND_FILES, TkinterDnD
+
+from tree_core import (RENDER_STYLES, SYMLINK_MODES, BoxRenderer, ScanCancelled, ScanLimits,
+                       ScanStats, format_error, iter_tree_lines, list_dir, list_dir_stat,
+                       make_renderer, more_node, parse_dir_lines, rebuild_children_lines,
+                       render_lines, render_subtree)
+from tree_diff import ADDED, MODIFIED, REMOVED, DiffSummary, iter_diff_lines
+from tree_ignore import COMMON_PATTERNS, IgnoreFilter
+from tree_profile import ScanProfile
+from tree_model import CompactTree
+from tree_search import SearchIndex
+from tree_sizes import size_label
+from tree_sort import SORT_MODES, STAT_SORTS, sorted_lister
 
 # ======================== 多语言支持 ========================
 # 支持的语言: 简体中文/繁体中文/英文/日文/韩文
@@ -41,6 +55,77 @@ LANG = {
         'about_content': '目录结构查看器 v1.1.1\n\nCopyright © 2025 Ryan Joo\n\n一款简单易用的目录结构生成工具',
         'empty_filename': '请输入文件名',
         'drop_placeholder': '拖放文件夹到此处...',
+        'cancel': '取消',
+        'scanning': '正在扫描… {} 个文件夹，{} 个条目',
+        'scan_done': '完成：{} 个文件夹，{} 个条目',
+        'scan_cancelled': '已取消',
+        'view_menu': '显示模式',
+        'view_text': '文本',
+        'view_tree': '树形（适合大目录）',
+        'workers_menu': '并行扫描线程数',
+        'use_cache': '使用扫描缓存',
+        'force_rescan': '强制完整重新扫描',
+        'watch': '监视变化并自动更新',
+        'watch_updated': '已更新 {} 个文件夹',
+        'limits_menu': '扫描范围限制',
+        'max_depth': '最大深度',
+        'max_entries': '最多条目数',
+        'time_budget': '时间上限',
+        'unlimited': '不限制',
+        'seconds': '{} 秒',
+        'scan_truncated': '已达到上限，显示部分结果：{} 个文件夹，{} 个条目',
+        'use_gitignore': '遵循 .gitignore',
+        'ignore_patterns': '忽略规则…',
+        'ignore_hint': '每行一条规则，语法同 .gitignore（如 node_modules/、*.log、/build）',
+        'ok': '确定',
+        'saving': '正在保存… 已写入 {} 个条目',
+        'export_data': '导出数据...',
+        'show_sizes': '统计大小',
+        'sort_menu': '排序方式',
+        'sort_name': '按名称',
+        'sort_size': '按大小',
+        'compare': '比较快照...',
+        'compare_hint': '请选择一个快照（与当前目录比较）或两个快照',
+        'diff_done': '比较完成：新增 {}，删除 {}，修改 {}',
+        'diff_truncated': '比较完成（快照不完整，结果可能包含误报）：新增 {}，删除 {}，修改 {}',
+        'search': '查找：',
+        'search_filter': '只显示匹配项',
+        'search_count': '{} / {}',
+        'search_none': '无匹配',
+        'search_text_only': '查找仅适用于文本视图',
+        'show_diagnostics': '显示诊断信息',
+        'profile_scans': '用 cProfile 分析扫描',
+        'save_profile': '保存分析结果…',
+        'profile_none': '还没有完成的分析。请先勾选“用 cProfile 分析扫描”，再生成目录树。',
+        'profile_saved': '分析结果已保存到 {}',
+        'diag_counts': '{} 个文件夹 · {} 个条目 · {} 次 stat · {} 个错误',
+        'diag_phases': '读取 {read} · 渲染 {render} · 等待 {wait} · 插入 {insert} · 索引 {index} · 共 {total}',
+        'one_filesystem': '不进入其他文件系统',
+        'symlinks_menu': '符号链接',
+        'symlinks_follow': '跟随（检测循环）',
+        'symlinks_show': '显示链接目标',
+        'symlinks_skip': '忽略',
+        'sort_natural': '自然顺序（file2 在 file10 之前）',
+        'sort_nocase': '按名称（不区分大小写）',
+        'sort_ext': '按扩展名',
+        'sort_mtime': '按修改时间（最新在前）',
+        'batch_scan': '批量扫描…',
+        'batch_hint': '要扫描的目录，每行一个（也可以将多个文件夹拖放到路径框）：',
+        'batch_title': '批量扫描（{} 个目录）',
+        'batch_progress': '正在扫描：{} / {} 个目录已完成，共 {} 项',
+        'batch_done': '完成：{} 个目录，共 {} 项',
+        'batch_failed': '，{} 个目录出错',
+        'batch_invalid': '不是有效的目录：\n{}',
+        'export_all': '全部导出…',
+        'close': '关闭',
+        'style_menu': '文本风格',
+        'style_spacious': '宽松（条目之间有竖线分隔）',
+        'style_compact': '紧凑',
+        'style_ascii': 'ASCII 字符',
+        'style_markdown': 'Markdown 列表',
+        'open_snapshot': '打开快照...',
+        'snapshot_opened': '快照：{}（{} 项）',
+        'sizes_full_depth': '（仍读取深度限制以下的内容）',
     },
     'zh-TW': {
         'title': '目錄結構查看器',
@@ -66,6 +151,77 @@ LANG = {
         'about_content': '目錄結構查看器 v1.1.1\n\nCopyright © 2025 Ryan Joo\n\n一款簡單易用的目錄結構生成工具',
         'empty_filename': '請輸入檔案名稱',
         'drop_placeholder': '拖放文件夾到此處...',
+        'cancel': '取消',
+        'scanning': '正在掃描… {} 個資料夾，{} 個項目',
+        'scan_done': '完成：{} 個資料夾，{} 個項目',
+        'scan_cancelled': '已取消',
+        'view_menu': '顯示模式',
+        'view_text': '文字',
+        'view_tree': '樹狀（適合大型目錄）',
+        'workers_menu': '並行掃描執行緒數',
+        'use_cache': '使用掃描快取',
+        'force_rescan': '強制完整重新掃描',
+        'watch': '監視變化並自動更新',
+        'watch_updated': '已更新 {} 個資料夾',
+        'limits_menu': '掃描範圍限制',
+        'max_depth': '最大深度',
+        'max_entries': '最多項目數',
+        'time_budget': '時間上限',
+        'unlimited': '不限制',
+        'seconds': '{} 秒',
+        'scan_truncated': '已達上限，顯示部分結果：{} 個資料夾，{} 個項目',
+        'use_gitignore': '遵循 .gitignore',
+        'ignore_patterns': '忽略規則…',
+        'ignore_hint': '每行一條規則，語法同 .gitignore（如 node_modules/、*.log、/build）',
+        'ok': '確定',
+        'saving': '正在保存… 已寫入 {} 個項目',
+        'export_data': '匯出資料...',
+        'show_sizes': '統計大小',
+        'sort_menu': '排序方式',
+        'sort_name': '按名稱',
+        'sort_size': '按大小',
+        'compare': '比較快照...',
+        'compare_hint': '請選擇一個快照（與目前目錄比較）或兩個快照',
+        'diff_done': '比較完成：新增 {}，刪除 {}，修改 {}',
+        'diff_truncated': '比較完成（快照不完整，結果可能包含誤報）：新增 {}，刪除 {}，修改 {}',
+        'search': '尋找：',
+        'search_filter': '只顯示符合項',
+        'search_count': '{} / {}',
+        'search_none': '無符合項',
+        'search_text_only': '尋找僅適用於文字檢視',
+        'show_diagnostics': '顯示診斷資訊',
+        'profile_scans': '用 cProfile 分析掃描',
+        'save_profile': '儲存分析結果…',
+        'profile_none': '尚無已完成的分析。請先勾選「用 cProfile 分析掃描」，再產生目錄樹。',
+        'profile_saved': '分析結果已儲存至 {}',
+        'diag_counts': '{} 個資料夾 · {} 個項目 · {} 次 stat · {} 個錯誤',
+        'diag_phases': '讀取 {read} · 渲染 {render} · 等待 {wait} · 插入 {insert} · 索引 {index} · 共 {total}',
+        'one_filesystem': '不進入其他檔案系統',
+        'symlinks_menu': '符號連結',
+        'symlinks_follow': '跟隨（偵測循環）',
+        'symlinks_show': '顯示連結目標',
+        'symlinks_skip': '忽略',
+        'sort_natural': '自然順序（file2 在 file10 之前）',
+        'sort_nocase': '按名稱（不區分大小寫）',
+        'sort_ext': '按副檔名',
+        'sort_mtime': '按修改時間（最新在前）',
+        'batch_scan': '批次掃描…',
+        'batch_hint': '要掃描的目錄，每行一個（也可以將多個資料夾拖放到路徑框）：',
+        'batch_title': '批次掃描（{} 個目錄）',
+        'batch_progress': '正在掃描：{} / {} 個目錄已完成，共 {} 項',
+        'batch_done': '完成：{} 個目錄，共 {} 項',
+        'batch_failed': '，{} 個目錄出錯',
+        'batch_invalid': '不是有效的目錄：\n{}',
+        'export_all': '全部匯出…',
+        'close': '關閉',
+        'style_menu': '文字風格',
+        'style_spacious': '寬鬆（項目之間有豎線分隔）',
+        'style_compact': '緊湊',
+        'style_ascii': 'ASCII 字元',
+        'style_markdown': 'Markdown 清單',
+        'open_snapshot': '開啟快照...',
+        'snapshot_opened': '快照：{}（{} 項）',
+        'sizes_full_depth': '（仍讀取深度限制以下的內容）',
     },
     'ja': {
         'title': 'ディレクトリツリービューアー',
@@ -91,6 +247,77 @@ LANG = {
         'about_content': 'ディレクトリツリービューアー v1.1.1\n\nCopyright © 2025 Ryan Joo\n\nディレクトリ構造を生成するシンプルなツール',
         'empty_filename': 'ファイル名を入力してください',
         'drop_placeholder': 'フォルダをここにドラッグ...',
+        'cancel': 'キャンセル',
+        'scanning': 'スキャン中… フォルダ {} 個、項目 {} 個',
+        'scan_done': '完了：フォルダ {} 個、項目 {} 個',
+        'scan_cancelled': 'キャンセルしました',
+        'view_menu': '表示モード',
+        'view_text': 'テキスト',
+        'view_tree': 'ツリー（大規模フォルダ向け）',
+        'workers_menu': '並列スキャンのスレッド数',
+        'use_cache': 'スキャンキャッシュを使用',
+        'force_rescan': '強制的に完全再スキャン',
+        'watch': '変更を監視して自動更新',
+        'watch_updated': '{} 個のフォルダを更新しました',
+        'limits_menu': 'スキャン範囲の制限',
+        'max_depth': '最大の深さ',
+        'max_entries': '最大項目数',
+        'time_budget': '時間の上限',
+        'unlimited': '制限なし',
+        'seconds': '{} 秒',
+        'scan_truncated': '上限に達したため一部のみ表示：フォルダ {} 個、項目 {} 個',
+        'use_gitignore': '.gitignore に従う',
+        'ignore_patterns': '除外パターン…',
+        'ignore_hint': '1 行に 1 パターン、.gitignore と同じ書式（例：node_modules/、*.log、/build）',
+        'ok': 'OK',
+        'saving': '保存中… {} 項目を書き込み済み',
+        'export_data': 'データをエクスポート...',
+        'show_sizes': 'サイズを集計',
+        'sort_menu': '並べ替え',
+        'sort_name': '名前順',
+        'sort_size': 'サイズ順',
+        'compare': 'スナップショットと比較...',
+        'compare_hint': 'スナップショットを 1 つ（現在のフォルダと比較）または 2 つ選択してください',
+        'diff_done': '比較完了：追加 {}、削除 {}、変更 {}',
+        'diff_truncated': '比較完了（スナップショットが不完全なため誤検出を含む可能性あり）：追加 {}、削除 {}、変更 {}',
+        'search': '検索：',
+        'search_filter': '一致のみ表示',
+        'search_count': '{} / {}',
+        'search_none': '一致なし',
+        'search_text_only': '検索はテキスト表示でのみ使えます',
+        'show_diagnostics': '診断情報を表示',
+        'profile_scans': 'cProfile でスキャンを計測',
+        'save_profile': '計測結果を保存…',
+        'profile_none': '完了した計測がありません。「cProfile でスキャンを計測」をオンにしてからツリーを生成してください。',
+        'profile_saved': '計測結果を {} に保存しました',
+        'diag_counts': 'フォルダ {} · 項目 {} · stat {} 回 · エラー {}',
+        'diag_phases': '読込 {read} · 描画 {render} · 待機 {wait} · 挿入 {insert} · 索引 {index} · 合計 {total}',
+        'one_filesystem': '他のファイルシステムに入らない',
+        'symlinks_menu': 'シンボリックリンク',
+        'symlinks_follow': 'たどる（ループを検出）',
+        'symlinks_show': 'リンク先を表示',
+        'symlinks_skip': '表示しない',
+        'sort_natural': '自然順（file2 が file10 より前）',
+        'sort_nocase': '名前順（大文字と小文字を区別しない）',
+        'sort_ext': '拡張子順',
+        'sort_mtime': '更新日時順（新しい順）',
+        'batch_scan': '一括スキャン…',
+        'batch_hint': 'スキャンするフォルダー（1 行に 1 つ。複数のフォルダーをパス欄にドロップすることもできます）：',
+        'batch_title': '一括スキャン（{} フォルダー）',
+        'batch_progress': 'スキャン中：{} / {} フォルダー完了、{} 項目',
+        'batch_done': '完了：{} フォルダー、{} 項目',
+        'batch_failed': '、{} フォルダーでエラー',
+        'batch_invalid': '有効なフォルダーではありません：\n{}',
+        'export_all': 'すべてエクスポート…',
+        'close': '閉じる',
+        'style_menu': 'テキストの形式',
+        'style_spacious': 'ゆったり（項目の間に縦線）',
+        'style_compact': 'コンパクト',
+        'style_ascii': 'ASCII 文字',
+        'style_markdown': 'Markdown リスト',
+        'open_snapshot': 'スナップショットを開く...',
+        'snapshot_opened': 'スナップショット：{}（{} 項目）',
+        'sizes_full_depth': '（深さの制限より下も読み取ります）',
     },
     'ko': {
         'title': '디렉토리 트리 뷰어',
@@ -116,6 +343,77 @@ LANG = {
         'about_content': '디렉토리 트리 뷰어 v1.1.1\n\nCopyright © 2025 Ryan Joo\n\n디렉토리 구조를 생성하는 간단한 도구',
         'empty_filename': '파일 이름을 입력하세요',
         'drop_placeholder': '폴더를 여기에 드래그...',
+        'cancel': '취소',
+        'scanning': '스캔 중… 폴더 {}개, 항목 {}개',
+        'scan_done': '완료: 폴더 {}개, 항목 {}개',
+        'scan_cancelled': '취소됨',
+        'view_menu': '보기 모드',
+        'view_text': '텍스트',
+        'view_tree': '트리 (대용량 폴더용)',
+        'workers_menu': '병렬 스캔 스레드 수',
+        'use_cache': '스캔 캐시 사용',
+        'force_rescan': '강제 전체 다시 스캔',
+        'watch': '변경 감시 및 자동 갱신',
+        'watch_updated': '폴더 {}개를 갱신했습니다',
+        'limits_menu': '스캔 범위 제한',
+        'max_depth': '최대 깊이',
+        'max_entries': '최대 항목 수',
+        'time_budget': '시간 제한',
+        'unlimited': '제한 없음',
+        'seconds': '{}초',
+        'scan_truncated': '제한에 도달하여 일부만 표시: 폴더 {}개, 항목 {}개',
+        'use_gitignore': '.gitignore 따르기',
+        'ignore_patterns': '제외 패턴…',
+        'ignore_hint': '한 줄에 하나씩, .gitignore 형식 (예: node_modules/, *.log, /build)',
+        'ok': '확인',
+        'saving': '저장 중… {}개 항목 기록됨',
+        'export_data': '데이터 내보내기...',
+        'show_sizes': '크기 집계',
+        'sort_menu': '정렬',
+        'sort_name': '이름순',
+        'sort_size': '크기순',
+        'compare': '스냅샷 비교...',
+        'compare_hint': '스냅샷을 하나(현재 폴더와 비교) 또는 두 개 선택하세요',
+        'diff_done': '비교 완료: 추가 {}, 삭제 {}, 수정 {}',
+        'diff_truncated': '비교 완료(스냅샷이 불완전하여 오탐이 있을 수 있음): 추가 {}, 삭제 {}, 수정 {}',
+        'search': '찾기:',
+        'search_filter': '일치 항목만 표시',
+        'search_count': '{} / {}',
+        'search_none': '일치 없음',
+        'search_text_only': '찾기는 텍스트 보기에서만 사용할 수 있습니다',
+        'show_diagnostics': '진단 정보 표시',
+        'profile_scans': 'cProfile로 스캔 분석',
+        'save_profile': '분석 결과 저장…',
+        'profile_none': "완료된 분석이 없습니다. 'cProfile로 스캔 분석'을 켠 뒤 트리를 생성하세요.",
+        'profile_saved': '분석 결과를 {}에 저장했습니다',
+        'diag_counts': '폴더 {} · 항목 {} · stat {}회 · 오류 {}',
+        'diag_phases': '읽기 {read} · 렌더링 {render} · 대기 {wait} · 삽입 {insert} · 색인 {index} · 합계 {total}',
+        'one_filesystem': '다른 파일 시스템으로 들어가지 않음',
+        'symlinks_menu': '심볼릭 링크',
+        'symlinks_follow': '따라가기 (순환 감지)',
+        'symlinks_show': '링크 대상 표시',
+        'symlinks_skip': '무시',
+        'sort_natural': '자연 순서 (file2가 file10보다 앞)',
+        'sort_nocase': '이름순 (대소문자 무시)',
+        'sort_ext': '확장자순',
+        'sort_mtime': '수정 시간순 (최신순)',
+        'batch_scan': '일괄 스캔…',
+        'batch_hint': '스캔할 폴더를 한 줄에 하나씩 입력하세요 (여러 폴더를 경로 입력란에 끌어다 놓을 수도 있습니다):',
+        'batch_title': '일괄 스캔 ({}개 폴더)',
+        'batch_progress': '스캔 중: {} / {}개 폴더 완료, {}개 항목',
+        'batch_done': '완료: {}개 폴더, {}개 항목',
+        'batch_failed': ', {}개 폴더 오류',
+        'batch_invalid': '유효한 폴더가 아닙니다:\n{}',
+        'export_all': '모두 내보내기…',
+        'close': '닫기',
+        'style_menu': '텍스트 스타일',
+        'style_spacious': '넓게 (항목 사이에 세로선)',
+        'style_compact': '간결하게',
+        'style_ascii': 'ASCII 문자',
+        'style_markdown': 'Markdown 목록',
+        'open_snapshot': '스냅샷 열기...',
+        'snapshot_opened': '스냅샷: {} ({}개 항목)',
+        'sizes_full_depth': ' (깊이 제한 아래도 읽음)',
     },
     'en': {
         'title': 'Directory Tree Viewer',
@@ -141,47 +439,117 @@ LANG = {
         'about_content': 'Directory Tree Viewer v1.1.1\n\nCopyright © 2025 Ryan Joo\n\nA simple tool for generating directory structures',
         'empty_filename': 'Please enter a file name',
         'drop_placeholder': 'Drag folder here...',
+        'cancel': 'Cancel',
+        'scanning': 'Scanning… {} folders, {} items',
+        'scan_done': 'Done: {} folders, {} items',
+        'scan_cancelled': 'Cancelled',
+        'view_menu': 'View',
+        'view_text': 'Text',
+        'view_tree': 'Tree (large folders)',
+        'workers_menu': 'Parallel scan threads',
+        'use_cache': 'Use scan cache',
+        'force_rescan': 'Force full rescan',
+        'watch': 'Watch for changes',
+        'watch_updated': 'Updated {} folders',
+        'limits_menu': 'Scan limits',
+        'max_depth': 'Max depth',
+        'max_entries': 'Max items',
+        'time_budget': 'Time limit',
+        'unlimited': 'Unlimited',
+        'seconds': '{} s',
+        'scan_truncated': 'Limit reached, showing partial tree: {} folders, {} items',
+        'use_gitignore': 'Respect .gitignore',
+        'ignore_patterns': 'Ignore patterns…',
+        'ignore_hint': 'One pattern per line, .gitignore syntax (e.g. node_modules/, *.log, /build)',
+        'ok': 'OK',
+        'saving': 'Saving… {} items written',
+        'export_data': 'Export data...',
+        'show_sizes': 'Show sizes',
+        'sort_menu': 'Sort by',
+        'sort_name': 'Name',
+        'sort_size': 'Size',
+        'compare': 'Compare snapshot...',
+        'compare_hint': 'Select one snapshot (compared with the current folder) or two snapshots',
+        'diff_done': 'Compared: {} added, {} removed, {} modified',
+        'diff_truncated': 'Compared (a snapshot is incomplete, results may include false changes): {} added, {} removed, {} modified',
+        'search': 'Find:',
+        'search_filter': 'Only matches',
+        'search_count': '{} / {}',
+        'search_none': 'No matches',
+        'search_text_only': 'Search works in the text view',
+        'show_diagnostics': 'Show diagnostics',
+        'profile_scans': 'Profile scans (cProfile)',
+        'save_profile': 'Save profile…',
+        'profile_none': 'No profiled scan has finished yet. Turn on Profile scans (cProfile), then generate a tree.',
+        'profile_saved': 'Profile saved to {}',
+        'diag_counts': '{} folders · {} entries · {} stat · {} errors',
+        'diag_phases': 'read {read} · render {render} · wait {wait} · insert {insert} · index {index} · total {total}',
+        'one_filesystem': 'Stay on one file system',
+        'symlinks_menu': 'Symbolic links',
+        'symlinks_follow': 'Follow (detect loops)',
+        'symlinks_show': 'Show link targets',
+        'symlinks_skip': 'Skip',
+        'sort_natural': 'Natural (file2 before file10)',
+        'sort_nocase': 'Name, ignoring case',
+        'sort_ext': 'Extension',
+        'sort_mtime': 'Modified (newest first)',
+        'batch_scan': 'Batch scan…',
+        'batch_hint': 'Folders to scan, one per line (you can also drop several folders on the path box):',
+        'batch_title': 'Batch scan ({} folders)',
+        'batch_progress': 'Scanning: {} of {} folders done, {} items',
+        'batch_done': 'Done: {} folders, {} items',
+        'batch_failed': ', {} could not be scanned',
+        'batch_invalid': 'Not a folder:\n{}',
+        'export_all': 'Export all…',
+        'close': 'Close',
+        'style_menu': 'Text style',
+        'style_spacious': 'Spacious (spacer lines)',
+        'style_compact': 'Compact',
+        'style_ascii': 'ASCII only',
+        'style_markdown': 'Markdown list',
+        'open_snapshot': 'Open snapshot...',
+        'snapshot_opened': 'Snapshot of {} ({} items)',
+        'sizes_full_depth': ' (still reads below the depth limit)',
     }
 }
 
-# 语言选项配置（语言代码，显示名称）
+# 语言选项配置（语言代码，显示名称），按显示名称的首字母排序（中文按拼音）；
+# 顺序固定，直接写出排好的结果，启动时无需加载拼音库
 LANGUAGE_OPTIONS = [
     ('en', 'English'),
+    ('zh-TW', '繁體中文'),
+    ('zh-CN', '简体中文'),
     ('ja', '日本語'),
     ('ko', '한국어'),
-    ('zh-CN', '简体中文'),
-    ('zh-TW', '繁體中文')
 ]
 
+# 当前语言（默认为英文）
+current_lang = 'en'
+
+# 流式显示参数：后台线程按批发送文本行，主线程每次定时回调只插入有限的行数
+FIRST_BATCH_LINES = 200  # 首批行数较小，尽快显示第一屏
+BATCH_LINES = 2000  # 之后每批的行数
+BATCH_INTERVAL = 0.1  # 遍历较慢时，最多间隔多少秒发送一批
+QUEUE_MAX_BATCHES = 32  # 队列中最多积压的批数（限制内存峰值）
+INSERT_LINES_PER_TICK = 20000  # 每次定时回调最多插入的行数
 
-# 按首字母拼音/字母排序语言选项
-def get_sort_key(item):
-    """获取排序依据：非ASCII字符按拼音/原字符，ASCII字符转小写"""
-    first_char = item[1][0]
-    if ord(first_char) > 255:  # 非ASCII字符
-        try:
-            # 中文、日文、韩文字符处理
-            if '\u4e00' <= first_char <= '\u9fff':  # 中文
-                return pinyin(first_char, style=Style.NORMAL)[0][0]
-            elif '\u3040' <= first_char <= '\u309f':  # 日文平假名
-                return first_char
-            elif '\u30a0' <= first_char <= '\u30ff':  # 日文片假名
-                return first_char
-            elif '\uac00' <= first_char <= '\ud7a3':  # 韩文
-                return first_char
-            else:
-                return first_char
-        except:
-            return first_char
-    else:  # ASCII字符
-        return first_char.lower()
+# 监视模式：检查目录变化队列的间隔（毫秒）
+WATCH_POLL_MS = 200
 
+# 并行扫描线程数选项（网络盘等高延迟文件系统上多线程可显著加速）
+WORKER_OPTIONS = (1, 4, 8, 16)
 
-# 对语言选项进行排序
-LANGUAGE_OPTIONS.sort(key=get_sort_key)
+# 扫描范围限制选项（None 表示不限制），超出部分以“… N more”标记代替
+DEPTH_OPTIONS = (None, 1, 2, 3, 5, 10)
+ENTRY_OPTIONS = (None, 10000, 100000, 1000000)
+TIME_OPTIONS = (None, 5, 30, 120)  # 秒
 
-# 当前语言（默认为英文）
-current_lang = 'en'
+# 比较结果中新增、删除、修改的条目的文字颜色
+DIFF_COLORS = {ADDED: '#1a7f37', REMOVED: '#cf222e', MODIFIED: '#9a6700'}
+
+# 搜索：输入停顿多久后开始查找（毫秒），以及最多标出的匹配数
+SEARCH_DELAY_MS = 150
+SEARCH_LIMIT = 10000
 
 
 def tr(key):
@@ -194,7 +562,65 @@ class DirectoryTreeApp:
     def __init__(self, root):
         """初始化应用窗口"""
         self.root = root
+        # 后台扫描状态：每次生成创建新的取消事件和结果队列，旧任务的结果直接丢弃
+        self._scan_cancel = None
+        self._scan_queue = None
+        self._scan_stats = None
+        # 后台保存状态（与扫描相互独立，可同时进行）
+        self._export_cancel = None
+        self._export_stats = None
+        # 显示模式：'text' 为文本框，'tree' 为虚拟化树形视图（适合大目录）
+        self.view_mode = 'text'
+        # 并行读取目录的线程数
+        self.scan_workers = 1
+        # 扫描范围限制（深度、条目数、时间），默认不限制
+        self.scan_limits = ScanLimits()
+        # 符号链接：'follow' 跟随（指回上层目录的链接不进入），'show' 作为条目显示其目标，'skip' 不显示
+        self.symlink_mode = 'follow'
+        # 持久化扫描缓存（首次使用时打开，打开失败则不使用缓存）
+        self.use_cache = True
+        self._scan_cache = None
+        # 忽略规则：各级目录中的 .gitignore 和用户指定的模式（.gitignore 语法，每项一行）
+        self.use_gitignore = False
+        self.ignore_patterns = []
+        # 大小统计：标注每个目录的总大小和文件数，可按大小排序（仅文本模式）
+        self.show_sizes = False
+        self.sort_mode = 'name'
+        # 文本风格（见 tree_core.RENDER_STYLES），同时用于保存的文本和 Markdown 文件
+        self.render_style = 'spacious'
+        # 监视模式：显示的目录发生变化时只局部更新受影响的部分
+        self.watch_enabled = False
+        self._watcher = None
+        self._watch_queue = None
+        self._shown_root = None  # 当前显示的根目录
+        self._shown_lister = list_dir  # 生成当前显示内容时使用的 lister
+        self._shown_limits = ScanLimits()  # 生成当前显示内容时使用的范围限制
+        self._shown_truncated = False  # 当前显示内容是否因预算用尽而不完整
+        self._shown_sizes = False  # 当前显示内容是否标注了大小
+        self._shown_sort = 'name'  # 当前显示内容的排序方式
+        self._shown_stat = False  # 生成当前显示内容时是否读取了大小和修改时间
+        self._shown_style = 'spacious'  # 当前显示内容的文本风格
+        # 文本模式：当前显示内容的扫描结果（tree_model.CompactTree）及其计数 (目录数, 条目数, 是否不完整)，
+        # 用于切换排序方式时直接重新排列，局部更新后为 None
+        self._shown_tree = None
+        self._shown_counts = None
+        self._scan_tree = None  # 正在生成的内容完成后成为 _shown_tree
+        self._diff_summary = None  # 显示的是比较结果时为 tree_diff.DiffSummary
+        self._dir_lines = {}  # 文本模式：目录路径 -> (行号, 深度, 是否最后一项)
+        # 搜索：文本模式下随生成逐批建立的名称索引（局部更新后为 None，查找时从文本重建）
+        self._search_index = None
+        self._search_hits = []  # 匹配条目所在的行号（从 1 开始）
+        self._search_pos = -1  # 当前定位到的匹配
+        self._search_job = None  # 等待执行的查找（after 返回的 id）
+        self._search_query = ''  # 最近一次查找的内容
+        # 诊断：启用后统计每次扫描的计数和各阶段耗时，可另外用 cProfile 分析后台线程
+        self.show_diagnostics = False
+        self.profile_scans = False
+        self._scan_profile = None  # 最近一次扫描的 tree_profile.ScanProfile（未启用时为 None）
+        # 批量扫描：打开的 BatchScanWindow（关闭主窗口时一并取消）
+        self._batch_windows = set()
         self.setup_ui()
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
 
     def setup_ui(self):
         """设置主界面布局"""
@@ -216,7 +642,8 @@ class DirectoryTreeApp:
         self._setup_tree_display()
         self._setup_statusbar()
         self._setup_menus()
-        self.setup_drag_drop()
+        # 拖放支持需要加载 tkdnd 扩展，等窗口第一次绘制完成（空闲回调处理完）后再设置
+        self.root.after_idle(self.root.after, 0, self.setup_drag_drop)
 
     def _configure_styles(self):
         """配置GUI样式"""
@@ -259,19 +686,30 @@ class DirectoryTreeApp:
         btn_frame.pack(side=tk.RIGHT)
         ttk.Button(btn_frame, text=tr('generate'), style='Primary.TButton',
                    command=self.display_tree).pack(side=tk.LEFT, padx=2)
+        # 取消按钮（仅在扫描进行中可用）
+        self.btn_cancel = ttk.Button(btn_frame, text=tr('cancel'), state=tk.DISABLED,
+                                     command=self.cancel_scan)
+        self.btn_cancel.pack(side=tk.LEFT, padx=2)
 
         # 初始设置拖放占位符
         self.set_drop_placeholder()
-
-        # 设置拖放功能
-        self.setup_drag_drop()
-
-    def setup_drag_drop(self):
-        """使用 tkinterdnd2 设置跨平台拖放功能"""
         # 焦点事件处理
         self.entry_path.bind('<FocusIn>', self.on_focus_in)
         self.entry_path.bind('<FocusOut>', self.on_focus_out)
 
+    def setup_drag_drop(self):
+        """使用 tkinterdnd2 设置跨平台拖放功能（在窗口显示后调用）
+
+        主窗口为普通的 tk.Tk 时在这里加载 tkdnd 扩展；无法加载时只是不能拖放，不影响其他功能。
+        """
+        try:
+            from tkinterdnd2 import DND_FILES, TkinterDnD
+            if getattr(self.root, 'TkdndVersion', None) is None:
+                self.root.TkdndVersion = TkinterDnD._require(self.root)
+        except (ImportError, RuntimeError, tk.TclError) as e:
+            print(f"拖放功能不可用: {e}")  # 失败提示（不影响运行）
+            return
+
         # 使用 tkinterdnd2 的拖放事件
         self.entry_path.drop_target_register(DND_FILES)
         self.entry_path.dnd_bind('<<DropEnter>>', self.on_dnd_drag_enter)
@@ -344,39 +782,37 @@ class DirectoryTreeApp:
         return event.action
 
     def on_dnd_drop(self, event):
-        """处理拖放文件事件"""
+        """处理拖放文件事件：一个文件夹直接生成，多个文件夹打开批量扫描，快照文件直接浏览"""
         self.entry_path.configure(background='white')  # 恢复背景色
 
-        # 获取拖放的数据
-        data = event.data.strip()
-
-        # 处理特殊格式（Windows路径带有{}）
-        if data.startswith('{') and data.endswith('}'):
-            data = data[1:-1]
-
-        # 分割多个文件路径（拖放可能包含多个文件）
-        paths = data.split()
+        # 拖放的数据为 Tcl 列表（含空格的路径带有{}），可能包含多个文件
+        paths = self.root.tk.splitlist(event.data)
         if not paths:
             return
+        from tree_snapshot import EXTENSION as SNAPSHOT_EXTENSION
+        if len(paths) == 1 and paths[0].lower().endswith(SNAPSHOT_EXTENSION):
+            self.open_snapshot(paths[0])
+            return
 
-        # 只取第一个有效文件夹
+        # 文件使用其所在目录，重复的目录只保留一次
+        folders = []
         for path in paths:
-            if os.path.isdir(path):
-                self.clear_drop_placeholder()
-                self.entry_path.delete(0, tk.END)
-                self.entry_path.insert(0, path)
-                self.display_tree()  # 自动生成目录结构
-                break
-            elif os.path.isfile(path):
-                # 如果是文件，使用其所在目录
-                self.clear_drop_placeholder()
-                self.entry_path.delete(0, tk.END)
-                self.entry_path.insert(0, os.path.dirname(path))
-                self.display_tree()  # 自动生成目录结构
-                break
-        else:
+            if os.path.isfile(path):
+                path = os.path.dirname(path)
+            if os.path.isdir(path) and path not in folders:
+                folders.append(path)
+        if not folders:
             # 没有找到有效文件夹或文件
             messagebox.showwarning(tr('error'), tr('invalid_path'))
+            return
+
+        self.clear_drop_placeholder()
+        self.entry_path.delete(0, tk.END)
+        self.entry_path.insert(0, folders[0])
+        if len(folders) > 1:
+            self.open_batch(folders)
+        else:
+            self.display_tree()  # 自动生成目录结构
 
     def _setup_tree_display(self):
         """创建目录树显示区域"""
@@ -386,6 +822,7 @@ class DirectoryTreeApp:
         # 滚动条框架 - 同时包含水平和垂直滚动条
         scroll_frame = ttk.Frame(display_frame)
         scroll_frame.pack(expand=True, fill=tk.BOTH)
+        self.text_frame = scroll_frame
 
         # 垂直滚动条
         v_scrollbar = ttk.Scrollbar(scroll_frame, orient=tk.VERTICAL)
@@ -406,6 +843,9 @@ class DirectoryTreeApp:
             yscrollcommand=v_scrollbar.set
         )
         self.text_output.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        # 比较结果的颜色（标签名即 tree_diff 中的变化类型）
+        for status, color in DIFF_COLORS.items():
+            self.text_output.tag_configure(status, foreground=color)
 
         # 设置滚动条与文本区域的关联
         v_scrollbar.config(command=self.text_output.yview)
@@ -428,6 +868,53 @@ class DirectoryTreeApp:
             False)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text=tr('save_md'), command=lambda: self.save_output(
             True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=tr('export_data'),
+                   command=self.export_data).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=tr('compare'),
+                   command=self.compare_snapshot).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=tr('open_snapshot'),
+                   command=self.open_snapshot).pack(side=tk.LEFT, padx=5)
+
+        # 虚拟化树形视图（树形模式下替换文本框，只绘制可见行），第一次切换到树形模式时再创建
+        self.tree_view = None
+        self.display_frame = display_frame
+        self.btn_frame = btn_frame
+        self._setup_search_bar(display_frame, scroll_frame)
+
+    def _setup_search_bar(self, display_frame, scroll_frame):
+        """创建文本框上方的搜索栏：输入时即时查找，回车跳到下一个匹配"""
+        search_frame = ttk.Frame(display_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5), before=scroll_frame)
+
+        self.search_label = ttk.Label(search_frame, text=tr('search'))
+        self.search_label.pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.entry_search = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
+        self.entry_search.pack(side=tk.LEFT, padx=5)
+        self.entry_search.bind('<KeyRelease>', self.on_search_key)
+        self.entry_search.bind('<Return>', lambda e: self.jump_search(1))
+        self.entry_search.bind('<Shift-Return>', lambda e: self.jump_search(-1))
+        self.entry_search.bind('<Escape>', lambda e: self.clear_search())
+        self.root.bind('<Control-f>', lambda e: self.entry_search.focus_set())
+
+        ttk.Button(search_frame, text='▲', width=3,
+                   command=lambda: self.jump_search(-1)).pack(side=tk.LEFT)
+        ttk.Button(search_frame, text='▼', width=3,
+                   command=lambda: self.jump_search(1)).pack(side=tk.LEFT, padx=(2, 5))
+        # 只显示匹配的条目及其上层目录（其余行隐藏，不重新生成）
+        self.search_filter = tk.BooleanVar(value=False)
+        self.btn_search_filter = ttk.Checkbutton(
+            search_frame, text=tr('search_filter'), variable=self.search_filter,
+            command=self.run_search)
+        self.btn_search_filter.pack(side=tk.LEFT, padx=5)
+        self.search_count = ttk.Label(search_frame, text='')
+        self.search_count.pack(side=tk.LEFT, padx=5)
+
+        text = self.text_output
+        text.tag_configure('search_hit', background='#fff3b0')
+        text.tag_configure('search_current', background='#ffc940')
+        text.tag_configure('search_hidden', elide=True)
+        text.tag_raise('search_current', 'search_hit')
 
     def _setup_statusbar(self):
         """创建底部状态栏"""
@@ -435,6 +922,11 @@ class DirectoryTreeApp:
         status_frame.pack(side=tk.BOTTOM, fill=tk.X)
         ttk.Label(status_frame, text="Copyright © 2025 Ryan Joo",
                   style='Status.TLabel').pack(side=tk.RIGHT, padx=5)
+        # 扫描进度/结果提示
+        self.status_label = ttk.Label(status_frame, text='', style='Status.TLabel')
+        self.status_label.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        # 诊断信息（计数和各阶段耗时），仅在启用时显示
+        self.diag_label = ttk.Label(status_frame, text='', style='Status.TLabel')
 
     def _setup_menus(self):
         """创建菜单系统"""
@@ -457,6 +949,105 @@ class DirectoryTreeApp:
                 command=lambda lc=lang_code: self.switch_language(lc)
             )
 
+        # 显示模式子菜单
+        view_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('view_menu'), menu=view_menu)
+        for mode, key in (('text', 'view_text'), ('tree', 'view_tree')):
+            checked = '✓ ' if self.view_mode == mode else ''
+            view_menu.add_command(
+                label=f"{checked}{tr(key)}",
+                command=lambda m=mode: self.switch_view_mode(m)
+            )
+
+        # 并行扫描线程数子菜单
+        workers_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('workers_menu'), menu=workers_menu)
+        for workers in WORKER_OPTIONS:
+            checked = '✓ ' if self.scan_workers == workers else ''
+            workers_menu.add_command(
+                label=f"{checked}{workers}",
+                command=lambda w=workers: self.set_scan_workers(w)
+            )
+
+        # 扫描范围限制子菜单
+        limits_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('limits_menu'), menu=limits_menu)
+        for attr, options, fmt in (
+                ('max_depth', DEPTH_OPTIONS, str),
+                ('max_entries', ENTRY_OPTIONS, '{:,}'.format),
+                ('time_budget', TIME_OPTIONS, tr('seconds').format)):
+            submenu = tk.Menu(limits_menu, tearoff=0)
+            limits_menu.add_cascade(label=tr(attr), menu=submenu)
+            for value in options:
+                checked = '✓ ' if getattr(self.scan_limits, attr) == value else ''
+                label = tr('unlimited') if value is None else fmt(value)
+                submenu.add_command(
+                    label=f"{checked}{label}",
+                    command=lambda a=attr, v=value: self.set_scan_limit(a, v)
+                )
+        checked = '✓ ' if self.scan_limits.one_filesystem else ''
+        limits_menu.add_command(label=f"{checked}{tr('one_filesystem')}",
+                                command=self.toggle_one_filesystem)
+
+        # 符号链接子菜单
+        symlinks_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('symlinks_menu'), menu=symlinks_menu)
+        for mode in SYMLINK_MODES:
+            checked = '✓ ' if self.symlink_mode == mode else ''
+            symlinks_menu.add_command(
+                label=f"{checked}{tr('symlinks_' + mode)}",
+                command=lambda m=mode: self.set_symlink_mode(m)
+            )
+
+        # 扫描缓存
+        checked = '✓ ' if self.use_cache else ''
+        options_menu.add_command(label=f"{checked}{tr('use_cache')}", command=self.toggle_cache)
+        options_menu.add_command(label=tr('force_rescan'),
+                                 command=lambda: self.display_tree(force_rescan=True))
+        options_menu.add_command(label=tr('batch_scan'), command=self.edit_batch_roots)
+
+        # 忽略规则
+        checked = '✓ ' if self.use_gitignore else ''
+        options_menu.add_command(label=f"{checked}{tr('use_gitignore')}",
+                                 command=self.toggle_gitignore)
+        options_menu.add_command(label=tr('ignore_patterns'), command=self.edit_ignore_patterns)
+
+        # 大小统计与排序
+        checked = '✓ ' if self.show_sizes else ''
+        # 统计大小时深度限制只作用于显示，更深的目录照常读取，以便上层目录的总数准确
+        note = tr('sizes_full_depth') if self.scan_limits.max_depth is not None else ''
+        options_menu.add_command(label=f"{checked}{tr('show_sizes')}{note}",
+                                 command=self.toggle_sizes)
+        sort_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('sort_menu'), menu=sort_menu)
+        for mode in SORT_MODES:
+            checked = '✓ ' if self.sort_mode == mode else ''
+            sort_menu.add_command(
+                label=f"{checked}{tr('sort_' + mode)}",
+                command=lambda m=mode: self.set_sort_mode(m)
+            )
+        style_menu = tk.Menu(options_menu, tearoff=0)
+        options_menu.add_cascade(label=tr('style_menu'), menu=style_menu)
+        for style in RENDER_STYLES:
+            checked = '✓ ' if self.render_style == style else ''
+            style_menu.add_command(
+                label=f"{checked}{tr('style_' + style)}",
+                command=lambda s=style: self.set_render_style(s)
+            )
+
+        # 监视模式
+        checked = '✓ ' if self.watch_enabled else ''
+        options_menu.add_command(label=f"{checked}{tr('watch')}", command=self.toggle_watch)
+
+        # 诊断
+        checked = '✓ ' if self.show_diagnostics else ''
+        options_menu.add_command(label=f"{checked}{tr('show_diagnostics')}",
+                                 command=self.toggle_diagnostics)
+        checked = '✓ ' if self.profile_scans else ''
+        options_menu.add_command(label=f"{checked}{tr('profile_scans')}",
+                                 command=self.toggle_profiling)
+        options_menu.add_command(label=tr('save_profile'), command=self.save_profile)
+
         # 关于菜单项
         options_menu.add_command(label=tr('about'), command=self.show_about)
         self.root.config(menu=menubar)
@@ -486,18 +1077,426 @@ class DirectoryTreeApp:
             (self.entry_path.master.winfo_children()[2], 'choose_dir'),
             (self.main_frame.winfo_children()[0].winfo_children()[
                  1].winfo_children()[0], 'generate'),
+            (self.btn_cancel, 'cancel'),
             (self.btn_copy, 'copy'),
             (self.btn_clear, 'clear'),
+            (self.search_label, 'search'),
+            (self.btn_search_filter, 'search_filter'),
             *[(btn, text) for btn, text in zip(
                 self.main_frame.winfo_children()[1].winfo_children()[
-                    1].winfo_children()[2:4],
-                ['save_txt', 'save_md'])]
+                    1].winfo_children()[2:7],
+                ['save_txt', 'save_md', 'export_data', 'compare', 'open_snapshot'])]
         ]
 
         # 遍历更新所有控件文本
         for widget, key in widgets:
             widget.config(text=tr(key))
 
+    def switch_view_mode(self, mode):
+        """在文本框和虚拟化树形视图之间切换"""
+        if self.view_mode == mode:
+            return
+        self.view_mode = mode
+        self._stop_watch()  # 监视与显示模式相关，切换后需重新生成
+        if mode == 'tree':
+            self.text_frame.pack_forget()
+            if self.tree_view is None:
+                from tree_view import VirtualTreeView
+                self.tree_view = VirtualTreeView(self.display_frame)
+            self.tree_view.pack(expand=True, fill=tk.BOTH, before=self.btn_frame)
+        else:
+            self.tree_view.pack_forget()  # 之前为树形模式，视图已创建
+            self.text_frame.pack(expand=True, fill=tk.BOTH, before=self.btn_frame)
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def set_scan_workers(self, workers):
+        """设置并行扫描线程数"""
+        self.scan_workers = workers
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def set_scan_limit(self, attr, value):
+        """设置一项扫描范围限制（ScanLimits 的属性名及其取值），下次生成时生效"""
+        setattr(self.scan_limits, attr, value)
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def toggle_one_filesystem(self):
+        """启用/停用“不进入其他文件系统”，下次生成时生效"""
+        self.scan_limits.one_filesystem = not self.scan_limits.one_filesystem
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def set_symlink_mode(self, mode):
+        """设置符号链接的处理方式（见 SYMLINK_MODES），下次生成时生效"""
+        self.symlink_mode = mode
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def toggle_cache(self):
+        """启用/停用持久化扫描缓存"""
+        self.use_cache = not self.use_cache
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def toggle_gitignore(self):
+        """启用/停用 .gitignore 过滤，下次生成时生效"""
+        self.use_gitignore = not self.use_gitignore
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def toggle_sizes(self):
+        """启用/停用大小统计，下次生成时生效"""
+        self.show_sizes = not self.show_sizes
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def set_sort_mode(self, mode):
+        """设置同一目录中子项的排序方式（按大小排序时自动统计大小）
+
+        文本框中已有完整生成的目录树，且其中含有这种方式需要的信息时，立即按新的方式重新排列，
+        不再读取文件系统；否则下次生成时生效。
+        """
+        self.sort_mode = mode
+        self._setup_menus()  # 重新创建菜单更新选中标记
+        tree = self._shown_tree
+        if (tree is None or self.view_mode != 'text' or self._scan_cancel is not None
+                or mode == self._shown_sort):
+            return
+        sizes = self.show_sizes or mode == 'size'
+        if sizes != self._shown_sizes or (mode in STAT_SORTS and not self._shown_stat):
+            return  # 需要重新扫描才能得到大小或修改时间
+        self._shown_sort = mode
+        self._redisplay(tree)
+
+    def set_render_style(self, style):
+        """设置文本风格（见 tree_core.RENDER_STYLES）
+
+        文本框中已有完整生成的目录树时，立即按新的风格重新渲染，不再读取文件系统；
+        否则下次生成时生效。保存文本和 Markdown 文件时也使用这一风格。
+        """
+        self.render_style = style
+        self._setup_menus()  # 重新创建菜单更新选中标记
+        tree = self._shown_tree
+        if (tree is None or self.view_mode != 'text' or self._scan_cancel is not None
+                or style == self._shown_style):
+            return
+        self._redisplay(tree)
+
+    def _redisplay(self, tree):
+        """按 _shown_sort 和当前的文本风格重新显示已保存的扫描结果 tree（不读取文件系统）"""
+        self._stop_watch()
+        self._shown_style = style = self.render_style
+        self._dir_lines = {}
+        self._diff_summary = None
+        mode = self._shown_sort
+        sizes = self._shown_sizes
+        max_depth = self._shown_limits.max_depth if sizes else None
+        counts = self._shown_counts
+
+        def make_lines(stats, cancel):
+            stats.dirs, stats.entries, stats.truncated = counts
+            return self._sorted_lines(tree, mode, max_depth, sizes, style, cancel)
+        self._start_scan(make_lines, profile=self._new_profile(), tree=tree)
+
+    @staticmethod
+    def _sorted_lines(tree, mode, max_depth, sizes, style, cancel):
+        """按 mode 重新排列已保存的扫描结果，以 style 风格逐行产出 (行, 节点)（在后台线程中迭代）"""
+        nodes = tree.iter_nodes(key=tree.order_key(mode), max_depth=max_depth)
+        renderer = make_renderer(style, size_label if sizes else None)
+        for item in render_lines(nodes, True, renderer):
+            if cancel.is_set():
+                raise ScanCancelled()
+            yield item
+
+    def toggle_diagnostics(self):
+        """显示/隐藏状态栏中的诊断信息，从下次生成开始统计"""
+        self.show_diagnostics = not self.show_diagnostics
+        if self.show_diagnostics:
+            self.diag_label.pack(side=tk.RIGHT, padx=5, before=self.status_label)
+            self._update_diagnostics()
+        else:
+            self.diag_label.pack_forget()
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def toggle_profiling(self):
+        """启用/停用 cProfile 分析，下次生成时生效（分析会使扫描明显变慢）"""
+        self.profile_scans = not self.profile_scans
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def save_profile(self):
+        """将最近一次完成的 cProfile 分析保存为 pstats 文件"""
+        profile = self._scan_profile
+        if profile is None or profile.profiler is None or profile.finished is None:
+            messagebox.showinfo(tr('save_profile').rstrip('…'), tr('profile_none'))
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension='.pstats',
+            filetypes=[("pstats", "*.pstats"), ("All Files", "*.*")],
+            title=tr('save_profile').rstrip('…')
+        )
+        if not file_path:
+            return
+        try:
+            profile.dump_stats(file_path)
+        except OSError as e:
+            messagebox.showerror(tr('error'), str(e))
+            return
+        self.status_label.config(text=tr('profile_saved').format(file_path))
+
+    def _new_profile(self):
+        """按当前选项为一次扫描创建 ScanProfile，未启用诊断和分析时返回 None"""
+        if not (self.show_diagnostics or self.profile_scans):
+            return None
+        profiler = None
+        if self.profile_scans:
+            import cProfile
+            profiler = cProfile.Profile()
+        return ScanProfile(profiler)
+
+    def _update_diagnostics(self):
+        """刷新状态栏中的诊断信息"""
+        if not self.show_diagnostics:
+            return
+        profile = self._scan_profile
+        text = '' if profile is None else profile.summary(tr('diag_counts'), tr('diag_phases'))
+        self.diag_label.config(text=text)
+
+    def edit_ignore_patterns(self):
+        """打开忽略规则编辑窗口（每行一条，.gitignore 语法），下次生成时生效"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(tr('ignore_patterns').rstrip('…'))
+        dialog.transient(self.root)
+        ttk.Label(dialog, text=tr('ignore_hint')).pack(anchor=tk.W, padx=10, pady=(10, 5))
+        text = tk.Text(dialog, width=60, height=15, font=('Consolas', 10))
+        text.pack(expand=True, fill=tk.BOTH, padx=10)
+        # 尚未设置时给出注释掉的常见规则，去掉行首的 # 即可启用
+        lines = self.ignore_patterns or [f"# {pattern}" for pattern in COMMON_PATTERNS]
+        text.insert('1.0', '\n'.join(lines))
+
+        def apply():
+            self.ignore_patterns = text.get('1.0', tk.END).rstrip().splitlines()
+            dialog.destroy()
+
+        ttk.Button(dialog, text=tr('ok'), command=apply).pack(pady=10)
+        dialog.grab_set()
+        text.focus_set()
+
+    def edit_batch_roots(self):
+        """打开批量扫描的目录列表窗口（每行一个目录），确定后同时扫描这些目录"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(tr('batch_scan').rstrip('…'))
+        dialog.transient(self.root)
+        ttk.Label(dialog, text=tr('batch_hint')).pack(anchor=tk.W, padx=10, pady=(10, 5))
+        text = tk.Text(dialog, width=70, height=15, font=('Consolas', 10))
+        text.pack(expand=True, fill=tk.BOTH, padx=10)
+        current = self.entry_path.get().strip()
+        if os.path.isdir(current):
+            text.insert('1.0', current + '\n')
+
+        def start():
+            roots = []
+            for line in text.get('1.0', tk.END).splitlines():
+                path = line.strip().strip('"')
+                if not path or path in roots:
+                    continue
+                if not os.path.isdir(path):
+                    messagebox.showerror(tr('error'), tr('batch_invalid').format(path),
+                                         parent=dialog)
+                    return
+                roots.append(path)
+            if roots:
+                dialog.destroy()
+                self.open_batch(roots)
+
+        ttk.Button(dialog, text=tr('generate'), style='Primary.TButton',
+                   command=start).pack(pady=10)
+        dialog.grab_set()
+        text.focus_set()
+
+    def open_batch(self, roots):
+        """打开批量扫描窗口，同时扫描 roots 中的各目录"""
+        self._batch_windows.add(BatchScanWindow(self, roots))
+
+    def toggle_watch(self):
+        """启用/停用监视模式"""
+        self.watch_enabled = not self.watch_enabled
+        if self.watch_enabled:
+            if self._shown_root is not None and self._scan_queue is None:
+                self._start_watch()
+        else:
+            self._stop_watch()
+        self._setup_menus()  # 重新创建菜单更新选中标记
+
+    def _start_watch(self):
+        """开始监视当前显示的根目录"""
+        self._stop_watch()
+        from tree_watch import DirectoryWatcher  # 加载 ctypes 等，只在开启监视时需要
+        self._watch_queue = queue.Queue()
+        tree_mode = self.view_mode == 'tree'
+        self._watcher = DirectoryWatcher(
+            self._shown_root, self._watch_queue.put, self._shown_lister,
+            recursive=not tree_mode, one_filesystem=self._shown_limits.one_filesystem,
+            contents=self._shown_sizes or self._shown_sort in STAT_SORTS)
+        if tree_mode and self.tree_view.model is not None:
+            # 树形模式只监视已读取的目录，之后展开的目录在读取时加入
+            for path in self.tree_view.model.loaded_paths():
+                self._watcher.add(path)
+            self.tree_view.model.on_load = self._watcher.add
+        self._watcher.start()
+        self._poll_watch(self._watch_queue)
+
+    def _stop_watch(self):
+        """停止监视"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            if self.tree_view is not None and self.tree_view.model is not None:
+                self.tree_view.model.on_load = None
+        self._watcher = None
+        self._watch_queue = None
+
+    def _poll_watch(self, watch_queue):
+        """由 Tk 主循环定时调用：合并监视线程报告的变化并局部更新显示"""
+        if watch_queue is not self._watch_queue:
+            return  # 监视已停止或已重新开始
+        changed = set()
+        while True:
+            try:
+                changed |= watch_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        if changed and (None in changed or self._shown_truncated or self._shown_sizes
+                        or self._shown_style != 'spacious'):
+            # 事件丢失，无法确定变化范围；显示内容因预算用尽而不完整；
+            # 标注了大小（所有上层目录的总数都会变化）；或局部更新不支持的文本风格。重新生成
+            self.display_tree()
+            return
+        if changed:
+            if self.view_mode == 'tree':
+                self.tree_view.refresh(changed)
+            else:
+                # 先处理上层目录，下层目录随后再按新内容更新
+                for path in sorted(changed, key=len):
+                    self._patch_text_dir(path)
+                if self._search_query:
+                    self.run_search()
+            self.status_label.config(text=tr('watch_updated').format(len(changed)))
+        self.root.after(WATCH_POLL_MS, self._poll_watch, watch_queue)
+
+    def _patch_text_dir(self, path):
+        """重新读取一个目录，只替换文本框中属于该目录的行"""
+        entry = self._dir_lines.get(path)
+        if entry is None:
+            return  # 该目录不在显示内容中（或已随上层目录一起更新）
+        line, depth, is_last = entry
+        text = self.text_output
+        if depth == 0:
+            child_prefix = ''
+            start = line + 2  # 根目录行之后还有一行竖线
+        else:
+            head = text.get(f"{line}.0", f"{line}.end")
+            child_prefix = head[:4 * (depth - 1)] + ("    " if is_last else "│   ")
+            start = line + 1
+        old_lines = self._read_dir_block(start, child_prefix)
+
+        lister = sorted_lister(self._shown_lister, self._shown_sort)
+        limits = self._shown_limits
+        try:
+            dirs, files = lister(path)
+            if limits.max_depth is not None and depth >= limits.max_depth:
+                # 位于深度上限的目录只显示省略标记
+                count = len(dirs) + len(files)
+                nodes = [more_node(count, depth + 1)] if count else []
+                new_lines = list(render_lines(
+                    nodes, renderer=BoxRenderer(depth + 1, child_prefix)))
+            else:
+                new_lines = rebuild_children_lines(
+                    old_lines, child_prefix, depth + 1, dirs, files,
+                    lambda name, child, is_dir, last, first: render_subtree(
+                        name, child, is_dir, depth + 1, last, first, child_prefix, lister,
+                        ScanLimits(limits.max_depth, one_filesystem=limits.one_filesystem)))
+        except Exception as e:
+            new_lines = [child_prefix + "│   " + format_error(e)]
+
+        # 替换文本并保持滚动位置
+        view = text.yview()[0]
+        end = start + len(old_lines)
+        text.delete(f"{start}.0", f"{end}.0")
+        text.insert(f"{start}.0", ''.join(line + '\n' for line in new_lines))
+        text.yview_moveto(view)
+
+        # 更新目录行号索引：区域内的目录重新解析，区域之后的目录整体平移
+        delta = len(new_lines) - len(old_lines)
+        index = {}
+        for dir_path, (dir_line, dir_depth, dir_last) in self._dir_lines.items():
+            if dir_line < start:
+                index[dir_path] = (dir_line, dir_depth, dir_last)
+            elif dir_line >= end:
+                index[dir_path] = (dir_line + delta, dir_depth, dir_last)
+        for i, dir_depth, dir_path, dir_last in parse_dir_lines(new_lines, path, depth):
+            index[dir_path] = (start + i, dir_depth, dir_last)
+        self._dir_lines = index
+        self._search_index = None  # 行号已变化，下次查找时从文本重建
+        self._shown_tree = None  # 显示内容已与扫描结果不同，重新排序时需要重新扫描
+
+    def _read_dir_block(self, start, child_prefix):
+        """从第 start 行起读取属于某个目录的行（以子项前缀开头且更长的连续行）"""
+        text = self.text_output
+        n = len(child_prefix)
+        lines = []
+        chunk = 1000
+        while True:
+            block = text.get(f"{start}.0", f"{start + chunk}.0").split('\n')
+            for line in block[:-1]:
+                if not (line.startswith(child_prefix) and len(line) > n):
+                    return lines
+                lines.append(line)
+            if len(block) - 1 < chunk:
+                return lines  # 已到文本末尾
+            start += chunk
+
+    def _get_lister(self, dir_path, force_rescan=False, with_stat=False):
+        """返回本次扫描读取目录所用的函数及缓存对象（未使用缓存时为 None）
+
+        参数：
+            dir_path: 扫描根目录（忽略规则中的路径相对于它）
+            force_rescan: 是否忽略扫描缓存，重新读取所有目录
+            with_stat: 是否附带大小和修改时间（扫描缓存不保存这些信息，因此不使用缓存）
+
+        扫描缓存只保存跟随符号链接时的目录内容，其他符号链接处理方式也不使用缓存。
+        """
+        if self.use_cache and self._scan_cache is None:
+            try:
+                from tree_cache import ScanCache  # 启用缓存后第一次扫描时才加载 sqlite3
+                self._scan_cache = ScanCache()
+            except Exception as e:
+                print(f"扫描缓存不可用: {e}")  # 失败提示（不影响运行）
+                self.use_cache = False
+                self._setup_menus()
+        if with_stat:
+            lister, cache = list_dir_stat, None
+        elif self.use_cache and self.symlink_mode == 'follow':
+            lister = functools.partial(self._scan_cache.list_dir, force=force_rescan)
+            cache = self._scan_cache
+        else:
+            lister, cache = list_dir, None
+        if self.symlink_mode != 'follow':
+            lister = functools.partial(lister, symlinks=self.symlink_mode)
+        # 忽略规则在读取目录时生效，被忽略的目录不会再被读取或监视
+        if self.use_gitignore or any(line.strip() for line in self.ignore_patterns):
+            lister = IgnoreFilter(dir_path, self.ignore_patterns, self.use_gitignore, lister).list_dir
+        return lister, cache
+
+    def on_close(self):
+        """关闭窗口：停止扫描、保存和监视，并写回扫描缓存"""
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+        for window in list(self._batch_windows):
+            window.cancel()
+        self._stop_watch()
+        if self._scan_cache is not None:
+            try:
+                self._scan_cache.close()
+            except Exception as e:
+                print(f"扫描缓存写入失败: {e}")
+        self.root.destroy()
+
     def show_about(self):
         """显示关于对话框"""
         messagebox.showinfo(tr('about_title'), tr('about_content'))
@@ -508,85 +1507,36 @@ class DirectoryTreeApp:
             self.entry_path.delete(0, tk.END)
             self.entry_path.insert(0, path)
 
-    def generate_tree(self, dir_path, prefix='', is_root=True):
-        """生成结构化的目录树文本
+    def generate_tree(self, dir_path, stats=None, cancel=None, workers=1, lister=list_dir,
+                      with_nodes=False, limits=None, sizes=False, sort='name', tree=None,
+                      style='spacious'):
+        """逐行生成结构化的目录树文本（遍历与渲染见 tree_core，可在后台线程调用）
 
         参数：
-            dir_path: 当前目录路径
-            prefix: 缩进前缀（用于递归）
-            is_root: 是否是根目录
-
-        返回：
-            格式化的目录树字符串
+            dir_path: 根目录路径
+            stats: 可选的 ScanStats，用于报告进度
+            cancel: 可选的 threading.Event，用于取消生成
+            workers: 并行读取目录的线程数
+            lister: 读取单个目录的函数（如扫描缓存的 list_dir）
+            with_nodes: 为 True 时产出 (行, 节点)，见 tree_core.render_lines
+            limits: 可选的 ScanLimits，限制深度、条目数和时间
+            sizes: 是否标注大小，目录标注总大小和文件数（lister 须附带大小）
+            sort: 子项排序方式，见 tree_sort.SORT_MODES
+            tree: 可选的空 CompactTree，保存扫描结果供之后重新排序（见 tree_core.walk_sorted）
+            style: 文本风格，见 tree_core.RENDER_STYLES
+
+        产出：
+            目录树的每一行文本（不含换行符）
         """
-        if is_root:
-            # 根目录特殊处理
-            tree_str = f"{os.path.basename(dir_path)}/\n"
-            tree_str += "│\n"  # 根目录下的竖线
-        else:
-            # 子目录处理
-            tree_str = ""
-
-        try:
-            entries = sorted(os.listdir(dir_path))
-            entries = [e for e in entries if not e.startswith('.')]  # 忽略隐藏文件
-
-            # 分离文件和文件夹
-            dirs = [e for e in entries if os.path.isdir(os.path.join(dir_path, e))]
-            files = [e for e in entries if not os.path.isdir(os.path.join(dir_path, e))]
-
-            items = dirs + files  # 先列出目录，再列出文件
-            total_items = len(items)
-
-            for i, item in enumerate(items):
-                item_path = os.path.join(dir_path, item)
-                is_last = (i == total_items - 1)
-
-                # 处理前缀
-                connector = "├── " if not is_last else "└── "
-                vertical = "│   " if not is_last else "    "
-
-                if is_root:
-                    # 根目录下的项目
-                    if i == 0:
-                        tree_str += prefix + "├── "
-                    else:
-                        tree_str += prefix + connector
-
-                    # 目录项后添加斜杠
-                    if os.path.isdir(item_path):
-                        tree_str += f"{item}/\n"
-                    else:
-                        tree_str += f"{item}\n"
-
-                    # 递归处理子目录
-                    if os.path.isdir(item_path):
-                        new_prefix = prefix + vertical
-                        tree_str += self.generate_tree(item_path, new_prefix, False)
-                else:
-                    # 子目录下的项目
-                    tree_str += prefix + connector
-
-                    if os.path.isdir(item_path):
-                        tree_str += f"{item}/\n"
-                        new_prefix = prefix + vertical
-                        tree_str += self.generate_tree(item_path, new_prefix, False)
-                    else:
-                        tree_str += f"{item}\n"
-
-                    # 添加分隔线（最后一个项目不添加）
-                    if not is_last:
-                        tree_str += prefix + vertical + "\n"
-
-        except PermissionError:
-            tree_str += prefix + "│   [Permission Denied]\n"
-        except Exception as e:
-            tree_str += prefix + f"│   [Error: {str(e)}]\n"
+        yield from iter_tree_lines(dir_path, stats, cancel, workers, lister, with_nodes, limits,
+                                   sizes, sort, tree=tree, style=style)
 
-        return tree_str
+    def display_tree(self, force_rescan=False):
+        """在后台线程生成目录树，并分批流式显示在文本框中
 
-    def display_tree(self):
-        """在文本框中显示目录树"""
+        参数：
+            force_rescan: 是否忽略扫描缓存，重新读取所有目录
+        """
         dir_path = self.entry_path.get().strip()
 
         # 路径验证
@@ -594,26 +1544,412 @@ class DirectoryTreeApp:
             messagebox.showerror(tr('error'), tr('invalid_path'))
             return
 
+        # 新的生成请求取代仍在进行的旧任务
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+            self._finish_scan()
+        self._stop_watch()
+
+        # 大小统计只用于文本模式（树形模式按需读取，无法得到总数）
+        sort = self.sort_mode
+        sizes = self.view_mode == 'text' and (self.show_sizes or sort == 'size')
+        with_stat = sizes or sort in STAT_SORTS
+        lister, cache = self._get_lister(dir_path, force_rescan, with_stat=with_stat)
+        self._shown_root = dir_path
+        self._shown_sizes = sizes
+        self._shown_sort = sort
+        self._shown_stat = with_stat
+        self._shown_lister = lister
+        self._shown_limits = limits = ScanLimits(
+            self.scan_limits.max_depth, self.scan_limits.max_entries,
+            self.scan_limits.time_budget, self.scan_limits.one_filesystem)
+        self._shown_truncated = False
+        self._shown_tree = None
+        self._dir_lines = {}
+        if self.view_mode == 'tree':
+            # 树形模式只读取根目录，子目录在展开时再读取
+            self.tree_view.set_root(dir_path, sorted_lister(lister, sort))
+            self.status_label.config(text='')
+            if self.watch_enabled:
+                self._start_watch()
+            return
+
+        self._diff_summary = None
+        self._shown_style = style = self.render_style
+        workers = self.scan_workers
+        tree = CompactTree(dir_path)
+        profile = self._new_profile()
+        if profile is not None:
+            lister = profile.wrap_lister(lister, stat_per_dir=cache is not None)
+        self._start_scan(lambda stats, cancel: self.generate_tree(
+            dir_path, stats, cancel, workers, lister, with_nodes=True, limits=limits,
+            sizes=sizes, sort=sort, tree=tree, style=style), cache, profile, tree)
+
+    def compare_snapshot(self):
+        """比较快照与当前目录（或两个快照），只显示新增、删除和修改的条目
+
+        只选择一个快照时，与输入框中的目录比较（没有有效目录时与快照记录的根目录比较）；
+        选择两个快照时，以修改时间较早的一个为旧版本。结果在文本框中以颜色标出。
+        """
+        from tree_snapshot import EXTENSION as SNAPSHOT_EXTENSION, Snapshot
+        files = filedialog.askopenfilenames(
+            filetypes=[("Tree Snapshot", f"*{SNAPSHOT_EXTENSION}")],
+            title=tr('compare')
+        )
+        if not files:
+            return
+        if len(files) > 2:
+            messagebox.showwarning(tr('error'), tr('compare_hint'))
+            return
+        if len(files) == 2:
+            old, new = sorted(files, key=os.path.getmtime)
+        else:
+            old = files[0]
+            new = self.entry_path.get().strip()
+            if not os.path.isdir(new):
+                try:
+                    with Snapshot(old) as snapshot:
+                        new = snapshot.root_path
+                except (OSError, ValueError) as e:
+                    messagebox.showerror(tr('error'), str(e))
+                    return
+                if not os.path.isdir(new):
+                    messagebox.showerror(tr('error'), tr('invalid_path'))
+                    return
+
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+            self._finish_scan()
+        self._stop_watch()
+        if self.view_mode == 'tree':
+            self.switch_view_mode('text')  # 比较结果只在文本框中显示
+        # 重新扫描的目录沿用当前的忽略规则；比较需要完整的目录树，不使用范围限制
+        lister = self._get_lister(new, with_stat=True)[0] if os.path.isdir(new) else list_dir_stat
+        self._shown_root = None  # 显示的不是目录树本身，不支持监视、保存时使用输入框中的目录
+        self._dir_lines = {}
+        self._diff_summary = summary = DiffSummary()
+        self._shown_style = style = self.render_style
+        workers = self.scan_workers
+        profile = self._new_profile()
+        if profile is not None:
+            lister = profile.wrap_lister(lister)
+        self._start_scan(lambda stats, cancel: iter_diff_lines(
+            old, new, stats, cancel, workers, lister, summary, with_nodes=True, style=style),
+            None, profile)
+
+    def open_snapshot(self, file_path=None):
+        """在树形视图中浏览快照文件
+
+        快照直接映射到内存，展开目录时才读取其子项，不重新扫描，也不把整个目录树载入文本框，
+        因此数百万条目的快照也能立即打开。
+
+        参数：
+            file_path: 快照文件路径，默认弹出选择对话框
+        """
+        from tree_snapshot import EXTENSION as SNAPSHOT_EXTENSION, Snapshot
+        if file_path is None:
+            file_path = filedialog.askopenfilename(
+                filetypes=[("Tree Snapshot", f"*{SNAPSHOT_EXTENSION}")],
+                title=tr('open_snapshot')
+            )
+            if not file_path:
+                return
         try:
-            # 清空文本框并插入新内容
-            self.text_output.delete(1.0, tk.END)
-            self.text_output.insert(tk.END, self.generate_tree(dir_path))
-        except Exception as e:
+            snapshot = Snapshot(file_path)
+        except (OSError, ValueError) as e:
             messagebox.showerror(tr('error'), str(e))
+            return
+
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+            self._finish_scan()
+        self._stop_watch()
+        self.switch_view_mode('tree')  # 快照只在树形视图中显示
+        self._shown_root = None  # 显示的不是目录本身，不支持监视、保存时使用输入框中的目录
+        self.tree_view.set_snapshot(snapshot)
+        self.status_label.config(text=tr('snapshot_opened').format(
+            snapshot.root_path, f"{len(snapshot):,}"))
+
+    def _start_scan(self, make_lines, cache=None, profile=None, tree=None):
+        """在后台线程中生成文本行并分批显示
+
+        参数：
+            make_lines: 函数 (ScanStats, 取消事件) -> 产出 (行, 节点) 的生成器，在后台线程中迭代
+            cache: 结束后需要写回的扫描缓存（可选）
+            profile: 可选的 ScanProfile，统计各阶段耗时（读取函数须已由它包装）
+            tree: 保存生成内容的 CompactTree（可选），完成后用于切换排序方式
+        """
+        self._shown_tree = None
+        self._scan_tree = tree
+        self._scan_cancel = cancel = threading.Event()
+        self._scan_queue = queue.Queue(maxsize=QUEUE_MAX_BATCHES)
+        self._scan_stats = stats = ScanStats()
+        self._scan_profile = profile
+        lines = make_lines(stats, cancel)
+        if profile is not None:
+            lines = profile.wrap_lines(lines)
+        self.text_output.delete(1.0, tk.END)
+        self._search_index = SearchIndex()
+        self._reset_search()
+        self.btn_cancel.config(state=tk.NORMAL)
+
+        threading.Thread(
+            target=self._scan_worker,
+            args=(lines, cancel, self._scan_queue, cache, profile),
+            daemon=True
+        ).start()
+        self._poll_scan(self._scan_queue)
+
+    def _scan_worker(self, lines, cancel, result_queue, cache, profile=None):
+        """后台线程：迭代 (行, 节点) 并分批放入队列（不得在此访问任何 Tk 控件）"""
+        try:
+            batch = []
+            dir_lines = []  # 本批中的目录行：(行下标, 深度, 路径, 是否最后一项)
+            tags = []  # 本批中比较结果的行：(行下标, 变化类型)
+            entries = ([], [], [], [])  # 本批中的条目（搜索索引的列）：行下标、深度、名称、是否目录
+            line_no = 0
+            limit = FIRST_BATCH_LINES
+            last_sent = time.monotonic()
+            for line, node in lines:
+                if node is not None:
+                    if node.is_dir:
+                        dir_lines.append((line_no, node.depth, node.path, node.is_last))
+                    status = getattr(node, 'status', None)
+                    if status is not None:
+                        tags.append((line_no, status))
+                    if not node.more:
+                        entries[0].append(line_no)
+                        entries[1].append(node.depth)
+                        entries[2].append(node.name)
+                        entries[3].append(node.is_dir)
+                batch.append(line)
+                line_no += 1
+                if len(batch) >= limit or time.monotonic() - last_sent >= BATCH_INTERVAL:
+                    self._put_result(result_queue, cancel,
+                                     ('lines', (batch, dir_lines, tags, entries)), profile)
+                    batch = []
+                    dir_lines = []
+                    tags = []
+                    entries = ([], [], [], [])
+                    limit = BATCH_LINES
+                    last_sent = time.monotonic()
+            if batch:
+                self._put_result(result_queue, cancel,
+                                 ('lines', (batch, dir_lines, tags, entries)), profile)
+            self._put_result(result_queue, cancel, ('done', None))
+        except ScanCancelled:
+            pass  # 已取消的任务不再有人读取队列
+        except Exception as e:
+            try:
+                self._put_result(result_queue, cancel, ('error', e))
+            except ScanCancelled:
+                pass
+        finally:
+            lines.close()  # 提前结束时立即释放遍历占用的资源（如预取线程池、cProfile）
+            if cache is not None:
+                cache.flush()
+
+    @staticmethod
+    def _put_result(result_queue, cancel, item, profile=None):
+        """放入队列；队列已满时等待主线程消费，期间响应取消（等待时间计入 profile 的 wait）"""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    result_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    if cancel.is_set():
+                        raise ScanCancelled()
+        finally:
+            if profile is not None:
+                profile.add('wait', time.perf_counter() - start)
+
+    def _poll_scan(self, result_queue):
+        """由 Tk 主循环定时调用：插入有限行数的新内容、刷新进度并处理结束消息"""
+        if result_queue is not self._scan_queue:
+            return  # 已被新的任务取代
+
+        stats = self._scan_stats
+        profile = self._scan_profile
+        inserted = 0
+        while inserted < INSERT_LINES_PER_TICK:
+            try:
+                kind, payload = result_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'lines':
+                lines, dir_lines, tags, entries = payload
+                start = time.perf_counter()
+                self.text_output.insert(tk.END, '\n'.join(lines) + '\n')
+                for line_no, status in tags:
+                    self.text_output.tag_add(status, f"{line_no + 1}.0", f"{line_no + 1}.end")
+                inserted_at = time.perf_counter()
+                if self._search_index is not None:  # 为 None 时下次查找从文本重建，不必追加
+                    self._search_index.extend(*entries)
+                if profile is not None:
+                    profile.add('insert', inserted_at - start)
+                    profile.add('index', time.perf_counter() - inserted_at)
+                inserted += len(lines)
+                for line_no, depth, path, is_last in dir_lines:
+                    self._dir_lines[path] = (line_no + 1, depth, is_last)  # Tk 行号从 1 开始
+                continue
+
+            self._finish_scan()
+            if profile is not None:
+                profile.finish()
+                self._update_diagnostics()
+            if kind == 'done' and self._search_query:
+                self.run_search()  # 生成过程中的查找只覆盖了当时已显示的部分
+            summary = self._diff_summary
+            if kind == 'done' and summary is not None:
+                done_key = 'diff_truncated' if summary.truncated else 'diff_done'
+                self.status_label.config(text=tr(done_key).format(
+                    summary.added, summary.removed, summary.modified))
+            elif kind == 'done':
+                self._shown_truncated = stats.truncated
+                self._shown_tree = self._scan_tree
+                self._shown_counts = (stats.dirs, stats.entries, stats.truncated)
+                done_key = 'scan_truncated' if stats.truncated else 'scan_done'
+                self.status_label.config(text=tr(done_key).format(stats.dirs, stats.entries))
+                if self.watch_enabled:
+                    self._start_watch()
+            else:
+                self.status_label.config(text='')
+                messagebox.showerror(tr('error'), str(payload))
+            return
+
+        self.status_label.config(text=tr('scanning').format(stats.dirs, stats.entries))
+        if profile is not None:
+            self._update_diagnostics()
+        # 还有积压内容时尽快继续，否则稍后再检查
+        self.root.after(1 if inserted else 50, self._poll_scan, result_queue)
+
+    def _finish_scan(self):
+        """重置后台扫描状态"""
+        self._scan_cancel = None
+        self._scan_queue = None
+        if self._export_cancel is None:
+            self.btn_cancel.config(state=tk.DISABLED)
+
+    def cancel_scan(self):
+        """取消正在进行的扫描和保存"""
+        if self._scan_cancel is None and self._export_cancel is None:
+            return
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+            self._export_cancel = None
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+            self._finish_scan()
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.status_label.config(text=tr('scan_cancelled'))
+
+    def on_search_key(self, event=None):
+        """搜索框内容变化：停顿 SEARCH_DELAY_MS 后再查找，连续输入时只查找一次"""
+        if self.search_var.get() == self._search_query:
+            return  # 回车、方向键等不改变内容的按键
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        """按搜索框的内容查找（名称中的任意部分，含 / 时按路径），标出匹配的行并跳到第一个"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        query = self._search_query = self.search_var.get()
+        self._reset_search()
+        if not query:
+            return
+        if self.view_mode != 'text':
+            self.search_count.config(text=tr('search_text_only'))
+            return
+
+        index = self._get_search_index()
+        found = index.search(query, SEARCH_LIMIT)
+        lines = index.lines
+        self._search_hits = hits = [lines[i] + 1 for i in found]  # Tk 行号从 1 开始
+        text = self.text_output
+        if self.search_filter.get():
+            # 隐藏其余行；没有匹配时只保留根目录
+            self._hide_lines(index.visible_lines(found) or [0])
+        if not hits:
+            self.search_count.config(text=tr('search_none'))
+            return
+        ranges = []
+        for line in hits:
+            ranges += (f"{line}.0", f"{line}.end")
+        text.tag_add('search_hit', *ranges)
+        self.jump_search(1)
+
+    def jump_search(self, step):
+        """跳到下一个（step 为 1）或上一个（step 为 -1）匹配"""
+        if self.search_var.get() != self._search_query:
+            self.run_search()  # 尚未按新内容查找（输入后立即回车）
+            return
+        hits = self._search_hits
+        if not hits:
+            return
+        self._search_pos = (self._search_pos + step) % len(hits)
+        line = hits[self._search_pos]
+        text = self.text_output
+        text.tag_remove('search_current', '1.0', tk.END)
+        text.tag_add('search_current', f"{line}.0", f"{line}.end")
+        text.see(f"{line}.0")
+        total = f"{len(hits)}+" if len(hits) >= SEARCH_LIMIT else str(len(hits))
+        self.search_count.config(text=tr('search_count').format(self._search_pos + 1, total))
+
+    def clear_search(self):
+        """清空搜索框，恢复显示全部行"""
+        self.search_var.set('')
+        self.run_search()
+
+    def _reset_search(self):
+        """去掉匹配标记和隐藏的行"""
+        text = self.text_output
+        for tag in ('search_hit', 'search_current', 'search_hidden'):
+            text.tag_remove(tag, '1.0', tk.END)
+        self._search_hits = []
+        self._search_pos = -1
+        self.search_count.config(text='')
+
+    def _get_search_index(self):
+        """返回当前文本的名称索引；局部更新过的文本从其内容重新建立"""
+        if self._search_index is None:
+            content = self.text_output.get('1.0', 'end-1c')
+            self._search_index = SearchIndex.from_lines(content.split('\n'))
+        return self._search_index
+
+    def _hide_lines(self, visible):
+        """隐藏 visible（从 0 开始的升序行下标）以外的所有行"""
+        ranges = []
+        prev = -1
+        for line in visible:
+            if line > prev + 1:
+                ranges += (f"{prev + 2}.0", f"{line + 1}.0")
+            prev = line
+        ranges += (f"{prev + 2}.0", tk.END)
+        self.text_output.tag_add('search_hidden', *ranges)
 
     def save_output(self, as_md=False):
         """保存目录树到文件（文本或Markdown格式）
 
+        在后台线程中重新遍历目录并直接写入文件，不经过文本框，
+        因此目录树再大也不会占用额外内存或阻塞界面。
+
         参数：
             as_md: 是否为Markdown格式（默认False为纯文本）
         """
-        # 获取文本框内容
-        if not (content := self.text_output.get(1.0, tk.END).strip()):
+        # 优先保存当前显示的目录，尚未生成时使用输入框中的路径
+        dir_path = self._shown_root or self.entry_path.get().strip()
+        if not dir_path or not os.path.isdir(dir_path):
             messagebox.showwarning(tr('error'), tr('empty'))
             return
 
         # 生成默认文件名（当前目录名+格式后缀）
-        default_dir = os.path.basename(self.entry_path.get().strip())
+        default_dir = os.path.basename(os.path.normpath(dir_path))
         default_name = f"{default_dir}_tree.{'md' if as_md else 'txt'}" if default_dir else "directory_tree"
 
         # 设置文件类型过滤器
@@ -632,13 +1968,108 @@ class DirectoryTreeApp:
         if not file_path:
             return
 
-        # 写入文件
+        # 与当前显示内容使用相同的目录读取方式、范围限制和大小统计
+        if dir_path == self._shown_root:
+            lister, limits = self._shown_lister, self._shown_limits
+            sizes, sort = self._shown_sizes, self._shown_sort
+        else:
+            sort = self.sort_mode
+            sizes = self.show_sizes or sort == 'size'
+            lister = self._get_lister(dir_path, with_stat=sizes or sort in STAT_SORTS)[0]
+            limits = self.scan_limits
+        cache = self._scan_cache if self.use_cache else None
+        self._start_export(file_path, dir_path, 'md' if as_md else 'text', lister, limits, cache,
+                           sizes, sort, self.render_style)
+
+    def export_data(self):
+        """导出供其他工具读取的结构化数据：JSON Lines、嵌套 JSON 或二进制快照
+
+        格式由文件扩展名决定，每个条目附带大小和修改时间；
+        与保存文本相同，在后台线程中边遍历边写入文件。
+        """
+        dir_path = self._shown_root or self.entry_path.get().strip()
+        if not dir_path or not os.path.isdir(dir_path):
+            messagebox.showwarning(tr('error'), tr('empty'))
+            return
+
+        from tree_snapshot import EXTENSION as SNAPSHOT_EXTENSION
+        default_dir = os.path.basename(os.path.normpath(dir_path)) or "directory"
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("JSON", "*.json"),
+                       ("Tree Snapshot", f"*{SNAPSHOT_EXTENSION}")],
+            initialfile=f"{default_dir}_tree.jsonl",
+            title=tr('export_data')
+        )
+        if not file_path:
+            return
+        ext = os.path.splitext(file_path)[1].lower()
+        fmt = {'.json': 'json', SNAPSHOT_EXTENSION: 'snapshot'}.get(ext, 'jsonl')
+
+        # 扫描范围与当前显示内容一致，但需要重新读取以获得大小和修改时间
+        lister = self._get_lister(dir_path, with_stat=True)[0]
+        if dir_path == self._shown_root:
+            limits, sizes, sort = self._shown_limits, self._shown_sizes, self._shown_sort
+        else:
+            limits, sizes, sort = self.scan_limits, self.show_sizes, self.sort_mode
+        self._start_export(file_path, dir_path, fmt, lister, limits, None, sizes, sort)
+
+    def _start_export(self, file_path, dir_path, fmt, lister, limits, cache, sizes=False,
+                      sort='name', style='spacious'):
+        """在后台线程中导出目录树，并开始轮询进度"""
+        # 新的保存请求取代仍在进行的旧任务
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+        self._export_cancel = cancel = threading.Event()
+        self._export_stats = stats = ScanStats()
+        result_queue = queue.Queue()
+        self.btn_cancel.config(state=tk.NORMAL)
+        threading.Thread(
+            target=self._export_worker,
+            args=(file_path, dir_path, fmt, stats, cancel, result_queue,
+                  self.scan_workers, lister, limits, cache, sizes, sort, style),
+            daemon=True
+        ).start()
+        self._poll_export(result_queue, cancel, file_path)
+
+    @staticmethod
+    def _export_worker(file_path, dir_path, fmt, stats, cancel, result_queue, workers,
+                       lister, limits, cache, sizes, sort, style):
+        """后台线程：边遍历边写入文件，结束后放入 ('done'|'cancelled'|'error', 异常)"""
+        from tree_export import export_tree
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            messagebox.showinfo("OK", tr('save_success').format(file_path))
+            export_tree(file_path, dir_path, fmt, stats, cancel, workers, lister, limits,
+                        sizes, sort, style=style)
+            result_queue.put(('done', None))
+        except ScanCancelled:
+            result_queue.put(('cancelled', None))
         except Exception as e:
-            messagebox.showerror(tr('save_fail'), str(e))
+            result_queue.put(('error', e))
+        finally:
+            if cache is not None:
+                cache.flush()
+
+    def _poll_export(self, result_queue, cancel, file_path):
+        """由 Tk 主循环定时调用：刷新保存进度并处理结束消息"""
+        try:
+            kind, payload = result_queue.get_nowait()
+        except queue.Empty:
+            if not cancel.is_set():
+                self.status_label.config(text=tr('saving').format(self._export_stats.entries))
+            self.root.after(100, self._poll_export, result_queue, cancel, file_path)
+            return
+
+        if cancel is not self._export_cancel:
+            return  # 已被新的保存任务取代
+        self._export_cancel = None
+        if self._scan_cancel is None:
+            self.btn_cancel.config(state=tk.DISABLED)
+        if kind == 'done':
+            self.status_label.config(text='')
+            messagebox.showinfo("OK", tr('save_success').format(file_path))
+        elif kind == 'error':
+            self.status_label.config(text='')
+            messagebox.showerror(tr('save_fail'), str(payload))
 
     def copy_to_clipboard(self):
         """复制文本框内容到剪贴板"""
@@ -653,15 +2084,271 @@ class DirectoryTreeApp:
             messagebox.showinfo(tr('error'), tr('copy_empty'))
 
     def clear_output(self):
-        """清空文本框内容"""
+        """清空文本框和树形视图的内容（同时停止正在进行的生成，之后的批次不再插入）"""
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+            self._finish_scan()  # 丢弃队列，_poll_scan 随之停止
+            self.status_label.config(text='')
+        self._stop_watch()
+        self._shown_root = None
+        self._dir_lines = {}
         self.text_output.delete(1.0, tk.END)
+        self._search_index = None
+        self._reset_search()
+        if self.tree_view is not None:
+            self.tree_view.clear()
         # 显示清除成功提示（2秒后恢复）
         self.btn_clear.config(text=tr('clear_success'))
         self.root.after(2000, lambda: self.btn_clear.config(text=tr('clear')))
 
 
+class BatchScanWindow:
+    """批量扫描窗口：同时扫描多个根目录，每个根目录一个标签页，标签上显示各自的进度
+
+    根目录的扫描并发数和共用的读取线程见 tree_batch.BatchScan；
+    各标签页的内容与主窗口的文本模式相同（沿用当前的忽略规则、范围限制、大小统计和排序方式）。
+    全部导出时按标签页的顺序将所有根目录合并写入一个文件（见 tree_export.write_batch）。
+    """
+
+    def __init__(self, app, roots):
+        self.app = app
+        self.roots = roots
+        self.window = tk.Toplevel(app.root)
+        self.window.title(tr('batch_title').format(len(roots)))
+        self.window.geometry('900x600')
+        self.window.protocol('WM_DELETE_WINDOW', self.close)
+        self._scan = None  # 进行中的 tree_batch.BatchScan
+        self._queue = None
+        self._export = None  # 进行中的导出：tree_batch.BatchScan
+        self._names = [os.path.basename(os.path.normpath(root)) or root for root in roots]
+
+        self.notebook = ttk.Notebook(self.window)
+        self.notebook.pack(expand=True, fill=tk.BOTH, padx=10, pady=(10, 5))
+        self.texts = []
+        for root in roots:
+            frame = ttk.Frame(self.notebook)
+            v_scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
+            v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            h_scrollbar = ttk.Scrollbar(frame, orient=tk.HORIZONTAL)
+            h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+            text = tk.Text(frame, wrap=tk.NONE, font=('Consolas', 10), padx=10, pady=10,
+                           xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
+            text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+            v_scrollbar.config(command=text.yview)
+            h_scrollbar.config(command=text.xview)
+            self.notebook.add(frame, text=self._names[len(self.texts)])
+            self.texts.append(text)
+
+        btn_frame = ttk.Frame(self.window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        self.btn_cancel = ttk.Button(btn_frame, text=tr('cancel'), command=self.cancel)
+        self.btn_cancel.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=tr('export_all'), command=self.export_all).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=tr('close'), command=self.close).pack(side=tk.RIGHT, padx=5)
+        self.status_label = ttk.Label(self.window, text='', style='Status.TLabel')
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        self.start()
+
+    def _scan_options(self, with_stat=False):
+        """按主窗口的当前设置返回 (各根目录的 lister 列表, 扫描缓存或 None, limits, sizes, sort, style)"""
+        app = self.app
+        sort = app.sort_mode
+        sizes = app.show_sizes or sort == 'size'
+        with_stat = with_stat or sizes or sort in STAT_SORTS
+        listers, cache = [], None
+        for root in self.roots:
+            lister, cache = app._get_lister(root, with_stat=with_stat)
+            listers.append(lister)
+        limits = ScanLimits(app.scan_limits.max_depth, app.scan_limits.max_entries,
+                            app.scan_limits.time_budget, app.scan_limits.one_filesystem)
+        return listers, cache, limits, sizes, sort, app.render_style
+
+    def start(self):
+        """开始扫描所有根目录，各标签页的内容分批显示"""
+        from tree_batch import BatchScan, DEFAULT_JOBS
+        listers, cache, limits, sizes, sort, style = self._scan_options()
+        self._scan = batch = BatchScan(self.roots, DEFAULT_JOBS, self.app.scan_workers)
+        self._queue = result_queue = queue.Queue(maxsize=QUEUE_MAX_BATCHES)
+
+        def scan_root(index, root_path, stats, cancel, workers):
+            """后台线程：生成一个根目录的文本行，分批放入队列（不得在此访问任何 Tk 控件）"""
+            lines = iter_tree_lines(root_path, stats, cancel, workers, listers[index],
+                                    limits=limits, sizes=sizes, sort=sort, style=style)
+            try:
+                batch_lines = []
+                last_sent = time.monotonic()
+                for line in lines:
+                    batch_lines.append(line)
+                    if (len(batch_lines) >= BATCH_LINES
+                            or time.monotonic() - last_sent >= BATCH_INTERVAL):
+                        DirectoryTreeApp._put_result(result_queue, cancel, (index, batch_lines))
+                        batch_lines = []
+                        last_sent = time.monotonic()
+                if batch_lines:
+                    DirectoryTreeApp._put_result(result_queue, cancel, (index, batch_lines))
+            finally:
+                lines.close()
+                if cache is not None:
+                    cache.flush()
+
+        batch.run(scan_root)
+        self.btn_cancel.config(state=tk.NORMAL)
+        self._poll(batch, result_queue)
+
+    def _poll(self, batch, result_queue):
+        """由 Tk 主循环定时调用：插入有限行数的新内容，刷新各标签页的进度"""
+        if batch is not self._scan:
+            return  # 已取消或窗口已关闭
+        inserted = 0
+        while inserted < INSERT_LINES_PER_TICK:
+            try:
+                index, lines = result_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.texts[index].insert(tk.END, '\n'.join(lines) + '\n')
+            inserted += len(lines)
+        # 所有根目录结束后队列中不会再有新内容，取完即可结束
+        finished = batch.finished and result_queue.empty()
+        self._update_tabs(batch)
+        if not finished:
+            self.window.after(1 if inserted else 100, self._poll, batch, result_queue)
+            return
+
+        from tree_batch import DONE, FAILED
+        self._scan = None
+        self._queue = None
+        if self._export is None:
+            self.btn_cancel.config(state=tk.DISABLED)
+        for index, error in enumerate(batch.errors):
+            if error is not None:
+                self.texts[index].insert(tk.END, format_error(error) + '\n')
+        if batch.cancel.is_set():
+            self.status_label.config(text=tr('scan_cancelled'))
+            return
+        status = tr('batch_done').format(batch.count(DONE), f"{batch.total_entries():,}")
+        if batch.count(FAILED):
+            status += tr('batch_failed').format(batch.count(FAILED))
+        self.status_label.config(text=status)
+
+    def _update_tabs(self, batch):
+        """标签页标题：名称和已扫描的条目数，结束后标出结果"""
+        from tree_batch import CANCELLED, DONE, FAILED, WAITING
+        marks = {WAITING: ' …', DONE: ' ✓', FAILED: ' ✗', CANCELLED: ' –'}
+        for index, (state, stats) in enumerate(zip(batch.states, batch.stats)):
+            count = '' if state == WAITING else f" ({stats.entries:,})"
+            mark = marks.get(state, '')
+            self.notebook.tab(index, text=f"{self._names[index]}{count}{mark}")
+        if not batch.finished and not batch.cancel.is_set():
+            from tree_batch import RUNNING
+            done = len(self.roots) - batch.count(WAITING) - batch.count(RUNNING)
+            self.status_label.config(text=tr('batch_progress').format(
+                done, len(self.roots), f"{batch.total_entries():,}"))
+
+    def export_all(self):
+        """重新扫描所有根目录，按标签页的顺序合并写入一个文件（文本、Markdown、JSON Lines 或 JSON）"""
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("Markdown", "*.md"),
+                       ("JSON Lines", "*.jsonl"), ("JSON", "*.json")],
+            initialfile="batch_tree.txt",
+            title=tr('export_all')
+        )
+        if not file_path:
+            return
+        from tree_batch import BatchScan, DEFAULT_JOBS
+        from tree_export import STAT_FORMATS
+        ext = os.path.splitext(file_path)[1].lower()
+        fmt = {'.md': 'md', '.jsonl': 'jsonl', '.json': 'json'}.get(ext, 'text')
+        listers, cache, limits, sizes, sort, style = self._scan_options(
+            with_stat=fmt in STAT_FORMATS)
+        if self._export is not None:
+            self._export.cancel.set()  # 新的导出取代仍在进行的旧任务
+        self._export = batch = BatchScan(self.roots, DEFAULT_JOBS, self.app.scan_workers)
+        result_queue = queue.Queue()
+        self.btn_cancel.config(state=tk.NORMAL)
+        threading.Thread(
+            target=self._export_worker,
+            args=(file_path, batch, fmt, listers, cache, limits, sizes, sort, style,
+                  result_queue),
+            daemon=True
+        ).start()
+        self._poll_export(batch, result_queue, file_path)
+
+    @staticmethod
+    def _export_worker(file_path, batch, fmt, listers, cache, limits, sizes, sort, style,
+                       result_queue):
+        """后台线程：合并写入文件，结束后放入 ('done'|'cancelled'|'error', 异常)"""
+        from tree_export import export_batch
+        try:
+            export_batch(file_path, batch, fmt, listers, limits, sizes, sort, style=style)
+            result_queue.put(('done', None))
+        except ScanCancelled:
+            result_queue.put(('cancelled', None))
+        except Exception as e:
+            result_queue.put(('error', e))
+        finally:
+            if cache is not None:
+                cache.flush()
+
+    def _poll_export(self, batch, result_queue, file_path):
+        """由 Tk 主循环定时调用：刷新导出进度并处理结束消息"""
+        try:
+            kind, payload = result_queue.get_nowait()
+        except queue.Empty:
+            if batch is self._export and self._scan is None:
+                self.status_label.config(text=tr('saving').format(f"{batch.total_entries():,}"))
+            self.window.after(100, self._poll_export, batch, result_queue, file_path)
+            return
+
+        if batch is not self._export:
+            return  # 已被取消或被新的导出取代
+        self._export = None
+        if self._scan is None:
+            self.btn_cancel.config(state=tk.DISABLED)
+        self.status_label.config(text='')
+        if kind == 'done':
+            messagebox.showinfo("OK", tr('save_success').format(file_path), parent=self.window)
+        elif kind == 'error':
+            messagebox.showerror(tr('save_fail'), str(payload), parent=self.window)
+
+    def cancel(self):
+        """取消正在进行的扫描和导出（扫描已显示的内容保留，各根目录停止后在标签上标出）"""
+        if self._scan is None and self._export is None:
+            return
+        for batch in (self._scan, self._export):
+            if batch is not None:
+                batch.cancel.set()
+        self._export = None
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.status_label.config(text=tr('scan_cancelled'))
+
+    def close(self):
+        """关闭窗口：取消扫描和导出"""
+        self.cancel()
+        self._scan = None
+        self.app._batch_windows.discard(self)
+        self.window.destroy()
+
+
+def startup_probe(root, probe_path):
+    """启动计时：窗口第一次绘制完成后，将当前时间（Unix 时间戳，秒）写入 probe_path 并退出
+
+    由 benchmarks/bench_startup.py 通过环境变量 TREE_STARTUP_PROBE 启用，
+    对源码运行和 PyInstaller 打包后的程序同样有效。
+    """
+    def record():
+        root.update_idletasks()  # Tk 控件在空闲回调中完成布局和绘制
+        with open(probe_path, 'w', encoding='utf-8') as f:
+            f.write(f"{time.time():.6f}\n")
+        root.destroy()
+    root.after_idle(record)
+
+
 if __name__ == "__main__":
-    root = TkinterDnD.Tk()  # 使用 TkinterDnD 的窗口
+    # 使用普通的 Tk 窗口，先显示界面；拖放所需的 tkdnd 扩展在 setup_drag_drop 中加载
+    root = tk.Tk()
 
 
     def get_resource_path(relative_path):
@@ -694,4 +2381,6 @@ if __name__ == "__main__":
 
     # 启动主应用
     app = DirectoryTreeApp(root)
+    if os.environ.get('TREE_STARTUP_PROBE'):
+        startup_probe(root, os.environ['TREE_STARTUP_PROBE'])
     root.mainloop()
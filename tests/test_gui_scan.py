@@ -0,0 +1,127 @@
+"""
+后台生成测试 - tests/test_gui_scan.py
+功能：在不创建窗口的情况下驱动 DirectoryTreeApp 的后台生成流程，检查生成过程中清空输出的行为
+说明：Tk 控件和主循环以最小的替身代替，root.after 只记录下一次轮询，由测试手动调用
+用法：python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('tkinter')
+
+import show_tree_gui  # noqa: E402
+from tree_core import list_dir  # noqa: E402
+
+App = show_tree_gui.DirectoryTreeApp
+
+
+class FakeWidget:
+    """标签和按钮：只记录显示的文本"""
+
+    def __init__(self):
+        self.text = ''
+
+    def config(self, text=None, **kwargs):
+        if text is not None:
+            self.text = text
+
+
+class FakeText:
+    """文本框：只记录行数"""
+
+    def __init__(self):
+        self.lines = 0
+
+    def insert(self, index, text):
+        self.lines += text.count('\n')
+
+    def tag_add(self, *args):
+        pass
+
+    def delete(self, *args):
+        self.lines = 0
+
+
+class FakeRoot:
+    """主窗口：after 只记录下一次要调用的函数"""
+
+    def __init__(self):
+        self.pending = None
+
+    def after(self, ms, func, *args):
+        self.pending = (func, args)
+
+    def run_pending(self):
+        func, args = self.pending
+        self.pending = None
+        func(*args)
+
+
+def make_app():
+    """不调用 __init__，只设置后台生成用到的属性"""
+    app = App.__new__(App)
+    app.root = FakeRoot()
+    app.text_output = FakeText()
+    for name in ('status_label', 'diag_label', 'btn_cancel', 'btn_clear', 'search_count'):
+        setattr(app, name, FakeWidget())
+    app._scan_cancel = app._scan_queue = app._export_cancel = None
+    app._search_query = ''
+    app._search_job = None
+    app._diff_summary = None
+    app._dir_lines = {}
+    app.tree_view = None
+    app.watch_enabled = False
+    app.show_diagnostics = app.profile_scans = False
+    app._reset_search = app._stop_watch = lambda: None
+    return app
+
+
+@pytest.fixture
+def big_tree(tmp_path):
+    """足以填满生成队列的目录树"""
+    for i in range(200):
+        folder = tmp_path / f"dir{i:03}"
+        folder.mkdir()
+        for j in range(50):
+            (folder / f"file{j:02}.txt").touch()
+    return str(tmp_path)
+
+
+def test_clear_during_scan_stops_worker(big_tree):
+    app = make_app()
+    workers = threading.active_count()
+    app._start_scan(lambda stats, cancel: app.generate_tree(
+        big_tree, stats, cancel, 1, list_dir, with_nodes=True))
+    app.root.run_pending()  # 插入一批，之后后台线程填满队列
+    time.sleep(0.3)
+
+    app.clear_output()
+    assert app._scan_cancel is None and app._scan_queue is None
+    assert app.status_label.text == ''
+    app.root.run_pending()  # 清空前排定的轮询：不再插入，也不再排定下一次
+    assert app.root.pending is None
+    assert app.text_output.lines == 0 and app._dir_lines == {}
+
+    deadline = time.monotonic() + 5
+    while threading.active_count() > workers and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() == workers  # 后台线程响应取消后结束
+
+
+def test_poll_without_search_index(big_tree):
+    app = make_app()
+    app._start_scan(lambda stats, cancel: app.generate_tree(
+        big_tree, stats, cancel, 1, list_dir, with_nodes=True))
+    app._search_index = None  # 如局部更新后：下次查找时从文本重建
+    while app._scan_queue is not None:
+        time.sleep(0.001)
+        app.root.run_pending()
+    assert app.text_output.lines > 10000
+    assert app._search_index is None
@@ -0,0 +1,136 @@
+"""
+目录树比较测试 - tests/test_tree_diff.py
+功能：用两棵小目录树检查归并比较（tree_diff）得到的新增、删除和修改的条目
+说明：大部分用例直接构造先序节点流，便于覆盖无法读取的目录等情况；
+      最后一个用例在磁盘上修改目录，与之前保存的快照比较
+用法：python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_core import TreeNode, list_dir_stat, walk_tree  # noqa: E402
+from tree_diff import (ADDED, MODIFIED, REMOVED, DiffSummary, diff_trees,  # noqa: E402
+                       iter_diff_lines)
+from tree_snapshot import write_snapshot  # noqa: E402
+
+
+def nodes(spec, name='root', path='/root', depth=0):
+    """由嵌套的 dict 生成先序节点流（与 walk_tree 相同：先目录后文件，按名称排序）
+
+    spec 中的值：dict 为目录，int 为文件大小，(大小, mtime) 为文件，异常为无法读取的目录。
+    """
+    if isinstance(spec, Exception):
+        yield TreeNode(name, path, True, depth, error=spec)
+        return
+    yield TreeNode(name, path, True, depth)
+    children = sorted(spec.items(), key=lambda item: (not isinstance(item[1], (dict, Exception)),
+                                                      item[0]))
+    for child, value in children:
+        child_path = f"{path}/{child}"
+        if isinstance(value, (dict, Exception)):
+            yield from nodes(value, child, child_path, depth + 1)
+        else:
+            size, mtime = value if isinstance(value, tuple) else (value, None)
+            yield TreeNode(child, child_path, False, depth + 1, size=size, mtime=mtime)
+
+
+def changes(old, new):
+    """比较两棵树，返回 ({(路径, 状态, 是否目录, 条目数)}, DiffSummary)；补上的上层目录不计入"""
+    summary = DiffSummary()
+    result = {(node.path, node.status, node.is_dir, node.count)
+              for node in diff_trees(nodes(old), nodes(new), summary)
+              if node.status is not None}
+    return result, summary
+
+
+def test_identical_trees():
+    tree = {'a': {'x': 1}, 'f': 2}
+    assert changes(tree, tree)[0] == set()
+
+
+def test_removed_folder_with_subtree():
+    old = {'a': {'b': {'c': 1, 'd': 2}, 'e': 3}, 'z': {'keep': 1}}
+    new = {'z': {'keep': 1}}
+    result, summary = changes(old, new)
+    assert result == {('/root/a', REMOVED, True, 4)}  # b、c、d、e
+    assert (summary.added, summary.removed, summary.modified) == (0, 5, 0)
+
+
+def test_added_folder_sorts_before_existing_names():
+    # 新目录 x 排在同名文件 x 之前（先目录后文件），新目录 a 排在已有的目录 ab 之前
+    old = {'ab': {'f': 1}, 'x': 1}
+    new = {'a': {'g': 1}, 'ab': {'f': 1}, 'x': {'y': 2}}
+    result, summary = changes(old, new)
+    assert result == {('/root/a', ADDED, True, 1), ('/root/x', ADDED, True, 1),
+                      ('/root/x', REMOVED, False, 0)}
+    assert (summary.added, summary.removed, summary.modified) == (4, 1, 0)
+
+
+def test_added_folder_inside_existing_folder_lists_parents():
+    old = {'a': {'b': {'f': 1}}}
+    new = {'a': {'b': {'f': 1, 'new': {}}}}
+    listed = [(node.path, node.status) for node in diff_trees(nodes(old), nodes(new))]
+    assert listed == [('/root', None), ('/root/a', None), ('/root/a/b', None),
+                      ('/root/a/b/new', ADDED)]
+
+
+def test_modified_file_by_size_and_mtime():
+    old = {'d': {'grown': (10, 5), 'touched': (10, 5), 'same': (10, 5)}}
+    new = {'d': {'grown': (20, 5), 'touched': (10, 6), 'same': (10, 5)}}
+    result, summary = changes(old, new)
+    assert result == {('/root/d/grown', MODIFIED, False, 0),
+                      ('/root/d/touched', MODIFIED, False, 0)}
+    assert summary.modified == 2
+
+
+def test_missing_mtime_compares_size_only():
+    assert changes({'f': (10, None)}, {'f': (10, 7)})[0] == set()
+
+
+def test_folder_becomes_unreadable_and_readable():
+    old = {'locked': {'a': 1, 'b': {'c': 1}}, 'z': 1}
+    new = {'locked': PermissionError('denied'), 'z': 1}
+    result, summary = changes(old, new)
+    assert result == {('/root/locked', MODIFIED, True, 0)}
+    assert (summary.added, summary.removed, summary.modified) == (0, 0, 1)
+    # 反方向：重新可以读取，其中的内容不逐一列为新增
+    result, summary = changes(new, old)
+    assert result == {('/root/locked', MODIFIED, True, 0)}
+    assert (summary.added, summary.removed, summary.modified) == (0, 0, 1)
+
+
+def test_unsorted_stream_raises():
+    def unsorted():
+        yield TreeNode('root', '/root', True, 0)
+        yield TreeNode('b', '/root/b', False, 1, size=1)
+        yield TreeNode('a', '/root/a', False, 1, size=1)
+    with pytest.raises(ValueError, match='name order'):
+        list(diff_trees(nodes({}), unsorted()))
+
+
+def test_directory_against_snapshot(tmp_path):
+    root = tmp_path / 'root'
+    (root / 'gone' / 'deep').mkdir(parents=True)
+    (root / 'gone' / 'deep' / 'f.txt').write_text('x')
+    (root / 'keep').mkdir()
+    (root / 'keep' / 'log.txt').write_text('short')
+    snapshot = str(tmp_path / 'old.treesnap')
+    write_snapshot(snapshot, str(root), walk_tree(str(root), lister=list_dir_stat))
+
+    (root / 'gone' / 'deep' / 'f.txt').unlink()
+    (root / 'gone' / 'deep').rmdir()
+    (root / 'gone').rmdir()
+    (root / 'keep' / 'log.txt').write_text('much longer now')
+    (root / 'keep' / 'new').mkdir()
+
+    summary = DiffSummary()
+    lines = list(iter_diff_lines(snapshot, str(root), summary=summary))
+    assert (summary.added, summary.removed, summary.modified) == (1, 3, 1)
+    assert any(line.endswith('- gone/ (2 entries)') for line in lines)
+    assert any('~ log.txt (5 → 15 bytes)' in line for line in lines)
+    assert any(line.endswith('+ new/') for line in lines)
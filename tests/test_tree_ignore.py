@@ -0,0 +1,155 @@
+"""
+忽略规则测试 - tests/test_tree_ignore.py
+功能：按表格检查 IgnoreMatcher 的 .gitignore 语义（取反、锚定、**、只匹配目录等），
+      以及 IgnoreFilter 在多级 .gitignore 下的过滤结果和被忽略目录的剪枝
+说明：装有 git 时，另将磁盘上的目录树与 git check-ignore 的结果对照
+用法：python -m pytest tests
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_core import list_dir, walk_tree  # noqa: E402
+from tree_ignore import IgnoreFilter, IgnoreMatcher  # noqa: E402
+
+# (规则, 相对路径, 是否目录, 期望)：True 忽略，False 被 ! 重新包含，None 没有规则匹配
+MATCH_CASES = [
+    # 名称与通配
+    (['*.log'], 'a.log', False, True),
+    (['*.log'], 'deep/er/a.log', False, True),
+    (['*.log'], 'a.txt', False, None),
+    (['*.py[co]'], 'm.pyc', False, True),
+    (['foo?'], 'foo1', False, True),
+    (['foo?'], 'foo12', False, None),
+    (['node_modules'], 'web/node_modules', True, True),
+    (['x.log  '], 'x.log', False, True),  # 行尾空格被忽略
+    (['\\!important'], '!important', False, True),
+    (['\\#hash'], '#hash', False, True),
+    (['# comment', ''], 'comment', False, None),
+    # 取反：后出现的规则优先
+    (['*.log', '!keep.log'], 'keep.log', False, False),
+    (['*.log', '!keep.log'], 'other.log', False, True),
+    (['!keep.log', '*.log'], 'keep.log', False, True),
+    (['*.txt', '!*.txt'], 'a.txt', False, False),
+    # 只匹配目录
+    (['build/'], 'build', True, True),
+    (['build/'], 'build', False, None),
+    (['build/'], 'src/build', True, True),
+    (['*.d/'], 'x.d', True, True),
+    (['*.d/'], 'x.d', False, None),
+    # 锚定：以 / 开头或中间含有 /
+    (['/build'], 'build', True, True),
+    (['/build'], 'src/build', True, None),
+    (['docs/api'], 'docs/api', True, True),
+    (['docs/api'], 'x/docs/api', True, None),
+    (['docs/*.md'], 'docs/a.md', False, True),
+    (['docs/*.md'], 'docs/sub/a.md', False, None),  # * 不跨越 /
+    # **
+    (['**/cache'], 'cache', True, True),
+    (['**/cache'], 'a/b/cache', True, True),
+    (['**/a/cache'], 'x/a/cache', True, True),
+    (['**/a/cache'], 'a/cache', True, True),
+    (['**/a/cache'], 'x/b/cache', True, None),
+    (['a/**/z'], 'a/z', False, True),
+    (['a/**/z'], 'a/b/c/z', False, True),
+    (['a/**/z'], 'b/a/z', False, None),
+    (['logs/**'], 'logs/x', False, True),
+    (['logs/**'], 'logs/x/y', False, True),
+    (['logs/**'], 'logs', True, None),
+]
+
+
+@pytest.mark.parametrize('rules, rel_path, is_dir, expected', MATCH_CASES)
+def test_match(rules, rel_path, is_dir, expected):
+    name = rel_path.rsplit('/', 1)[-1]
+    assert IgnoreMatcher(rules).match(rel_path, name, is_dir) is expected
+
+
+# 磁盘上的目录树：以 / 结尾的为目录，.gitignore 的内容在 GITIGNORES 中
+TREE = [
+    'a.log', 'keep.txt', 'node_modules/', 'node_modules/pkg.js', 'out/', 'out/bin',
+    'sub/', 'sub/keep.log', 'sub/x.log', 'sub/local/', 'sub/local/f', 'sub/out/', 'sub/out/f',
+    'sub/deeper/', 'sub/deeper/keep.log', 'sub/deeper/y.log', 'sub/deeper/z.tmp',
+]
+GITIGNORES = {
+    '.gitignore': '*.log\n/out/\nnode_modules/\n',
+    'sub/.gitignore': '!keep.log\nlocal/\n',
+    'sub/deeper/.gitignore': '*.tmp\n',
+}
+# 期望保留的条目（.gitignore 是隐藏文件，list_dir 本来就不列出）
+KEPT = {
+    'keep.txt', 'sub', 'sub/keep.log', 'sub/out', 'sub/out/f',
+    'sub/deeper', 'sub/deeper/keep.log',
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for entry in TREE:
+        path = tmp_path / entry
+        if entry.endswith('/'):
+            path.mkdir()
+        else:
+            path.touch()
+    for rel, content in GITIGNORES.items():
+        (tmp_path / rel).write_text(content)
+    return tmp_path
+
+
+def scan(root, ignore):
+    """返回遍历结果中各条目相对于 root 的路径（以 / 分隔）"""
+    return {os.path.relpath(node.path, root).replace(os.sep, '/')
+            for node in walk_tree(str(root), lister=ignore.list_dir) if node.depth}
+
+
+def test_nested_gitignores(tree):
+    assert scan(tree, IgnoreFilter(str(tree))) == KEPT
+
+
+def test_ignored_folder_is_not_read(tree):
+    read = []
+
+    def recording_lister(dir_path):
+        read.append(os.path.relpath(dir_path, tree).replace(os.sep, '/'))
+        return list_dir(dir_path)
+    scan(tree, IgnoreFilter(str(tree), lister=recording_lister))
+    assert sorted(read) == ['.', 'sub', 'sub/deeper', 'sub/out']
+
+
+def test_user_patterns_take_precedence(tree):
+    ignore = IgnoreFilter(str(tree), ['!a.log', 'sub/deeper/'])
+    kept = scan(tree, ignore)
+    assert 'a.log' in kept
+    assert not any(path.startswith('sub/deeper') for path in kept)
+
+
+def test_user_patterns_without_gitignore(tree):
+    kept = scan(tree, IgnoreFilter(str(tree), ['*.log'], use_gitignore=False))
+    assert 'node_modules/pkg.js' in kept and 'sub/local/f' in kept
+    assert not any(path.endswith('.log') for path in kept)
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_agrees_with_git_check_ignore(tree):
+    subprocess.run(['git', 'init', '-q', str(tree)], check=True)
+    entries = [entry.rstrip('/') for entry in TREE]
+    result = subprocess.run(['git', 'check-ignore', '--no-index', '--stdin'], cwd=tree,
+                            input='\n'.join(entries), capture_output=True, text=True)
+    ignored_by_git = set(result.stdout.split())
+    assert {'a.log', 'out', 'node_modules', 'sub/local'} <= ignored_by_git
+    kept = scan(tree, IgnoreFilter(str(tree)))
+    # git 对被忽略目录中的条目也逐一判断，剪枝后它们不会出现，只比较上层目录可见的条目
+    visible = {entry for entry in entries
+               if all(parent in kept for parent in _parents(entry))}
+    assert {entry for entry in visible if entry not in kept} == visible & ignored_by_git
+
+
+def _parents(rel_path):
+    parts = rel_path.split('/')
+    return ['/'.join(parts[:i]) for i in range(1, len(parts))]
@@ -0,0 +1,70 @@
+"""
+目录列表缓存测试 - tests/test_tree_listing.py
+功能：检查读取或预取期间目录被 invalidate 时，ListingCache 不返回、也不缓存变化之前的结果
+用法：python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_listing import ListingCache  # noqa: E402
+
+
+class GatedLister:
+    """返回当前版本号的读取函数；gate 设置后第一次读取会等待 release，以便在读取期间 invalidate"""
+
+    def __init__(self):
+        self.version = 0
+        self.gate = None
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, dir_path):
+        version = self.version
+        if self.gate:
+            self.gate = False
+            self.started.set()
+            self.release.wait(5)
+        return [], [(f"v{version}", dir_path)]
+
+
+def change_while_reading(lister, cache):
+    """读取开始后修改目录并 invalidate，再放行读取"""
+    assert lister.started.wait(5)
+    lister.version += 1
+    cache.invalidate('/d')
+    lister.release.set()
+
+
+def test_invalidate_during_read():
+    lister = GatedLister()
+    lister.gate = True
+    cache = ListingCache(lister)
+    changer = threading.Thread(target=change_while_reading, args=(lister, cache))
+    changer.start()
+    assert cache.list_dir('/d')[1] == [('v1', '/d')]
+    changer.join()
+    assert cache.list_dir('/d')[1] == [('v1', '/d')]  # 缓存的也是新内容
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_invalidate_during_prefetch():
+    lister = GatedLister()
+    lister.gate = True
+    cache = ListingCache(lister)
+    cache.prefetch(['/d'])
+    assert lister.started.wait(5)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(cache.list_dir('/d')))
+    reader.start()  # 等待正在进行的预取
+    lister.version += 1
+    cache.invalidate('/d')  # 预取已开始，无法取消
+    lister.release.set()
+    reader.join(5)
+    assert result[0][1] == [('v1', '/d')]
+    assert cache.list_dir('/d')[1] == [('v1', '/d')]
+    cache.close()
@@ -0,0 +1,43 @@
+"""
+快照读取测试 - tests/test_tree_snapshot.py
+功能：检查截断或损坏的快照文件抛出 ValueError，而不是其他异常
+用法：python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_core import list_dir_stat, walk_tree  # noqa: E402
+from tree_snapshot import HEADER_SIZE, Snapshot, write_snapshot  # noqa: E402
+
+
+@pytest.fixture
+def snapshot_bytes(tmp_path):
+    root = tmp_path / 'root'
+    (root / 'a' / 'b').mkdir(parents=True)
+    (root / 'a' / 'file.txt').write_text('hello')
+    path = tmp_path / 'tree.treesnap'
+    write_snapshot(str(path), str(root), walk_tree(str(root), lister=list_dir_stat))
+    with Snapshot(str(path)) as snapshot:
+        assert snapshot.count == 4
+    return path.read_bytes()
+
+
+def test_truncated_snapshot(tmp_path, snapshot_bytes):
+    path = tmp_path / 'cut.treesnap'
+    for size in (0, 10, HEADER_SIZE, 70, 100, 131, 200, len(snapshot_bytes) - 1):
+        path.write_bytes(snapshot_bytes[:size])
+        with pytest.raises(ValueError):
+            Snapshot(str(path))
+
+
+def test_corrupt_metadata(tmp_path, snapshot_bytes):
+    path = tmp_path / 'bad.treesnap'
+    meta_start = snapshot_bytes.rindex(b'{"')
+    path.write_bytes(snapshot_bytes[:meta_start] + b'[' + snapshot_bytes[meta_start + 1:])
+    with pytest.raises(ValueError, match='metadata'):
+        Snapshot(str(path))
@@ -0,0 +1,52 @@
+"""
+树形视图模型测试 - tests/test_tree_view.py
+功能：检查 LazyTreeModel 反复 refresh 后的显示内容和数组大小
+用法：python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('tkinter')
+
+import tree_view  # noqa: E402
+from tree_view import LazyTreeModel  # noqa: E402
+
+
+def expand_all(model):
+    row = 0
+    while row < len(model.rows):
+        if model.is_dir(model.rows[row]):
+            model.expand(row)
+        row += 1
+    return model
+
+
+def texts(model):
+    return [model.row_text(row) for row in range(len(model.rows))]
+
+
+def test_refresh_keeps_memory_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(tree_view, 'COMPACT_MIN', 50)
+    for a in range(4):
+        for b in range(4):
+            (tmp_path / f"d{a}" / f"e{b}").mkdir(parents=True)
+    root = str(tmp_path)
+    model = expand_all(LazyTreeModel(root))
+    model.collapse(model.rows.index(model.find(os.path.join(root, 'd2'))))
+
+    for step in range(200):
+        folder = os.path.join(root, f"d{step % 4}", f"e{step // 4 % 4}")
+        open(os.path.join(folder, f"f{step}"), 'w').close()
+        for path in (folder, os.path.dirname(folder), root):
+            model.refresh(model.find(path))
+        assert len(model) < 1000  # 不压缩时会超过 3000
+
+    fresh = expand_all(LazyTreeModel(root))
+    fresh.collapse(fresh.rows.index(fresh.find(os.path.join(root, 'd2'))))
+    assert texts(model) == texts(fresh)
+    assert [model.path(n) for n in model.rows] == [fresh.path(n) for n in fresh.rows]
@@ -0,0 +1,75 @@
+"""
+目录监视测试 - tests/test_tree_watch.py
+功能：检查两种监视后端在 contents=True 时报告文件内容的变化，默认时只报告条目的增删
+用法：python -m pytest tests
+"""
+
+import os
+import queue
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tree_watch  # noqa: E402
+from tree_watch import DirectoryWatcher  # noqa: E402
+
+BACKENDS = [False]
+if sys.platform.startswith('linux'):
+    BACKENDS.append(True)
+
+
+def changes_after(root, action, use_inotify, contents, wait=2.0):
+    """启动监视，执行 action 后收集 wait 秒内报告的目录"""
+    reports = queue.Queue()
+    watcher = DirectoryWatcher(root, reports.put, use_inotify=use_inotify,
+                               contents=contents).start()
+    try:
+        time.sleep(0.5)  # 等待加入监视（轮询模式下记录初始状态）
+        action()
+        changed = set()
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            try:
+                changed |= reports.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return changed
+    finally:
+        watcher.stop()
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(tree_watch, 'POLL_INTERVAL', 0.2)
+    monkeypatch.setattr(tree_watch, 'DEBOUNCE', 0.1)
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'log.txt').write_text('a')
+    return tmp_path
+
+
+def append(path):
+    def action():
+        with open(path, 'a') as f:
+            f.write('more content')
+    return action
+
+
+@pytest.mark.parametrize('use_inotify', BACKENDS)
+def test_file_content_change_reports_parent(tree, use_inotify):
+    changed = changes_after(str(tree), append(tree / 'sub' / 'log.txt'), use_inotify, True)
+    assert changed == {str(tree / 'sub')}
+
+
+@pytest.mark.parametrize('use_inotify', BACKENDS)
+def test_file_content_change_ignored_by_default(tree, use_inotify):
+    changed = changes_after(str(tree), append(tree / 'sub' / 'log.txt'), use_inotify, False)
+    assert changed == set()
+
+
+@pytest.mark.parametrize('use_inotify', BACKENDS)
+def test_new_file_reported(tree, use_inotify):
+    changed = changes_after(str(tree), (tree / 'sub' / 'new.txt').touch, use_inotify, False)
+    assert changed == {str(tree / 'sub')}
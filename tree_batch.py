@@ -0,0 +1,103 @@
+"""
+批量扫描 - tree_batch.py
+功能：同时扫描多个根目录（如几十个项目文件夹），分别记录每个根目录的进度、状态和结果
+说明：根目录交给固定数量的线程依次扫描（jobs），预取目录的读取任务共用一个 tree_core.ReadPool（workers），
+      因此无论有多少个根目录，线程总数都不超过 jobs + workers；
+      合并输出见 tree_export.write_batch
+作者：Ryan Joo
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tree_core import ReadPool, ScanCancelled, ScanStats
+
+DEFAULT_JOBS = 4  # 默认同时扫描的根目录数
+
+WAITING = 'waiting'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class BatchScan:
+    """一组根目录的批量扫描
+
+    用法：
+        batch = BatchScan(roots, jobs=4, workers=8)
+        futures = batch.run(task)  # task(下标, 根目录, ScanStats, 取消事件, workers) 在后台线程中执行
+        results = [future.result() for future in futures]
+
+    属性：
+        roots: 根目录列表
+        stats: 与 roots 对应的 ScanStats，扫描过程中实时更新
+        states: 与 roots 对应的状态：WAITING、RUNNING、DONE、FAILED、CANCELLED
+        errors: 与 roots 对应，扫描失败时为异常，否则为 None
+        cancel: threading.Event，设置后所有根目录都停止（尚未开始的不再开始）
+    """
+
+    def __init__(self, roots, jobs=DEFAULT_JOBS, workers=1, cancel=None):
+        self.roots = list(roots)
+        self.jobs = max(1, min(jobs, len(self.roots)))
+        self.workers = workers
+        self.stats = [ScanStats() for _ in self.roots]
+        self.states = [WAITING] * len(self.roots)
+        self.errors = [None] * len(self.roots)
+        self.cancel = threading.Event() if cancel is None else cancel
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._pool = None
+
+    def run(self, task):
+        """在后台线程中对每个根目录调用 task，返回与 roots 对应的 Future 列表（只能调用一次）
+
+        task 的参数为 (下标, 根目录, stats, cancel, workers)，workers 为共用的 ReadPool（workers 大于 1 时）
+        或 1，直接传给 tree_core.walk_tree 等；返回值即 Future 的结果。
+        全部结束后共用的线程池自动关闭。
+        """
+        if self.workers > 1:
+            self._pool = ReadPool(self.workers)
+        self._remaining = len(self.roots)
+        executor = ThreadPoolExecutor(max_workers=self.jobs)
+        try:
+            return [executor.submit(self._run_one, task, i) for i in range(len(self.roots))]
+        finally:
+            executor.shutdown(wait=False)  # 已提交的任务仍会依次执行
+
+    def _run_one(self, task, index):
+        """后台线程：扫描一个根目录并记录状态"""
+        try:
+            if self.cancel.is_set():
+                raise ScanCancelled()
+            self.states[index] = RUNNING
+            result = task(index, self.roots[index], self.stats[index], self.cancel,
+                          self._pool or 1)
+            self.states[index] = DONE
+            return result
+        except ScanCancelled:
+            self.states[index] = CANCELLED
+            raise
+        except Exception as e:
+            self.states[index] = FAILED
+            self.errors[index] = e
+            raise
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                finished = not self._remaining
+            if finished and self._pool is not None:
+                self._pool.close()
+
+    @property
+    def finished(self):
+        """是否所有根目录都已结束（完成、失败或取消）"""
+        return all(state not in (WAITING, RUNNING) for state in self.states)
+
+    def count(self, state):
+        """处于某一状态的根目录数"""
+        return self.states.count(state)
+
+    def total_entries(self):
+        """所有根目录已产出的条目数之和"""
+        return sum(stats.entries for stats in self.stats)
@@ -0,0 +1,156 @@
+"""
+扫描缓存 - tree_cache.py
+功能：将每个目录的读取结果连同其 mtime/inode 持久化到 SQLite，
+      再次扫描时只重新读取 mtime 发生变化的目录
+说明：缓存位于用户缓存目录下，超过容量上限时按最近使用时间（LRU）淘汰
+作者：Ryan Joo
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from tree_core import list_dir
+
+APP_NAME = 'DirectoryTreeViewer'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 缓存中目录名数据的总容量上限
+# mtime 距今不足该秒数的目录不写入缓存：同一时间戳内的后续修改无法通过 mtime 发现
+RACY_WINDOW = 2.0
+
+
+def default_cache_path():
+    """返回当前平台的用户缓存目录下的缓存文件路径"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        base = os.path.join(base, APP_NAME, 'Cache')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~/Library/Caches'), APP_NAME)
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        base = os.path.join(base, 'directory-tree-viewer')
+    return os.path.join(base, 'scan_cache.sqlite3')
+
+
+class ScanCache:
+    """以目录 mtime/inode 为校验依据的持久化目录列表缓存（可在多个线程中共用）
+
+    用法：
+        cache = ScanCache()
+        walk_tree(path, lister=cache.list_dir)
+        cache.flush()
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        参数：
+            path: 缓存文件路径（默认位于用户缓存目录）
+            max_bytes: 容量上限（字节）
+
+        异常：
+            OSError, sqlite3.Error: 缓存文件无法创建或打开时抛出
+        """
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched = []  # 命中但尚未写回 last_used 的路径
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS listings ('
+            ' path BLOB PRIMARY KEY,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' ino INTEGER NOT NULL,'
+            ' n_dirs INTEGER NOT NULL,'
+            ' names BLOB NOT NULL,'
+            ' last_used REAL NOT NULL)')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS listings_lru ON listings(last_used)')
+        self._conn.commit()
+
+    def list_dir(self, dir_path, force=False):
+        """与 tree_core.list_dir 相同，但目录未变化时直接返回缓存结果
+
+        参数：
+            dir_path: 目录路径
+            force: 为 True 时忽略缓存内容重新读取（结果仍会写入缓存）
+        """
+        st = os.stat(dir_path)
+        key = os.fsencode(os.path.abspath(dir_path))
+
+        if not force:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT mtime_ns, ino, n_dirs, names FROM listings WHERE path = ?',
+                    (key,)).fetchone()
+            if row is not None and row[0] == st.st_mtime_ns and row[1] == st.st_ino:
+                with self._lock:
+                    self.hits += 1
+                    self._touched.append(key)
+                return self._decode(dir_path, row[2], row[3])
+
+        dirs, files = list_dir(dir_path)
+        names = '\0'.join([name for name, _ in dirs] + [name for name, _ in files])
+        with self._lock:
+            self.misses += 1
+            if time.time() - st.st_mtime >= RACY_WINDOW:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, st.st_mtime_ns, st.st_ino, len(dirs),
+                     names.encode('utf-8', 'surrogateescape'), time.time()))
+        return dirs, files
+
+    @staticmethod
+    def _decode(dir_path, n_dirs, data):
+        """将缓存中的名称数据还原为 (dirs, files)"""
+        if not data:
+            return [], []
+        join = os.path.join
+        items = [(name, join(dir_path, name))
+                 for name in data.decode('utf-8', 'surrogateescape').split('\0')]
+        return items[:n_dirs], items[n_dirs:]
+
+    def flush(self):
+        """写回最近使用时间、提交事务，并在超出容量时按 LRU 淘汰"""
+        with self._lock:
+            touched, self._touched = self._touched, []
+            now = time.time()
+            self._conn.executemany(
+                'UPDATE listings SET last_used = ? WHERE path = ?',
+                ((now, key) for key in touched))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """删除最久未使用的目录，直到总容量降到上限的 90%（调用方需持有锁）"""
+        total = self._conn.execute(
+            'SELECT COALESCE(SUM(LENGTH(names)), 0) FROM listings').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - self.max_bytes * 0.9
+        victims = []
+        for key, size in self._conn.execute(
+                'SELECT path, LENGTH(names) FROM listings ORDER BY last_used'):
+            victims.append((key,))
+            target -= size
+            if target <= 0:
+                break
+        self._conn.executemany('DELETE FROM listings WHERE path = ?', victims)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._touched = []
+            self._conn.execute('DELETE FROM listings')
+            self._conn.commit()
+
+    def close(self):
+        """提交并关闭缓存"""
+        self.flush()
+        self._conn.close()
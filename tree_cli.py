@@ -0,0 +1,262 @@
+"""
+目录树命令行 - tree_cli.py
+功能：不启动图形界面，边遍历边将目录树输出到标准输出或文件
+说明：只依赖 tree_core 等核心模块，不导入 tkinter/tkinterdnd2/pypinyin，适合 CI 和服务器环境；
+      输出逐行写出，内存占用与目录树大小无关
+用法：python -m tree_cli [目录] [--depth N] [--max-entries N] [--time-budget 秒]
+            [--ignore 模式]... [--gitignore] [--format text|md|jsonl|json|snapshot]
+            [--style spacious|compact|ascii|markdown]
+            [--sizes] [--sort name|natural|nocase|ext|mtime|size] [--find 文本] [--symlinks follow|show|skip]
+            [--one-file-system] [--workers N] [-o 文件]
+      python -m tree_cli 目录 目录... [--jobs N] [...]   同时扫描多个目录，按顺序合并输出
+      python -m tree_cli [目录或快照] --diff 旧快照   比较两次扫描，只列出新增、删除和修改的条目
+作者：Ryan Joo
+"""
+
+import argparse
+import functools
+import os
+import sys
+
+from tree_core import (RENDER_STYLES, SYMLINK_MODES, ScanLimits, ScanStats, list_dir,
+                       list_dir_stat)
+from tree_export import (BATCH_FORMATS, BINARY_FORMATS, FORMATS, STAT_FORMATS, export_batch,
+                         export_diff, export_tree, write_batch, write_diff, write_tree)
+from tree_ignore import IgnoreFilter
+from tree_sort import SORT_MODES, STAT_SORTS
+
+DEFAULT_JOBS = 4  # 与 tree_batch.DEFAULT_JOBS 相同（只有多个目录时才加载 tree_batch）
+
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='tree_cli',
+        description='Print the directory tree of a folder without starting the GUI.')
+    parser.add_argument('roots', nargs='*', metavar='root',
+                        help='directory to scan (default: current directory); '
+                             'with --diff, a directory or a snapshot file. Several '
+                             'directories are scanned at the same time and printed in order')
+    parser.add_argument('-d', '--depth', type=int, default=None, metavar='N',
+                        help='descend at most N levels below the root (with --sizes or '
+                             '--sort size, deeper folders are still read so that folder '
+                             'totals are exact; only the output is cut at N)')
+    parser.add_argument('-n', '--max-entries', type=int, default=None, metavar='N',
+                        help='stop after N entries')
+    parser.add_argument('-t', '--time-budget', type=float, default=None, metavar='SECONDS',
+                        help='stop after scanning for SECONDS')
+    parser.add_argument('-I', '--ignore', action='append', default=[], metavar='PATTERN',
+                        help='skip entries matching PATTERN (.gitignore syntax, repeatable)')
+    parser.add_argument('-g', '--gitignore', action='store_true',
+                        help='skip entries ignored by .gitignore files in the scanned folder')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='text',
+                        help='output format: plain text, a Markdown code block, JSON Lines '
+                             '(one record per entry), nested JSON, or a binary snapshot '
+                             '(requires -o) (default: text)')
+    parser.add_argument('--style', choices=RENDER_STYLES, default='spacious',
+                        help='layout of text and md output: box drawing with a spacer line '
+                             'between entries, compact box drawing without spacer lines, '
+                             'compact ASCII-only (|-- and `--), or Markdown nested lists '
+                             '(with --format md, written without a code block) '
+                             '(default: spacious)')
+    parser.add_argument('-s', '--sizes', action='store_true',
+                        help='show file sizes, and the total size and file count of each '
+                             'folder; this reads the whole tree, below --depth too')
+    parser.add_argument('--sort', choices=SORT_MODES, default='name',
+                        help='order of entries in a folder, folders always before files: '
+                             'by name (code point order), natural (file2 before file10, '
+                             'ignoring case), nocase (ignoring case), ext (by extension), '
+                             'mtime (newest first), or size (largest first, folders mixed in '
+                             'by total size; implies --sizes) (default: name)')
+    parser.add_argument('--find', metavar='TEXT',
+                        help='list only entries whose name contains TEXT (case-insensitive; '
+                             'TEXT with a / matches the path from the root, folders ending '
+                             'in /) and the folders leading to them')
+    parser.add_argument('--symlinks', choices=SYMLINK_MODES, default='follow',
+                        help='symbolic links: follow them (links looping back to a parent '
+                             'folder are reported and not entered), show them as entries '
+                             'with their target, or skip them (default: follow)')
+    parser.add_argument('-x', '--one-file-system', action='store_true',
+                        help='do not descend into folders on other file systems')
+    parser.add_argument('-w', '--workers', type=int, default=1, metavar='N',
+                        help='threads used to read directories in parallel; with several '
+                             'directories, one pool of N threads is shared by all (default: 1)')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, metavar='N',
+                        help='with several directories, how many are scanned at the same time '
+                             f'(default: {DEFAULT_JOBS})')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='write to FILE instead of standard output')
+    parser.add_argument('--diff', metavar='SNAPSHOT',
+                        help='compare with an earlier snapshot (or directory) and list only '
+                             'added (+), removed (-) and modified (~) entries')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the number of folders and entries to standard error')
+    return parser
+
+
+def setup_stdout():
+    """标准输出沿用终端编码
+
+    无法解码的文件名（surrogateescape）按原始字节写回；
+    终端编码无法表示的字符（如旧版 Windows 控制台中的制表符）以 ? 代替。
+    """
+    out = sys.stdout
+    if hasattr(out, 'reconfigure'):
+        utf8 = (out.encoding or '').lower().replace('-', '') == 'utf8'
+        out.reconfigure(errors='surrogateescape' if utf8 else 'replace')
+    return out
+
+
+def run_output(args, export, write, *params, **options):
+    """将结果写入 -o 指定的文件或标准输出；出错时返回退出码，成功时返回 None"""
+    try:
+        if args.output:
+            export(args.output, *params, **options)
+        else:
+            out = setup_stdout()
+            write(out, *params, **options)
+            out.flush()
+    except BrokenPipeError:
+        # 下游提前关闭（如 | head），不再输出；将标准输出指向空设备以免退出时再次报错
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"tree_cli: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return None
+
+
+def with_symlinks(lister, mode):
+    """按 --symlinks 包装读取函数；默认跟随时原样返回"""
+    if mode == 'follow':
+        return lister
+    return functools.partial(lister, symlinks=mode)
+
+
+def run_diff(args):
+    """--diff：比较 args.diff（旧）与 args.root（新），返回进程退出码"""
+    from tree_diff import DiffSummary
+    listers = []
+    for side in (args.diff, args.root):
+        lister = with_symlinks(list_dir_stat, args.symlinks)
+        if os.path.isdir(side) and (args.ignore or args.gitignore):
+            lister = IgnoreFilter(side, args.ignore, args.gitignore, lister).list_dir
+        listers.append(lister)
+    stats = ScanStats()
+    summary = DiffSummary()
+    status = run_output(args, export_diff, write_diff, args.diff, args.root, fmt=args.format,
+                        stats=stats, workers=args.workers, lister=tuple(listers),
+                        summary=summary, style=args.style)
+    if status is not None:
+        return status
+    if summary.truncated:
+        print("tree_cli: a snapshot is incomplete, entries it left out are reported as changes",
+              file=sys.stderr)
+    print(f"tree_cli: {summary.added} added, {summary.removed} removed, "
+          f"{summary.modified} modified", file=sys.stderr)
+    if args.stats:
+        print(f"{stats.dirs} folders, {stats.entries} entries", file=sys.stderr)
+    return 0
+
+
+def run_batch(args, make_lister, **options):
+    """多个目录：同时扫描 args.roots，按顺序合并输出，返回进程退出码
+
+    make_lister 为函数 (根目录) -> 该目录的读取函数，其余参数见 tree_export.write_batch。
+    """
+    from tree_batch import BatchScan
+    listers = [make_lister(root) for root in args.roots]
+    batch = BatchScan(args.roots, args.jobs, args.workers)
+    status = run_output(args, export_batch, write_batch, batch, listers=listers, **options)
+    if status is not None:
+        return status
+    for root, stats in zip(batch.roots, batch.stats):
+        if stats.truncated:
+            print(f"tree_cli: {root}: entry or time budget reached, output is incomplete",
+                  file=sys.stderr)
+        if args.stats:
+            print(f"{root}: {stats.dirs} folders, {stats.entries} entries", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.roots:
+        args.roots = ['.']
+    args.root = args.roots[0]
+    if args.diff is not None and len(args.roots) > 1:
+        parser.error("--diff compares a single directory or snapshot")
+    if args.diff is not None:
+        if not os.path.exists(args.root):
+            parser.error(f"no such file or directory: {args.root}")
+        if not os.path.exists(args.diff):
+            parser.error(f"no such file or directory: {args.diff}")
+        if args.format not in ('text', 'md'):
+            parser.error("--diff supports only --format text or md")
+        if args.sizes or args.sort != 'name' or args.find:
+            parser.error("--diff cannot be combined with --sizes, --sort or --find")
+        if args.depth is not None or args.max_entries is not None or args.time_budget is not None:
+            parser.error("--diff cannot be combined with --depth, --max-entries or --time-budget")
+        if args.one_file_system:
+            parser.error("--diff cannot be combined with --one-file-system")
+    else:
+        for root in args.roots:
+            if not os.path.isdir(root):
+                parser.error(f"not a directory: {root}")
+    if args.depth is not None and args.depth < 1:
+        parser.error("--depth must be at least 1")
+    if args.max_entries is not None and args.max_entries < 1:
+        parser.error("--max-entries must be at least 1")
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error("--time-budget must be positive")
+    if args.find is not None and not args.find:
+        parser.error("--find needs a non-empty TEXT")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.style != 'spacious' and args.format not in ('text', 'md'):
+        parser.error("--style applies only to --format text or md")
+    if len(args.roots) > 1 and args.format not in BATCH_FORMATS:
+        parser.error(f"--format {args.format} takes a single directory")
+    if args.format in BINARY_FORMATS and not args.output:
+        parser.error(f"--format {args.format} requires --output")
+
+    if args.diff is not None:
+        return run_diff(args)
+
+    limits = ScanLimits(args.depth, args.max_entries, args.time_budget, args.one_file_system)
+    sizes = args.sizes or args.sort == 'size'
+    with_stat = sizes or args.format in STAT_FORMATS or args.sort in STAT_SORTS
+    base_lister = with_symlinks(list_dir_stat if with_stat else list_dir, args.symlinks)
+
+    def make_lister(root):
+        if args.ignore or args.gitignore:
+            return IgnoreFilter(root, args.ignore, args.gitignore, base_lister).list_dir
+        return base_lister
+    if len(args.roots) > 1:
+        return run_batch(args, make_lister, fmt=args.format, limits=limits, sizes=sizes,
+                         sort=args.sort, find=args.find, style=args.style)
+
+    stats = ScanStats()
+    options = dict(fmt=args.format, stats=stats, workers=args.workers,
+                   lister=make_lister(args.root), limits=limits, sizes=sizes, sort=args.sort,
+                   find=args.find, style=args.style)
+    status = run_output(args, export_tree, write_tree, args.root, **options)
+    if status is not None:
+        return status
+
+    if stats.truncated:
+        print("tree_cli: entry or time budget reached, output is incomplete", file=sys.stderr)
+    if args.stats:
+        print(f"{stats.dirs} folders, {stats.entries} entries", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,869 @@
+"""
+目录树核心 - tree_core.py
+功能：基于 os.scandir 的目录遍历引擎和目录树文本渲染，不依赖任何 GUI 模块
+说明：遍历器输出按先序排列的 TreeNode 节点流，渲染器消费节点流生成文本行（风格见 RENDER_STYLES）
+作者：Ryan Joo
+"""
+
+import functools
+import itertools
+import os
+import re
+import threading
+import time
+
+
+# ======================== 节点模型 ========================
+class TreeNode:
+    """目录树中的一个条目
+
+    属性：
+        name: 条目名称
+        path: 条目完整路径
+        is_dir: 是否为目录（与 os.path.isdir 一致，跟随符号链接）
+        depth: 深度（根目录为 0）
+        is_last: 是否为父目录中的最后一个条目
+        error: 读取该目录时发生的异常（仅目录，成功时为 None）
+        more: 大于 0 时表示这是一个省略标记，代替父目录中未输出的 more 个条目
+        size: 文件大小（字节），仅在使用 list_dir_stat 等附带大小的读取函数时可用，否则为 None；
+              统计目录大小时（见 tree_sizes）为目录及省略标记中所有文件的总大小
+        mtime: 修改时间（纳秒时间戳），可用性同 size
+        files: 统计目录大小时，目录及省略标记中（递归）的文件数，否则为 None
+        link: 只显示、不跟随的符号链接（见 list_dir 的 symlinks 参数）的目标，否则为 None；
+              这样的条目总是作为文件列出
+    """
+    __slots__ = ('name', 'path', 'is_dir', 'depth', 'is_last', 'error', 'more', 'size', 'mtime',
+                 'files', 'link')
+
+    def __init__(self, name, path, is_dir, depth=0, is_last=True, error=None, more=0,
+                 size=None, mtime=None, files=None, link=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.depth = depth
+        self.is_last = is_last
+        self.error = error
+        self.more = more
+        self.size = size
+        self.mtime = mtime
+        self.files = files
+        self.link = link
+
+    def __repr__(self):
+        kind = 'dir' if self.is_dir else 'file'
+        return f"TreeNode({self.name!r}, {kind}, depth={self.depth})"
+
+
+def more_node(count, depth):
+    """创建省略标记节点，代替父目录中最后 count 个未输出的条目"""
+    return TreeNode(f"… {count} more", None, False, depth, True, more=count)
+
+
+def mark_last(nodes):
+    """为只保留了部分条目的先序节点列表重新确定 is_last
+
+    从后向前扫描：同一深度上后面还有兄弟节点（中间没有更浅的节点）则不是最后一项。
+    """
+    has_next = []
+    for node in reversed(nodes):
+        depth = node.depth
+        del has_next[depth + 1:]
+        if len(has_next) <= depth:
+            has_next.extend([False] * (depth + 1 - len(has_next)))
+        node.is_last = not has_next[depth]
+        has_next[depth] = True
+    return nodes
+
+
+# ======================== 遍历控制 ========================
+class ScanCancelled(Exception):
+    """遍历被取消时抛出"""
+
+
+class NotFollowed(OSError):
+    """没有读取的目录，作为节点的 error：符号链接指回其上层目录（循环），
+    或位于另一个文件系统（见 ScanLimits.one_filesystem）"""
+
+
+SYMLINK_LOOP = "Symlink loop, not followed"
+OTHER_FILESYSTEM = "Other file system, not scanned"
+
+
+class ScanStats:
+    """遍历进度计数（由遍历线程写入，可在其他线程中随时读取）
+
+    属性：
+        dirs: 已读取的目录数
+        entries: 已产出的条目数（不含根目录和省略标记）
+        truncated: 是否因条目数或时间预算用尽而提前结束
+    """
+    __slots__ = ('dirs', 'entries', 'truncated')
+
+    def __init__(self):
+        self.dirs = 0
+        self.entries = 0
+        self.truncated = False
+
+
+class ScanLimits:
+    """遍历范围限制，None 表示不限制
+
+    属性：
+        max_depth: 最大展开深度；深度等于该值的目录只读取条目数，以省略标记代替其内容
+        max_entries: 最多输出的条目数
+        time_budget: 遍历的最长时间（秒）
+        one_filesystem: 为 True 时不进入与根目录不在同一文件系统（设备号不同）的目录，
+                        如挂载的网络盘，这些目录只列出自身
+    """
+    __slots__ = ('max_depth', 'max_entries', 'time_budget', 'one_filesystem')
+
+    def __init__(self, max_depth=None, max_entries=None, time_budget=None, one_filesystem=False):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.time_budget = time_budget
+        self.one_filesystem = one_filesystem
+
+
+# ======================== 目录遍历 ========================
+SYMLINK_MODES = ('follow', 'show', 'skip')
+
+
+def _entry_is_dir(entry):
+    """判断 DirEntry 是否为目录
+
+    DirEntry.is_dir() 优先使用 scandir 返回的类型信息，
+    只有符号链接或文件系统未提供类型时才会额外调用一次 stat。
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False  # 与 os.path.isdir 一致：出错视为非目录
+
+
+def _link_item(entry, with_stat):
+    """只显示、不跟随的符号链接：(名称, 路径, 大小, mtime_ns, 目标)，大小和时间为链接本身的"""
+    try:
+        target = os.readlink(entry.path)
+    except OSError:
+        target = '?'
+    mtime = None
+    if with_stat:
+        try:
+            mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+        except OSError:
+            pass
+    return entry.name, entry.path, None, mtime, target
+
+
+def list_dir(dir_path, symlinks='follow'):
+    """读取单个目录的内容（仅调用一次 os.scandir）
+
+    参数：
+        dir_path: 目录路径
+        symlinks: 符号链接的处理方式（见 SYMLINK_MODES）：
+            'follow' 与 os.path.isdir 一致，指向目录的链接作为目录展开（循环由 walk_tree 检测）；
+            'show' 列出链接及其目标（作为文件，附带第五项目标路径），不展开；
+            'skip' 不列出链接。
+            判断是否为链接使用读取目录时得到的类型信息，不需要额外的系统调用
+
+    返回：
+        (dirs, files)，均为按名称排序的 (名称, 路径) 列表，隐藏条目已忽略
+
+    异常：
+        OSError: 目录无法读取时抛出（如 PermissionError）
+    """
+    dirs = []
+    files = []
+    follow = symlinks == 'follow'
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith('.'):  # 忽略隐藏文件
+                continue
+            if not follow and entry.is_symlink():
+                if symlinks == 'show':
+                    files.append(_link_item(entry, False))
+                continue
+            if _entry_is_dir(entry):
+                dirs.append((name, entry.path))
+            else:
+                files.append((name, entry.path))
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+
+def list_dir_stat(dir_path, symlinks='follow'):
+    """与 list_dir 相同，但每一项附带大小和修改时间：(名称, 路径, 大小, mtime_ns)
+
+    Windows 上 DirEntry.stat() 直接使用读取目录时得到的信息，无需额外的系统调用；
+    其他平台每个条目需要一次 stat。目录的大小为 None；
+    无法获取时（如失效的符号链接）大小和时间均为 None。
+    """
+    dirs = []
+    files = []
+    follow = symlinks == 'follow'
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith('.'):  # 忽略隐藏文件
+                continue
+            if not follow and entry.is_symlink():
+                if symlinks == 'show':
+                    files.append(_link_item(entry, True))
+                continue
+            try:
+                st = entry.stat()
+                mtime = st.st_mtime_ns
+            except OSError:
+                st = mtime = None
+            if _entry_is_dir(entry):
+                dirs.append((name, entry.path, None, mtime))
+            else:
+                files.append((name, entry.path, st.st_size if st else None, mtime))
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+
+def walk_tree(root_path, stats=None, cancel=None, workers=1, lister=list_dir, limits=None):
+    """以先序遍历目录树，逐个产出 TreeNode（先目录后文件，按名称排序）
+
+    参数：
+        root_path: 根目录路径
+        stats: 可选的 ScanStats，遍历过程中实时更新
+        cancel: 可选的 threading.Event，被设置后在下一个条目处停止
+        workers: 并行读取目录的线程数；大于 1 时会提前在线程池中读取
+                 即将访问的同级子目录，适合网络盘等高延迟文件系统。
+                 也可以是 ReadPool，多个同时进行的遍历共用其中的线程
+        lister: 读取单个目录的函数，签名与返回值同 list_dir；
+                若每一项附带大小和修改时间（见 list_dir_stat），会填入节点的 size/mtime
+        limits: 可选的 ScanLimits。超出深度的目录、以及预算用尽时尚未输出的条目，
+                按所属目录以省略标记节点（见 more_node）代替
+
+    每个目录在读取前 stat 一次，记下 (st_dev, st_ino)：与某个上层目录相同时说明符号链接形成了循环，
+    该目录不再展开，error 为 NotFollowed；启用 limits.one_filesystem 时，
+    设备号与根目录不同的目录不会被读取。
+
+    产出：
+        TreeNode，根目录深度为 0；读取失败的目录其 error 属性为对应异常。
+        无论 workers 取何值，产出顺序都完全相同。
+
+    异常：
+        ScanCancelled: cancel 被设置时抛出
+    """
+    if stats is None:
+        stats = ScanStats()
+    if limits is None:
+        limits = ScanLimits()
+    max_depth = limits.max_depth
+    if limits.max_entries is not None:
+        max_entries = stats.entries + limits.max_entries
+    else:
+        max_entries = None
+    if limits.time_budget is not None:
+        deadline = time.monotonic() + limits.time_budget
+    else:
+        deadline = None
+    device = None
+    if limits.one_filesystem:
+        try:
+            device = os.stat(root_path).st_dev
+        except OSError:
+            pass  # 根目录无法读取，读取时会报告错误
+    read = functools.partial(_read_dir, lister, device)
+    if isinstance(workers, ReadPool) or workers > 1:
+        prefetcher = _Prefetcher(read, workers, max_depth)
+    else:
+        prefetcher = None
+    root = TreeNode(os.path.basename(root_path), root_path, True)
+    # 显式栈：每一项为尚未产出的节点
+    stack = [root]
+    chain = []  # 正在展开的上层目录：(深度, (st_dev, st_ino))
+    ancestors = set()  # chain 中的各项，用于判断循环
+    try:
+        while stack:
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled()
+            if ((max_entries is not None and stats.entries >= max_entries)
+                    or (deadline is not None and time.monotonic() >= deadline)):
+                stats.truncated = True
+                yield from _drain_stack(stack)
+                return
+            node = stack.pop()
+            if node.depth:
+                stats.entries += 1
+            if node.is_dir:
+                try:
+                    if prefetcher is not None:
+                        dirs, files, ident = prefetcher.result(node)
+                    else:
+                        dirs, files, ident = read(node.path)
+                except Exception as e:
+                    node.error = e
+                    yield node
+                    continue
+                while chain and chain[-1][0] >= node.depth:
+                    ancestors.discard(chain.pop()[1])
+                if dirs is None:
+                    node.error = NotFollowed(OTHER_FILESYSTEM)
+                elif ident is not None and ident in ancestors:
+                    node.error = NotFollowed(SYMLINK_LOOP)
+                if node.error is not None:
+                    yield node
+                    continue
+                chain.append((node.depth, ident))
+                ancestors.add(ident)
+                stats.dirs += 1
+                yield node
+
+                items = dirs + files  # 先列出目录，再列出文件
+                last = len(items) - 1
+                depth = node.depth + 1
+                if max_depth is not None and depth > max_depth:
+                    if items:
+                        yield more_node(len(items), depth)
+                    continue
+                n_dirs = len(dirs)
+                # 逆序压栈，保证按顺序弹出
+                for i in range(last, -1, -1):
+                    item = items[i]
+                    child = TreeNode(item[0], item[1], i < n_dirs, depth, i == last)
+                    if len(item) > 2:
+                        child.size = item[2]
+                        child.mtime = item[3]
+                        if len(item) > 4:
+                            child.link = item[4]
+                    stack.append(child)
+                if prefetcher is not None:
+                    prefetcher.submit_next(stack)
+            else:
+                yield node
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+
+
+def _read_dir(lister, device, dir_path):
+    """stat 并读取一个目录，返回 (dirs, files, (st_dev, st_ino))
+
+    device 不为 None 且目录位于其他设备上时不读取，dirs 和 files 为 None；
+    文件系统不提供 inode 号（st_ino 为 0，如 FAT）时标识为 None，无法检测循环。
+    """
+    st = os.stat(dir_path)
+    ident = (st.st_dev, st.st_ino) if st.st_ino else None
+    if device is not None and st.st_dev != device:
+        return None, None, ident
+    dirs, files = lister(dir_path)
+    return dirs, files, ident
+
+
+def _drain_stack(stack):
+    """清空遍历栈，为每个目录中剩余的条目产出一个省略标记
+
+    同一目录的剩余条目在栈中相邻，且越靠近栈顶的目录越深，
+    因此从栈顶开始按深度分组即为正确的先序输出顺序。
+    """
+    while stack:
+        depth = stack[-1].depth
+        count = 0
+        while stack and stack[-1].depth == depth:
+            stack.pop()
+            count += 1
+        yield more_node(count, depth)
+
+
+class ReadPool:
+    """多个遍历共用的读取线程池，作为 walk_tree 的 workers 传入（如同时扫描多个根目录，见 tree_batch）
+
+    线程总数固定为 workers；各遍历仍在自己的线程中按顺序产出节点，只有预取的读取任务进入线程池，
+    线程池中的任务不会等待其他任务，因此共用时不会互相阻塞。用完后调用 close（或用作 with 语句）。
+    """
+
+    def __init__(self, workers):
+        from concurrent.futures import ThreadPoolExecutor
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def close(self):
+        """关闭线程池（已提交的任务仍会完成）"""
+        self.executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Prefetcher:
+    """在线程池中提前读取即将访问的目录
+
+    遍历顺序仍由调用方的栈决定，线程池只负责提前完成 I/O，
+    因此输出顺序与单线程遍历完全一致。预取分两路进行：
+    调用方每读完一个目录就提交栈顶附近的目录；后台任务读完一个目录后，
+    再继续提交它的子目录，使预取能够领先于遍历向深处推进。
+    """
+
+    def __init__(self, lister, workers, max_depth=None):
+        self.lister = lister
+        self.max_depth = max_depth  # 深度超过该值的目录不会被读取，也就无需预取
+        self.shared = isinstance(workers, ReadPool)  # 共用的线程池由创建者关闭
+        if self.shared:
+            self.executor = workers.executor
+            workers = workers.workers
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.pending = {}  # 目录路径 -> Future
+        self.closed = False
+        self.window = workers * 2  # 调用方每次最多向前预取的目录数
+        self.max_pending = workers * 64  # 未消费结果数上限，限制内存占用
+
+    def _submit(self, path, depth):
+        """提交一个目录的读取任务（调用方需持有锁）"""
+        if self.closed or path in self.pending:
+            return
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+        self.pending[path] = self.executor.submit(self._list, path, depth)
+
+    def _list(self, path, depth):
+        """后台任务：读取目录，并在配额内继续预取其子目录"""
+        result = self.lister(path)
+        with self.lock:
+            for item in result[0] or ():
+                if len(self.pending) >= self.max_pending:
+                    break
+                self._submit(item[1], depth + 1)
+        return result
+
+    def submit_next(self, stack):
+        """为栈顶附近尚未提交的目录提交读取任务"""
+        submitted = 0
+        with self.lock:
+            # 目录总是排在文件之前压栈，因此栈顶附近的目录会先被访问
+            for i in range(len(stack) - 1, max(-1, len(stack) - 1 - self.window * 8), -1):
+                if submitted >= self.window:
+                    break
+                node = stack[i]
+                if node.is_dir and node.path not in self.pending:
+                    self._submit(node.path, node.depth)
+                    submitted += 1
+
+    def result(self, node):
+        """取得目录的读取结果（未预取时在当前线程直接读取）"""
+        with self.lock:
+            future = self.pending.pop(node.path, None)
+        if future is None:
+            return self.lister(node.path)
+        return future.result()
+
+    def close(self):
+        """取消尚未开始的任务并关闭线程池（共用的线程池只取消本次遍历的任务）"""
+        with self.lock:
+            self.closed = True
+            for future in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+        if not self.shared:
+            self.executor.shutdown(wait=False)
+
+
+# ======================== 文本渲染 ========================
+def format_error(error):
+    """将目录读取错误格式化为显示文本"""
+    if isinstance(error, PermissionError):
+        return "[Permission Denied]"
+    if isinstance(error, NotFollowed):
+        return f"[{error}]"
+    return f"[Error: {str(error)}]"
+
+
+CONNECTORS = ("├── ", "└── ")
+RENDER_STYLES = ('spacious', 'compact', 'ascii', 'markdown')
+
+# 连接线字符：(中间项, 最后一项, 上层目录未结束时的竖线, 上层目录已结束时的空白)
+BOX_CHARS = ("├── ", "└── ", "│   ", "    ")
+ASCII_CHARS = ("|-- ", "`-- ", "|   ", "    ")
+
+
+class BoxRenderer:
+    """增量渲染器：逐个接收先序节点，返回对应的目录树文本行（不含换行符）
+
+    风格（style）：
+        spacious: 默认风格。根目录下方加一条竖线；子目录中除最后一项外，
+                  每个条目（含其子树）之后追加一行竖线分隔
+        compact: 同样的连接线，但没有竖线分隔行，行数约为 spacious 的一半
+        ascii: 与 compact 相同，只使用 ASCII 字符（|-- 和 `--），适合不支持制表符的终端和文件
+
+    通过 base_depth/base_prefix 可以从树的中间开始渲染，
+    用于在已有文本中局部重绘某个目录的内容（只用于 spacious 风格）。
+    """
+
+    def __init__(self, base_depth=0, base_prefix='', first=True, label=None, style='spacious'):
+        """
+        参数：
+            base_depth: 第一个节点的深度；大于 0 时表示父目录的行已经存在
+            base_prefix: 父目录中子项的前缀
+            first: 第一个节点是否为父目录中的第一项
+            label: 可选的函数 (节点) -> 显示文本，默认为名称（目录后加 /）
+            style: 'spacious'、'compact' 或 'ascii'，见类说明
+        """
+        if style not in ('spacious', 'compact', 'ascii'):
+            raise ValueError(f"unknown style: {style}")
+        self.label = label
+        self.spacious = style == 'spacious'
+        self.chars = ASCII_CHARS if style == 'ascii' else BOX_CHARS
+        # 栈中每一项对应一个尚未结束的祖先节点：(子项前缀, 子树结束后的分隔行)
+        if base_depth:
+            self.stack = [('', None)] * (base_depth - 1) + [(base_prefix, None)]
+        else:
+            self.stack = []
+        self.prev_depth = base_depth - 1 if first else base_depth
+        self.node_index = 0  # 最近一次 feed 的结果中节点自身所在行的下标
+
+    def feed(self, node):
+        """接收下一个节点，返回需要输出的行"""
+        lines = []
+        stack = self.stack
+        depth = node.depth
+
+        # 结束已经遍历完的子树，输出其分隔行
+        while len(stack) > depth:
+            spacer = stack.pop()[1]
+            if spacer is not None:
+                lines.append(spacer)
+
+        name = self.label(node) if self.label is not None else node_label(node)
+        self.node_index = len(lines)
+        tee, elbow, pipe, blank = self.chars
+
+        if depth == 0:
+            # 根目录特殊处理
+            lines.append(name)
+            if self.spacious:
+                lines.append("│")  # 根目录下的竖线
+            child_prefix = ''
+            spacer = None
+        else:
+            prefix = stack[-1][0]
+            is_last = node.is_last
+            vertical = blank if is_last else pipe
+            spacer = None
+            if not self.spacious:
+                connector = elbow if is_last else tee
+            elif depth == 1:
+                # 根目录下的项目：第一项总是使用 ├──
+                is_first = self.prev_depth == 0
+                connector = tee if is_first or not is_last else elbow
+            else:
+                connector = elbow if is_last else tee
+                # 添加分隔线（最后一个项目不添加）
+                if not is_last:
+                    spacer = prefix + vertical
+            lines.append(prefix + connector + name)
+            child_prefix = prefix + vertical
+
+        if node.error is not None:
+            lines.append(child_prefix + pipe + format_error(node.error))
+
+        stack.append((child_prefix, spacer))
+        self.prev_depth = depth
+        return lines
+
+    def finish(self):
+        """节点流结束，返回剩余的分隔行"""
+        lines = []
+        while self.stack:
+            spacer = self.stack.pop()[1]
+            if spacer is not None:
+                lines.append(spacer)
+        return lines
+
+
+def markdown_code(text):
+    """将文本放入 Markdown 行内代码，任何符号都按原样显示，不需要逐个转义"""
+    if '`' not in text:
+        return f"`{text}`"
+    # 含反引号时用更长的一串反引号作为边界
+    fence = '`' * (max(len(run) for run in re.findall('`+', text)) + 1)
+    return f"{fence} {text} {fence}"
+
+
+class MarkdownRenderer:
+    """以 Markdown 嵌套列表输出目录树：每个条目一行 "- `名称`"，每深一层缩进两个空格
+
+    与 BoxRenderer 接口相同（feed/finish/node_index），可直接交给 render_lines；
+    名称放在行内代码中，生成的 .md 文件在任何 Markdown 查看器中都按原样显示为嵌套列表。
+    """
+
+    def __init__(self, label=None):
+        """
+        参数：
+            label: 可选的函数 (节点) -> 显示文本，默认为名称（目录后加 /）
+        """
+        self.label = label
+        self.node_index = 0  # 节点自身总是 feed 结果中的第一行
+
+    def feed(self, node):
+        """接收下一个节点，返回需要输出的行"""
+        name = self.label(node) if self.label is not None else node_label(node)
+        indent = '  ' * node.depth
+        line = f"{indent}- {markdown_code(name)}"
+        if node.error is None:
+            return [line]
+        return [line, f"{indent}  - {markdown_code(format_error(node.error))}"]
+
+    def finish(self):
+        """节点流结束（没有剩余的行）"""
+        return []
+
+
+def make_renderer(style='spacious', label=None):
+    """按风格名称（见 RENDER_STYLES）创建从根目录开始渲染的渲染器"""
+    if style == 'markdown':
+        return MarkdownRenderer(label)
+    return BoxRenderer(label=label, style=style)
+
+
+def node_label(node):
+    """BoxRenderer 默认的显示文本：名称，目录后加 /，只显示的符号链接后加 -> 目标"""
+    if node.is_dir:
+        return f"{node.name}/"
+    if node.link is not None:
+        return f"{node.name} -> {node.link}"
+    return node.name
+
+
+def render_lines(nodes, with_nodes=False, renderer=None):
+    """将先序节点流渲染为目录树文本行（不含换行符）
+
+    参数：
+        nodes: walk_tree 等产出的先序 TreeNode 可迭代对象
+        with_nodes: 为 True 时产出 (行, 节点)，非节点行（竖线、错误提示）的节点为 None
+        renderer: 可选的 BoxRenderer 或 MarkdownRenderer（默认从根目录开始渲染 spacious 风格）
+
+    产出：
+        每一行文本，或 (行, 节点)
+    """
+    if renderer is None:
+        renderer = BoxRenderer()
+    feed = renderer.feed
+    if not with_nodes:
+        for node in nodes:
+            yield from feed(node)
+        yield from renderer.finish()
+        return
+
+    for node in nodes:
+        lines = feed(node)
+        index = renderer.node_index
+        for i, line in enumerate(lines):
+            yield line, node if i == index else None
+    for line in renderer.finish():
+        yield line, None
+
+
+def rebuild_children_lines(old_lines, child_prefix, depth, dirs, files, render_child):
+    """目录内容变化后，复用旧文本重建该目录下的全部行（仅适用于 BoxRenderer 的风格）
+
+    保留下来的子项直接复用旧文本（只调整连接线、竖线和分隔行），
+    只有新增的子项才需要调用 render_child 重新遍历。
+
+    参数：
+        old_lines: 目录行之后属于该目录的旧文本行
+        child_prefix: 该目录中子项的前缀
+        depth: 子项的深度
+        dirs, files: 该目录新的内容，格式同 list_dir 的返回值
+        render_child: 函数 (名称, 路径, 是否目录, 是否最后一项, 是否第一项) -> 新子项的文本行；
+                      只显示的符号链接传入的名称为 "名称 -> 目标"
+
+    返回：
+        新的文本行列表
+    """
+    n = len(child_prefix)
+    spacer = child_prefix + "│   "
+
+    # 按子项行切分旧文本：(名称, 是否目录) -> 该子项的行（含子树和分隔行）
+    blocks = {}
+    current = None
+    for line in old_lines:
+        if line.startswith(child_prefix) and line[n:n + 4] in CONNECTORS:
+            rest = line[n + 4:]
+            is_dir = rest.endswith('/')
+            current = blocks.setdefault((rest[:-1] if is_dir else rest, is_dir), [])
+        if current is not None:
+            current.append(line)
+
+    items = [(item[0], item[1], True) for item in dirs]
+    # 只显示的符号链接以 "名称 -> 目标" 作为文本（见 node_label），按整行文本对应旧行
+    items += [(f"{item[0]} -> {item[4]}" if len(item) > 4 else item[0], item[1], False)
+              for item in files]
+    last = len(items) - 1
+    new_lines = []
+    for i, (name, path, is_dir) in enumerate(items):
+        is_last = i == last
+        block = blocks.get((name, is_dir))
+        if block is None:
+            new_lines.extend(render_child(name, path, is_dir, is_last, i == 0))
+            continue
+
+        # 去掉旧的分隔行（分隔行与子树中的行不同，长度恰好等于前缀加四个字符）
+        if len(block) > 1 and block[-1] == spacer:
+            block.pop()
+        if depth == 1:
+            connector = "├── " if i == 0 or not is_last else "└── "
+        else:
+            connector = "└── " if is_last else "├── "
+        vertical = "    " if is_last else "│   "
+        new_lines.append(child_prefix + connector + block[0][n + 4:])
+        for line in block[1:]:
+            new_lines.append(child_prefix + vertical + line[n + 4:])
+        if depth > 1 and not is_last:
+            new_lines.append(spacer)
+    return new_lines
+
+
+def render_subtree(name, path, is_dir, depth, is_last, is_first, base_prefix, lister=list_dir,
+                   limits=None):
+    """渲染位于树中间的一个条目及其子树（用于局部更新已有文本）
+
+    参数：
+        name, path, is_dir: 条目信息
+        depth: 条目深度
+        is_last, is_first: 是否为父目录中的最后一项/第一项
+        base_prefix: 父目录中子项的前缀
+        lister: 读取单个目录的函数
+        limits: 可选的 ScanLimits，max_depth 按整棵树的深度计算
+
+    返回：
+        文本行列表（含条目之后的分隔行）
+    """
+    renderer = BoxRenderer(depth, base_prefix, is_first)
+    if is_dir:
+        nodes = walk_tree(path, lister=lister, limits=limits)
+        top = next(nodes)
+        # walk_tree 在产出节点之后才根据其深度生成子节点，因此在此修改即可整体平移
+        top.depth = depth
+        top.is_last = is_last
+        nodes = itertools.chain([top], nodes)
+    else:
+        nodes = [TreeNode(name, path, False, depth, is_last)]
+    return list(render_lines(nodes, renderer=renderer))
+
+
+def parse_dir_lines(lines, base_path, base_depth):
+    """从 BoxRenderer 输出的一段文本中找出目录行
+
+    参数：
+        lines: 文本行（某个目录之后属于它的行）
+        base_path: 该目录的路径
+        base_depth: 该目录的深度
+
+    返回：
+        [(行下标, 深度, 路径, 是否最后一项)]
+    """
+    result = []
+    paths = {base_depth: base_path}
+    last_top = -1  # 根目录下最后一个子项所在的行
+    for i, line in enumerate(lines):
+        # 前缀由四个字符一组的竖线/空白组成，之后是连接线
+        pos = 0
+        while line[pos:pos + 4] in ("│   ", "    "):
+            pos += 4
+        connector = line[pos:pos + 4]
+        if connector not in CONNECTORS:
+            continue
+        depth = pos // 4 + 1
+        if depth == 1:
+            last_top = i
+        parent = paths.get(depth - 1)
+        if parent is None or not line.endswith('/'):
+            continue
+        path = os.path.join(parent, line[pos + 4:-1])
+        paths[depth] = path
+        result.append((i, depth, path, connector == "└── "))
+
+    # 根目录下的第一项总是使用 ├──，是否为最后一项只能根据位置判断
+    return [(i, depth, path, is_last or i == last_top)
+            for i, depth, path, is_last in result]
+
+
+def walk_sorted(root_path, stats=None, cancel=None, workers=1, lister=list_dir, limits=None,
+                sizes=False, sort='name', tree=None):
+    """按 sort 排列同一目录中的子项，按先序产出 TreeNode（sizes 为 True 时带有总数）
+
+    参数：
+        root_path: 根目录路径
+        stats, cancel, workers, lister, limits: 见 walk_tree
+        sizes: 是否统计目录的总大小和文件数（见 tree_sizes.walk_sizes）
+        sort: 见 tree_sort.SORT_MODES；'size' 隐含 sizes，其余方式边遍历边排序每个目录的内容。
+              'mtime' 和 'size' 需要附带大小和修改时间的 lister
+        tree: 可选的空 tree_model.CompactTree，保存扫描结果（按遍历时的顺序），
+              之后可用其 order_key 按其他方式重新输出而无需再次扫描
+    """
+    if sizes or sort == 'size':
+        from tree_sizes import walk_sizes
+        return walk_sizes(root_path, stats, cancel, workers, lister, limits, sort, tree)
+    if sort != 'name':
+        from tree_sort import sorted_lister
+        lister = sorted_lister(lister, sort)
+    nodes = walk_tree(root_path, stats, cancel, workers, lister, limits)
+    if tree is not None:
+        tree.order = sort
+        nodes = tree.record(nodes)
+    return nodes
+
+
+def iter_tree_lines(root_path, stats=None, cancel=None, workers=1, lister=list_dir,
+                    with_nodes=False, limits=None, sizes=False, sort='name', find=None, tree=None,
+                    style='spacious'):
+    """边遍历边渲染，逐行产出目录树文本（不含换行符）
+
+    内存占用只与目录深度和单个目录的条目数有关，与整棵树的大小无关。
+
+    参数：
+        root_path: 根目录路径
+        stats, cancel, workers, lister, limits: 见 walk_tree
+        with_nodes: 见 render_lines
+        sizes: 是否在每个条目后标注大小，目录标注总大小和文件数（见 tree_sizes.walk_sizes；
+               需要等遍历结束才能输出，且整棵树保存在内存中）。
+               lister 须附带大小，传入默认的 list_dir 时自动改用 list_dir_stat
+        sort: 同一目录中子项的顺序（见 tree_sort.SORT_MODES），默认 'name' 为先目录后文件按名称排序；
+              'size' 为按总大小从大到小（隐含 sizes），'mtime' 同样需要附带修改时间的 lister
+        find: 只输出名称或路径与之匹配的条目及其上层目录（见 tree_search.filter_nodes；
+              需要等遍历结束才能输出，内存占用与匹配的条目数有关）
+        tree: 见 walk_sorted
+        style: 文本风格，见 RENDER_STYLES
+    """
+    from tree_sort import STAT_SORTS
+    if lister is list_dir and (sizes or sort in STAT_SORTS):
+        lister = list_dir_stat
+    nodes = walk_sorted(root_path, stats, cancel, workers, lister, limits, sizes, sort, tree)
+    label = None
+    if sizes or sort == 'size':
+        from tree_sizes import size_label
+        label = size_label
+    if find:
+        from tree_search import filter_nodes
+        nodes = filter_nodes(nodes, find)
+    return render_lines(nodes, with_nodes, make_renderer(style, label))
+
+
+def render_tree(root_path, stats=None, cancel=None, workers=1, lister=list_dir, limits=None,
+                sizes=False, sort='name', find=None, style='spacious'):
+    """生成完整的目录树文本
+
+    参数：
+        root_path: 根目录路径
+        stats, cancel, workers, lister, limits: 见 walk_tree
+        sizes, sort, find, style: 见 iter_tree_lines
+
+    返回：
+        格式化的目录树字符串
+    """
+    lines = iter_tree_lines(root_path, stats, cancel, workers, lister, limits=limits,
+                            sizes=sizes, sort=sort, find=find, style=style)
+    return ''.join(line + '\n' for line in lines)
@@ -0,0 +1,256 @@
+"""
+目录树比较 - tree_diff.py
+功能：比较同一目录的两次扫描（快照文件或当前目录），只列出新增、删除和修改的条目
+说明：遍历器和快照都按先序输出、同一目录中先目录后文件并按名称排序，
+      因此两侧节点流可以像两个有序列表一样归并比较，耗时与条目数成正比，且无需在内存中建树
+作者：Ryan Joo
+"""
+
+import itertools
+import os
+
+from tree_core import (TreeNode, list_dir_stat, make_renderer, mark_last, node_label,
+                       render_lines, walk_tree)
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+MARKS = {ADDED: '+ ', REMOVED: '- ', MODIFIED: '~ '}
+
+
+class DiffNode(TreeNode):
+    """比较结果中的一个条目
+
+    属性（另见 TreeNode）：
+        status: ADDED/REMOVED/MODIFIED；为 None 时表示只是为了显示层级而列出的上层目录
+        old_size: 修改前的大小（仅 MODIFIED 的文件）
+        count: 新增或删除的目录中包含的条目数（其子项不再逐一列出）
+    """
+    __slots__ = ('status', 'old_size', 'count')
+
+    def __init__(self, name, path, is_dir, depth, status=None, size=None, old_size=None,
+                 count=0):
+        super().__init__(name, path, is_dir, depth, size=size)
+        self.status = status
+        self.old_size = old_size
+        self.count = count
+
+
+class DiffSummary:
+    """比较结果计数（新增、删除的目录中的条目也计算在内）"""
+    __slots__ = ('added', 'removed', 'modified', 'truncated')
+
+    def __init__(self):
+        self.added = 0
+        self.removed = 0
+        self.modified = 0
+        self.truncated = False  # 任一侧因扫描限制而不完整，结果可能包含误报
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+def _checked(nodes, summary):
+    """跳过省略标记，并检查同一目录中的条目按先目录后文件、名称的顺序排列
+
+    异常：
+        ValueError: 节点流不是按名称顺序排列的（如按大小排序的节点流）
+    """
+    last = []  # 每一层最近一个条目的排序键
+    for node in nodes:
+        if node.more:
+            summary.truncated = True
+            continue
+        depth = node.depth
+        key = (not node.is_dir, node.name)
+        if len(last) > depth:
+            if key <= last[depth]:
+                raise ValueError(f"entries are not in name order: {node.path}")
+            del last[depth + 1:]
+            last[depth] = key
+        else:
+            last.append(key)
+        yield node
+
+
+def _skip_subtree(node, nodes, depth):
+    """从 node 开始跳过深度大于 depth 的节点（即上一个目录的子孙），返回 (跳过的数量, 之后的下一项)"""
+    count = 0
+    while node is not None and node.depth > depth:
+        count += 1
+        node = next(nodes, None)
+    return count, node
+
+
+def iter_changes(old_nodes, new_nodes, summary=None):
+    """归并比较两个先序节点流，按先序产出 (上层目录名称, DiffNode)，只包含有变化的条目
+
+    新增或删除的目录连同子树一起跳过，因此比较时两侧总是位于同一串已匹配的目录中：
+    深度不同时较深的一侧所在目录在另一侧已经结束，深度相同时只需比较 (类型, 名称)，
+    每一步都是常数时间。
+    文件的大小或修改时间不同视为修改；目录只比较能否读取。
+    新增或删除的目录作为一项产出，其中的条目数记入 count。
+
+    参数：
+        old_nodes, new_nodes: 按名称顺序排列的先序 TreeNode 流（walk_tree 或 Snapshot.iter_nodes）
+        summary: 可选的 DiffSummary，比较过程中实时更新
+
+    产出：
+        (上层目录名称的元组（不含根目录）, DiffNode)
+    """
+    if summary is None:
+        summary = DiffSummary()
+    old = _checked(old_nodes, summary)
+    new = _checked(new_nodes, summary)
+    a = next(old, None)
+    b = next(new, None)
+    chain = []  # 已匹配的上层目录名称，下标为深度
+    while a is not None or b is not None:
+        if b is None:
+            side = REMOVED
+        elif a is None:
+            side = ADDED
+        elif a.depth != b.depth:
+            side = REMOVED if a.depth > b.depth else ADDED
+        else:
+            key_a = (not a.is_dir, a.name)
+            key_b = (not b.is_dir, b.name)
+            side = REMOVED if key_a < key_b else ADDED if key_b < key_a else None
+
+        if side is REMOVED:
+            node = a
+            count, a = _skip_subtree(next(old, None), old, node.depth)
+            summary.removed += 1 + count
+        elif side is ADDED:
+            node = b
+            count, b = _skip_subtree(next(new, None), new, node.depth)
+            summary.added += 1 + count
+        else:
+            node = b
+            before = a
+            a = next(old, None)
+            b = next(new, None)
+            if node.is_dir:
+                del chain[node.depth:]
+                chain.append(node.name)
+            if (before.error is None) != (node.error is None):
+                # 一侧无法读取：其子项无从比较，跳过另一侧的子树
+                if before.error is None:
+                    a = _skip_subtree(a, old, before.depth)[1]
+                else:
+                    b = _skip_subtree(b, new, node.depth)[1]
+                changed = DiffNode(node.name, node.path, True, node.depth, MODIFIED)
+                changed.error = node.error
+            elif node.is_dir:
+                continue
+            elif before.size != node.size or (before.mtime is not None and node.mtime is not None
+                                              and before.mtime != node.mtime):
+                changed = DiffNode(node.name, node.path, False, node.depth, MODIFIED,
+                                   node.size, before.size)
+            else:
+                continue
+            summary.modified += 1
+            yield tuple(chain[1:node.depth]), changed
+            continue
+
+        yield tuple(chain[1:node.depth]), DiffNode(node.name, node.path, node.is_dir,
+                                                   node.depth, side, node.size, count=count)
+
+
+def diff_trees(old_nodes, new_nodes, summary=None):
+    """比较两个先序节点流，产出可直接交给 render_lines 的 DiffNode 流
+
+    为了显示层级，有变化的条目之前会补上尚未列出的上层目录（status 为 None）。
+    结果需要确定每一项是否为所在目录中的最后一项，因此先收集全部变化再输出；
+    内存占用只与变化的条目数有关。
+
+    参数：
+        old_nodes, new_nodes, summary: 见 iter_changes
+    """
+    if summary is None:
+        summary = DiffSummary()
+    new_nodes = iter(new_nodes)
+    root = next(new_nodes, None)
+    if root is None:
+        return
+    new_nodes = itertools.chain((root,), new_nodes)
+    result = [DiffNode(root.name, root.path, True, 0)]
+    shown = []  # 已列出的上层目录名称
+    for parents, node in iter_changes(old_nodes, new_nodes, summary):
+        if not node.depth:
+            result[0] = node  # 根目录本身发生了变化（能否读取）
+            continue
+        common = 0
+        while common < len(shown) and common < len(parents) and shown[common] == parents[common]:
+            common += 1
+        del shown[common:]
+        for depth in range(common + 1, node.depth):
+            path = node.path
+            for _ in range(node.depth - depth):
+                path = os.path.dirname(path)
+            result.append(DiffNode(parents[depth - 1], path, True, depth))
+            shown.append(parents[depth - 1])
+        result.append(node)
+
+    yield from mark_last(result)
+
+
+def diff_label(node):
+    """BoxRenderer 的 label：名称前标注 +、-、~，并附上条目数或大小变化"""
+    name = node_label(node)
+    status = node.status
+    if status is None:
+        return name
+    label = MARKS[status] + name
+    if node.count:
+        label += f" ({node.count} entries)" if node.count > 1 else " (1 entry)"
+    elif (status == MODIFIED and node.size is not None and node.old_size is not None
+          and node.size != node.old_size):
+        label += f" ({node.old_size:,} → {node.size:,} bytes)"
+    return label
+
+
+def open_nodes(source, stats=None, cancel=None, workers=1, lister=list_dir_stat):
+    """打开比较的一侧，返回 (先序节点流, 需要关闭的对象或 None)
+
+    参数：
+        source: 快照文件（见 tree_snapshot）或目录；目录会重新扫描，
+                lister 须附带大小和修改时间（见 tree_core.list_dir_stat）
+        stats, cancel, workers: 见 tree_core.walk_tree
+    """
+    if os.path.isdir(source):
+        return walk_tree(source, stats, cancel, workers, lister), None
+    from tree_snapshot import Snapshot  # 只比较目录时无需加载快照模块
+    snapshot = Snapshot(source)
+    return snapshot.iter_nodes(), snapshot
+
+
+def iter_diff_lines(old, new, stats=None, cancel=None, workers=1, lister=list_dir_stat,
+                    summary=None, with_nodes=False, style='spacious'):
+    """比较两个快照文件或目录，逐行产出带有 +、-、~ 标记的目录树文本
+
+    参数：
+        old, new: 快照文件或目录，见 open_nodes
+        stats, cancel, workers, lister: 扫描目录时使用，见 tree_core.walk_tree；
+            两侧都是目录且需要不同的 lister 时（如各自的忽略规则），lister 可为 (旧, 新) 二元组
+        summary: 可选的 DiffSummary，结束后包含各类变化的数量
+        with_nodes: 见 tree_core.render_lines
+        style: 文本风格，见 tree_core.RENDER_STYLES
+
+    异常：
+        ScanCancelled: cancel 被设置时抛出
+        OSError, ValueError: 快照文件无法读取或格式不正确时抛出
+    """
+    old_lister, new_lister = lister if isinstance(lister, tuple) else (lister, lister)
+    closers = []
+    try:
+        old_nodes, closer = open_nodes(old, stats, cancel, workers, old_lister)
+        closers.append(closer)
+        new_nodes, closer = open_nodes(new, stats, cancel, workers, new_lister)
+        closers.append(closer)
+        nodes = diff_trees(old_nodes, new_nodes, summary)
+        yield from render_lines(nodes, with_nodes, make_renderer(style, diff_label))
+    finally:
+        for closer in closers:
+            if closer is not None:
+                closer.close()
@@ -0,0 +1,288 @@
+"""
+目录树导出 - tree_export.py
+功能：将遍历结果直接流式写入文件或文本流，不经过界面控件
+说明：支持目录树文本、Markdown、JSON Lines、嵌套 JSON 和二进制快照（见 tree_snapshot），
+      以及两次扫描的比较结果（见 tree_diff）和多个根目录的合并结果（见 tree_batch）；
+      逐批写出，内存占用与目录树大小无关；导出到文件时先写入临时文件，
+      完成后再替换目标文件，取消或出错时不会留下不完整的文件
+作者：Ryan Joo
+"""
+
+import os
+import shutil
+import tempfile
+from json.encoder import encode_basestring_ascii as _json_str
+
+from tree_core import iter_tree_lines, list_dir, list_dir_stat, walk_sorted
+
+FORMATS = ('text', 'md', 'jsonl', 'json', 'snapshot')
+STAT_FORMATS = ('jsonl', 'json', 'snapshot')  # 附带大小和修改时间的格式
+BINARY_FORMATS = ('snapshot',)  # 只能写入文件的格式
+BATCH_FORMATS = ('text', 'md', 'jsonl', 'json')  # 可合并多个根目录的格式（快照只能保存一个根目录）
+WRITE_LINES = 512  # 每次写出的行数，减少小块写入的次数
+FILE_BUFFER = 1024 * 1024  # 导出文件的写缓冲区大小（字节）
+
+
+def write_tree(out, root_path, fmt='text', stats=None, cancel=None, workers=1,
+               lister=list_dir, limits=None, sizes=False, sort='name', find=None, style='spacious'):
+    """边遍历边将目录树写入文本流
+
+    参数：
+        out: 文本输出流
+        root_path: 根目录路径
+        fmt: 输出格式，见 FORMATS（md 为包在代码块中的文本，style 为 'markdown' 时为嵌套列表；
+             不支持 BINARY_FORMATS）
+        stats, cancel, workers, lister, limits: 见 tree_core.walk_tree。
+            STAT_FORMATS 需要附带大小的 lister；传入默认的 list_dir 时自动改用 list_dir_stat
+        sizes, sort, find: 见 tree_core.iter_tree_lines；STAT_FORMATS 中目录的 size 为总大小，
+            并附带文件数 files
+        style: text 和 md 的文本风格，见 tree_core.RENDER_STYLES
+
+    异常：
+        ScanCancelled: cancel 被设置时抛出
+    """
+    if fmt not in FORMATS or fmt in BINARY_FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    if fmt in STAT_FORMATS:
+        nodes = _stat_nodes(root_path, stats, cancel, workers, lister, limits, sizes, sort,
+                            find)
+        if fmt == 'jsonl':
+            lines = map(_jsonl_record, nodes)
+        else:
+            lines = _json_tree(nodes)
+    else:
+        lines = iter_tree_lines(root_path, stats, cancel, workers, lister, limits=limits,
+                                sizes=sizes, sort=sort, find=find, style=style)
+    write_lines(out, lines, _fenced(fmt, style))
+
+
+def write_lines(out, lines, md=False):
+    """将文本行逐批写入文本流；md 为 True 时包在 Markdown 代码块中"""
+    if md:
+        out.write('```text\n')
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= WRITE_LINES:
+            out.write('\n'.join(batch) + '\n')
+            batch = []
+    if batch:
+        out.write('\n'.join(batch) + '\n')
+    if md:
+        out.write('```\n')
+
+
+def _fenced(fmt, style):
+    """md 格式是否需要把文本包在代码块中（Markdown 列表本身就是 Markdown，不需要）"""
+    return fmt == 'md' and style != 'markdown'
+
+
+def _stat_nodes(root_path, stats, cancel, workers, lister, limits, sizes, sort, find=None):
+    """附带大小和修改时间的节点流"""
+    if lister is list_dir:
+        lister = list_dir_stat
+    nodes = walk_sorted(root_path, stats, cancel, workers, lister, limits, sizes, sort)
+    if find:
+        from tree_search import filter_nodes
+        nodes = filter_nodes(nodes, find)
+    return _stat_root(nodes)
+
+
+def _stat_root(nodes):
+    """补上根目录的修改时间（lister 只提供子条目的信息）"""
+    for node in nodes:
+        if not node.depth:
+            try:
+                node.mtime = os.stat(node.path).st_mtime_ns
+            except OSError:
+                pass
+        yield node
+        break
+    yield from nodes
+
+
+def _json_fields(node):
+    """节点的 JSON 字段（不含花括号）；名称和路径中无法解码的字节以 \\udcXX 转义保留"""
+    if node.more:
+        fields = f'"type":"more","depth":{node.depth},"count":{node.more}'
+        if node.files is not None:
+            fields += f',"size":{node.size},"files":{node.files}'
+        return fields
+    kind = 'dir' if node.is_dir else 'file'
+    size = 'null' if node.size is None else node.size
+    mtime = 'null' if node.mtime is None else repr(node.mtime / 1e9)
+    fields = (f'"name":{_json_str(node.name)},"path":{_json_str(node.path)},'
+              f'"type":"{kind}","depth":{node.depth},"size":{size},"mtime":{mtime}')
+    if node.files is not None:
+        fields += f',"files":{node.files}'
+    if node.link is not None:
+        fields += f',"link":{_json_str(node.link)}'
+    if node.error is not None:
+        fields += f',"error":{_json_str(str(node.error))}'
+    return fields
+
+
+def _jsonl_record(node):
+    """JSON Lines：每个条目一行"""
+    return '{' + _json_fields(node) + '}'
+
+
+def _json_tree(nodes):
+    """嵌套 JSON：目录的子条目位于 children 数组中，逐行产出，不在内存中构建整棵树
+
+    每个条目占一行，目录的子条目数组在其最后一个子孙之后闭合。
+    """
+    open_dirs = []  # 尚未闭合的目录深度
+    first = True  # 下一个条目是否为所在数组的第一项
+    for node in nodes:
+        closing = ''
+        while open_dirs and open_dirs[-1] >= node.depth:
+            open_dirs.pop()
+            closing += ']}'
+        prefix = closing if first and not closing else closing + ','
+        if node.is_dir and not node.more:
+            yield prefix + '{' + _json_fields(node) + ',"children":['
+            open_dirs.append(node.depth)
+            first = True
+        else:
+            yield prefix + '{' + _json_fields(node) + '}'
+            first = False
+    if open_dirs:
+        yield ']}' * len(open_dirs)
+
+
+def export_tree(file_path, root_path, fmt='text', stats=None, cancel=None, workers=1,
+                lister=list_dir, limits=None, sizes=False, sort='name', find=None, style='spacious'):
+    """边遍历边将目录树写入文件（UTF-8）
+
+    参数：
+        file_path: 目标文件路径
+        其余参数见 write_tree
+
+    异常：
+        ScanCancelled: cancel 被设置时抛出（目标文件保持不变）
+        OSError: 文件无法写入时抛出
+    """
+    if fmt == 'snapshot':
+        from tree_snapshot import write_snapshot
+        # 快照始终按名称排序，以便用 tree_diff 归并比较
+        nodes = _stat_nodes(root_path, stats, cancel, workers, lister, limits, sizes, 'name',
+                            find)
+        write_snapshot(file_path, root_path, nodes)
+        return
+    _write_file(file_path, write_tree, root_path, fmt, stats, cancel, workers, lister, limits,
+                sizes, sort, find, style)
+
+
+def write_batch(out, batch, fmt='text', listers=None, limits=None, sizes=False, sort='name',
+                find=None, style='spacious'):
+    """同时扫描 batch 中的各根目录，按根目录的顺序将结果合并写入文本流
+
+    参数：
+        out: 文本输出流
+        batch: 尚未运行的 tree_batch.BatchScan，决定根目录、并发数、共用的读取线程和取消事件，
+               各根目录的进度写入其 stats
+        fmt: 输出格式，见 BATCH_FORMATS：text 中每个根目录之前有一行 ==> 路径 <==，之间空一行；
+             md 中每个根目录为一个标题和代码块；jsonl 依次写出各根目录的记录（根目录的 depth 为 0）；
+             json 为各目录树组成的数组
+        listers: 与根目录对应的读取函数列表（如各自的忽略规则），默认均为 list_dir
+        limits, sizes, sort, find, style: 见 write_tree，对每个根目录分别生效
+
+    各根目录先写入自己的临时文件，再按顺序拷贝到 out，先完成的根目录无需等待之后的根目录，
+    也不在内存中保留结果。任何一个根目录出错时取消其余根目录并抛出该异常。
+
+    异常：
+        ScanCancelled: batch.cancel 被设置时抛出
+    """
+    if fmt not in BATCH_FORMATS:
+        raise ValueError(f"unsupported format for several folders: {fmt}")
+    if listers is None:
+        listers = [list_dir] * len(batch.roots)
+    part_fmt = 'text' if fmt == 'md' else fmt
+    fenced = _fenced(fmt, style)
+
+    def write_part(index, root_path, stats, cancel, workers):
+        part = tempfile.TemporaryFile('w+', encoding='utf-8', errors='surrogateescape')
+        try:
+            write_tree(part, root_path, part_fmt, stats, cancel, workers, listers[index], limits,
+                       sizes, sort, find, style)
+        except BaseException:
+            part.close()
+            raise
+        return part
+
+    futures = batch.run(write_part)
+    if fmt == 'json':
+        out.write('[\n')
+    try:
+        for index, future in enumerate(futures):
+            with future.result() as part:
+                blank = '\n' if index else ''  # 根目录之间的空行
+                if fmt == 'text':
+                    out.write(f"{blank}==> {batch.roots[index]} <==\n")
+                elif fmt == 'md':
+                    out.write(f"{blank}## {batch.roots[index]}\n\n")
+                    if fenced:
+                        out.write('```text\n')
+                elif fmt == 'json' and index:
+                    out.write(',')
+                part.seek(0)
+                shutil.copyfileobj(part, out)
+                if fenced:
+                    out.write('```\n')
+    except BaseException:
+        batch.cancel.set()
+        for future in futures:  # 关闭其余已完成的根目录的临时文件
+            try:
+                future.result().close()
+            except BaseException:
+                pass
+        raise
+    if fmt == 'json':
+        out.write(']\n')
+
+
+def export_batch(file_path, batch, fmt='text', listers=None, limits=None, sizes=False,
+                 sort='name', find=None, style='spacious'):
+    """将多个根目录的合并结果写入文件（UTF-8），参数见 write_batch"""
+    _write_file(file_path, write_batch, batch, fmt, listers, limits, sizes, sort, find, style)
+
+
+def write_diff(out, old, new, fmt='text', stats=None, cancel=None, workers=1,
+               lister=list_dir_stat, summary=None, style='spacious'):
+    """比较两个快照文件或目录（见 tree_diff），将带有 +、-、~ 标记的目录树写入文本流
+
+    参数：
+        out: 文本输出流
+        old, new: 快照文件或目录
+        fmt: 'text' 或 'md'
+        stats, cancel, workers, lister, summary, style: 见 tree_diff.iter_diff_lines
+    """
+    from tree_diff import iter_diff_lines
+    if fmt not in ('text', 'md'):
+        raise ValueError(f"unsupported format for a diff: {fmt}")
+    lines = iter_diff_lines(old, new, stats, cancel, workers, lister, summary, style=style)
+    write_lines(out, lines, _fenced(fmt, style))
+
+
+def export_diff(file_path, old, new, fmt='text', stats=None, cancel=None, workers=1,
+                lister=list_dir_stat, summary=None, style='spacious'):
+    """将比较结果写入文件（UTF-8），参数见 write_diff"""
+    _write_file(file_path, write_diff, old, new, fmt, stats, cancel, workers, lister, summary,
+                style)
+
+
+def _write_file(file_path, write, *args):
+    """调用 write(文本流, *args) 写入临时文件，完成后替换目标文件；出错或取消时删除临时文件"""
+    tmp_path = f"{file_path}.part"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape',
+                  buffering=FILE_BUFFER) as f:
+            write(f, *args)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
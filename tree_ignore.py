@@ -0,0 +1,340 @@
+"""
+忽略规则 - tree_ignore.py
+功能：按 .gitignore 语法过滤目录树条目，支持各级目录中的 .gitignore 文件和用户指定的模式
+说明：每组规则只编译一次，字面名称、*后缀和字面路径通过字典查找，其余规则合并为少数几个正则表达式；
+      过滤在读取目录时进行，被忽略的目录不会被继续读取
+作者：Ryan Joo
+"""
+
+import os
+import re
+import threading
+
+from tree_core import list_dir
+
+GITIGNORE = '.gitignore'
+
+# 常见的构建输出和依赖目录，可作为用户模式的起点
+COMMON_PATTERNS = (
+    'node_modules/',
+    '__pycache__/',
+    '*.pyc',
+    'venv/',
+    'build/',
+    'dist/',
+    'target/',
+)
+
+_GLOB_CHARS = frozenset('*?[\\')
+
+
+def _translate(pattern):
+    """将 .gitignore 模式（已去掉开头的 ! 和首尾的 /）转换为正则表达式"""
+    res = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            # 只有独占一段路径的 ** 才匹配多级目录，其他连续的 * 等同于单个 *
+            if j - i == 2 and (i == 0 or pattern[i - 1] == '/'):
+                if j == n:
+                    res.append('.*')  # abc/**：目录下的所有内容
+                    i = j
+                    continue
+                if pattern[j] == '/':
+                    res.append('(?:.*/)?')  # **/abc、a/**/b：零级或多级目录
+                    i = j + 1
+                    continue
+            res.append('[^/]*')
+            i = j
+        elif c == '?':
+            res.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', '^', ']') else i + 1)
+            if j < 0:
+                res.append('\\[')  # 没有闭合的 [ 按字面匹配
+                i += 1
+                continue
+            stuff = pattern[i + 1:j]
+            negate = stuff[:1] in ('!', '^')
+            if negate:
+                stuff = stuff[1:]
+            stuff = re.sub(r'([\\&~|\[])', r'\\\1', stuff)
+            res.append(('[^/' if negate else '[') + stuff + ']')
+            i = j + 1
+        elif c == '\\' and i + 1 < n:
+            res.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            res.append(re.escape(c))
+            i += 1
+    return ''.join(res)
+
+
+def parse_pattern(line):
+    """解析一行 .gitignore 规则
+
+    返回：
+        (模式, 是否取反, 是否只匹配目录, 是否相对于所在目录)；空行或注释返回 None
+    """
+    line = line.rstrip('\r\n')
+    # 末尾空格除非以反斜杠转义，否则忽略
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # 开头或中间含有 / 的模式相对于 .gitignore 所在目录，否则可匹配任意层级
+    anchored = '/' in line
+    return line.lstrip('/'), negate, dir_only, anchored
+
+
+class IgnoreMatcher:
+    """一组按 .gitignore 语法编译的规则（如一个 .gitignore 文件）
+
+    与 git 相同，后出现的规则优先，以 ! 开头的规则重新包含之前被忽略的条目。
+    常见的规则形式（字面名称、*后缀、字面路径）通过字典查找，与规则数量无关；
+    其余规则按匹配对象分成三组，每组合并为一个正则表达式。
+    """
+
+    def __init__(self, lines):
+        """
+        参数：
+            lines: 规则文本行（可迭代对象）
+        """
+        self.negate = []  # 规则序号 -> 是否取反
+        # 以下字典的值均为 [(序号, 是否只匹配目录)]
+        self.names = {}  # 字面名称，如 node_modules
+        self.tails = {}  # 后缀长度 -> {后缀: ...}，来自 *.pyc、*~ 等 * 加字面后缀的规则
+        self.paths = {}  # 相对路径，来自 /build、docs/api 等不含通配符的路径规则
+        # 正则规则，每组分为 [所有条目, 仅目录] 两份
+        name_rules = [[], []]  # 不含 / 的通配规则，匹配名称
+        path_rules = [[], []]  # 含 / 的通配规则，匹配相对路径
+        deep_rules = [[], []]  # 以 **/ 开头的路径规则（已去掉 **/），匹配相对路径的任意后段
+        for line in lines:
+            parsed = parse_pattern(line)
+            if parsed is None:
+                continue
+            pattern, negate, dir_only, anchored = parsed
+            index = len(self.negate)
+            self.negate.append(negate)
+            rule = (index, dir_only)
+            if anchored and pattern.startswith('**/'):
+                pattern = pattern[3:]
+                anchored = '/' in pattern
+                if anchored:
+                    deep_rules[dir_only].append((index, _translate(pattern)))
+                    continue
+            if _GLOB_CHARS.isdisjoint(pattern):
+                (self.paths if anchored else self.names).setdefault(pattern, []).append(rule)
+            elif (not anchored and pattern.startswith('*')
+                  and _GLOB_CHARS.isdisjoint(pattern[1:]) and len(pattern) > 1):
+                tail = pattern[1:]
+                self.tails.setdefault(len(tail), {}).setdefault(tail, []).append(rule)
+            else:
+                rules = path_rules if anchored else name_rules
+                rules[dir_only].append((index, _translate(pattern)))
+        self._name_re = self._compile_pair(name_rules)
+        self._path_re = self._compile_pair(path_rules)
+        self._deep_re = self._compile_pair(deep_rules)
+
+    def __len__(self):
+        return len(self.negate)
+
+    @classmethod
+    def _compile_pair(cls, rules):
+        """编译 [文件可用的正则, 目录可用的正则]"""
+        return [cls._compile(rules[0]), cls._compile(rules[0] + rules[1])]
+
+    @staticmethod
+    def _compile(rules):
+        """将多条规则合并为一个正则表达式，返回 (正则, 分组号 -> 规则序号)
+
+        分支按规则序号从大到小排列，正则引擎采用第一个匹配的分支，
+        因此 lastindex 对应的就是最后出现的匹配规则。
+        分组放在每个分支的末尾而不是包住整个分支：以字面字符开头的分支
+        在首字符不符时可被正则引擎直接跳过，规则很多时快数百倍。
+        """
+        if not rules:
+            return None
+        rules = sorted(rules, reverse=True)
+        regex = re.compile('|'.join(f'(?:{body})()' for _, body in rules), re.DOTALL)
+        return regex, [None] + [index for index, _ in rules]
+
+    @staticmethod
+    def _lookup(rules, is_dir, best):
+        """在字典查找到的规则中取序号最大且适用的一条"""
+        for index, dir_only in rules:
+            if index > best and (is_dir or not dir_only):
+                best = index
+        return best
+
+    def match(self, rel_path, name, is_dir):
+        """判断条目是否被忽略
+
+        参数：
+            rel_path: 条目相对于规则所在目录的路径（以 / 分隔）
+            name: 条目名称
+            is_dir: 是否为目录
+
+        返回：
+            True 表示忽略，False 表示被 ! 规则重新包含，None 表示没有规则匹配
+        """
+        best = -1
+        lookup = self._lookup
+        if name in self.names:
+            best = lookup(self.names[name], is_dir, best)
+        if rel_path in self.paths:
+            best = lookup(self.paths[rel_path], is_dir, best)
+        for length, tails in self.tails.items():
+            tail = name[-length:]
+            if tail in tails and len(name) >= length:
+                best = lookup(tails[tail], is_dir, best)
+
+        compiled = self._name_re[is_dir]
+        if compiled is not None:
+            m = compiled[0].fullmatch(name)
+            if m and compiled[1][m.lastindex] > best:
+                best = compiled[1][m.lastindex]
+        compiled = self._path_re[is_dir]
+        if compiled is not None:
+            m = compiled[0].fullmatch(rel_path)
+            if m and compiled[1][m.lastindex] > best:
+                best = compiled[1][m.lastindex]
+        compiled = self._deep_re[is_dir]
+        if compiled is not None:
+            # **/ 可匹配零级或多级目录：依次从每一级目录开始尝试
+            pos = 0
+            while pos >= 0:
+                m = compiled[0].fullmatch(rel_path, pos)
+                if m and compiled[1][m.lastindex] > best:
+                    best = compiled[1][m.lastindex]
+                pos = rel_path.find('/', pos) + 1 or -1
+
+        if best < 0:
+            return None
+        return not self.negate[best]
+
+
+def _read_gitignore(path):
+    """读取 .gitignore 文件，不存在或无法读取时返回 None"""
+    try:
+        with open(path, encoding='utf-8', errors='surrogateescape') as f:
+            return IgnoreMatcher(f)
+    except OSError:
+        return None
+
+
+class IgnoreFilter:
+    """包装目录读取函数，按忽略规则过滤其结果
+
+    优先级与 git 相同：用户模式最高，其次是较深目录的 .gitignore，最后是较浅目录的。
+    只读取扫描根目录及其下的 .gitignore（不向上查找仓库根目录，也不读取 .git/info/exclude）。
+    被忽略的目录不会出现在结果中，因此遍历、预取和监视都不会再读取它们。
+
+    用法：
+        ignore = IgnoreFilter(root, ['node_modules/', '*.log'])
+        walk_tree(root, lister=ignore.list_dir)
+    """
+
+    def __init__(self, root_path, patterns=(), use_gitignore=True, lister=list_dir):
+        """
+        参数：
+            root_path: 扫描根目录，用户模式中的路径相对于它
+            patterns: 用户指定的 .gitignore 语法模式
+            use_gitignore: 是否读取各级目录中的 .gitignore 文件
+            lister: 被包装的目录读取函数
+        """
+        self.root = os.path.normpath(root_path)
+        self._root_prefix = self.root if self.root.endswith(os.sep) else self.root + os.sep
+        self.user = IgnoreMatcher(patterns)
+        self.use_gitignore = use_gitignore
+        self.lister = lister
+        self._gitignores = {}  # 目录 -> (mtime_ns, IgnoreMatcher)，只记录含 .gitignore 的目录
+        self._lock = threading.Lock()
+
+    def _rel_dir(self, key):
+        """目录相对于根目录的路径（以 / 分隔，根目录为空字符串）"""
+        if key == self.root or not key.startswith(self._root_prefix):
+            return ''
+        rel = key[len(self._root_prefix):]
+        return rel.replace(os.sep, '/') if os.sep != '/' else rel
+
+    def _load_gitignore(self, key):
+        """读取目录中的 .gitignore，文件未变化时沿用已编译的规则"""
+        path = os.path.join(key, GITIGNORE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._gitignores.pop(key, None)
+            return
+        with self._lock:
+            cached = self._gitignores.get(key)
+        if cached is not None and cached[0] == mtime:
+            return
+        matcher = _read_gitignore(path)
+        with self._lock:
+            if matcher:
+                self._gitignores[key] = (mtime, matcher)
+            else:
+                self._gitignores.pop(key, None)
+
+    def _chain(self, key):
+        """按优先级返回适用于该目录内容的规则：[(规则所在目录的相对路径, IgnoreMatcher)]"""
+        chain = []
+        if self.user:
+            chain.append(('', self.user))
+        if self.use_gitignore:
+            with self._lock:
+                gitignores = self._gitignores
+                while True:
+                    entry = gitignores.get(key)
+                    if entry is not None:
+                        chain.append((self._rel_dir(key), entry[1]))
+                    if key == self.root or not key.startswith(self._root_prefix):
+                        break
+                    key = os.path.dirname(key)
+        return chain
+
+    def is_ignored(self, chain, rel_dir, name, is_dir):
+        """按规则链判断目录 rel_dir 中的条目是否被忽略"""
+        rel_path = f"{rel_dir}/{name}" if rel_dir else name
+        for base, matcher in chain:
+            if base:
+                sub = rel_path[len(base) + 1:]
+            else:
+                sub = rel_path
+            result = matcher.match(sub, name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def list_dir(self, dir_path):
+        """与 tree_core.list_dir 相同，但不含被忽略的条目"""
+        dirs, files = self.lister(dir_path)
+        key = os.path.normpath(dir_path)
+        if self.use_gitignore:
+            self._load_gitignore(key)
+        chain = self._chain(key)
+        if not chain:
+            return dirs, files
+        rel_dir = self._rel_dir(key)
+        is_ignored = self.is_ignored
+        dirs = [item for item in dirs if not is_ignored(chain, rel_dir, item[0], True)]
+        files = [item for item in files if not is_ignored(chain, rel_dir, item[0], False)]
+        return dirs, files
@@ -0,0 +1,149 @@
+"""
+目录列表缓存 - tree_listing.py
+功能：按需浏览目录树时使用的读取函数包装：最近读取的目录列表保存在 LRU 缓存中，
+      并可在后台线程中提前读取用户接下来可能展开的目录
+说明：预取请求总是针对“当前位置”（如视口中尚未读取的目录）：新的请求会取消尚未开始的旧请求，
+      因此快速滚动时线程池不会被早已离开视口的目录占满；
+      正在预取的目录被需要时等待其结果，而不是再读取一次
+作者：Ryan Joo
+"""
+
+import threading
+from collections import OrderedDict
+
+LRU_DIRS = 4096  # 缓存中最多保存的目录数
+PREFETCH_WORKERS = 4  # 预取线程数
+PREFETCH_MAX = 64  # 每次最多提交的预取目录数
+
+
+class ListingCache:
+    """带 LRU 缓存和后台预取的读取函数，list_dir 的签名与返回值同被包装的 lister
+
+    用法：
+        cache = ListingCache(list_dir)
+        cache.prefetch([path1, path2])  # 后台读取
+        dirs, files = cache.list_dir(path1)  # 已预取时直接返回
+        cache.close()
+
+    属性：
+        hits: list_dir 直接从缓存（或正在进行的预取）取得结果的次数
+        misses: list_dir 在调用线程中读取的次数
+
+    读取出错的目录不会被缓存，需要时由 list_dir 重新读取并抛出异常。
+    """
+
+    def __init__(self, lister, max_dirs=LRU_DIRS, workers=PREFETCH_WORKERS):
+        self.lister = lister
+        self.max_dirs = max_dirs
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()  # 路径 -> (dirs, files)，最近使用的在最后
+        self._pending = {}  # 正在预取的路径 -> (标记, Future)
+        self._generations = {}  # 路径 -> 被 invalidate 的次数，用于丢弃失效前开始的读取结果
+        self._lock = threading.Lock()
+        self._executor = None  # 第一次预取时创建
+        self._closed = False
+
+    def list_dir(self, dir_path):
+        """读取目录：已缓存时直接返回，正在预取时等待其结果，否则在当前线程中读取
+
+        等待或读取期间目录被 invalidate 时，得到的结果可能早于这次变化，丢弃后重新读取。
+        """
+        with self._lock:
+            result = self._lru.get(dir_path)
+            if result is not None:
+                self._lru.move_to_end(dir_path)
+                self.hits += 1
+                return result
+            pending = self._pending.get(dir_path)
+            generation = self._generations.get(dir_path, 0)
+        if pending is not None:
+            try:
+                result = pending[1].result()
+            except Exception:  # 已取消
+                result = None
+            if result is not None:
+                with self._lock:
+                    if self._generations.get(dir_path, 0) == generation:
+                        self.hits += 1
+                        return result
+                    generation = self._generations.get(dir_path, 0)
+        while True:
+            with self._lock:
+                self.misses += 1
+            result = self.lister(dir_path)
+            with self._lock:
+                current = self._generations.get(dir_path, 0)
+                if current == generation:
+                    self._store(dir_path, result)
+                    return result
+            generation = current
+
+    def prefetch(self, paths):
+        """在后台读取 paths 中尚未缓存的目录（按顺序提交，最多 PREFETCH_MAX 个）
+
+        不在 paths 中、尚未开始的旧预取会被取消。
+        """
+        paths = list(paths)[:PREFETCH_MAX]
+        wanted = set(paths)
+        with self._lock:
+            if self._closed:
+                return
+            for path, (token, future) in list(self._pending.items()):
+                if path not in wanted and future.cancel():
+                    del self._pending[path]
+            for path in paths:
+                if path in self._lru or path in self._pending:
+                    continue
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+                token = object()
+                self._pending[path] = (token, self._executor.submit(self._fetch, path, token))
+
+    def _fetch(self, dir_path, token):
+        """后台任务：读取一个目录并放入缓存（期间被 invalidate 或重新提交时不放入）"""
+        try:
+            result = self.lister(dir_path)
+        except Exception:
+            result = None  # 需要时由 list_dir 重新读取并报告错误
+        with self._lock:
+            pending = self._pending.get(dir_path)
+            if pending is not None and pending[0] is token:
+                del self._pending[dir_path]
+                if result is not None:
+                    self._store(dir_path, result)
+        return result
+
+    def _store(self, dir_path, result):
+        """放入缓存，超出容量时淘汰最久未使用的目录（调用方需持有锁）"""
+        self._lru[dir_path] = result
+        self._lru.move_to_end(dir_path)
+        while len(self._lru) > self.max_dirs:
+            self._lru.popitem(last=False)
+
+    def __contains__(self, dir_path):
+        with self._lock:
+            return dir_path in self._lru
+
+    def invalidate(self, dir_path):
+        """丢弃目录的缓存内容（如目录发生了变化），下次读取时重新读取"""
+        with self._lock:
+            self._generations[dir_path] = self._generations.get(dir_path, 0) + 1
+            self._lru.pop(dir_path, None)
+            pending = self._pending.pop(dir_path, None)
+        if pending is not None:
+            pending[1].cancel()
+
+    def close(self):
+        """取消尚未开始的预取并关闭线程池（正在读取的目录读完后结束）"""
+        with self._lock:
+            self._closed = True
+            for token, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._lru.clear()
+            self._generations.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,321 @@
+"""
+紧凑目录树模型 - tree_model.py
+功能：以并行数组在内存中保存整棵目录树，可按子项遍历，并重新输出先序节点流或目录树文本
+说明：每个条目保存为一个 TreeNode 对象时，连同名称和完整路径字符串要占数百字节，千万级条目需要数 GB；
+      这里每个条目只在各列中占几十字节：父目录下标、子树结束位置、类型、大小、修改时间，
+      以及名称在共享缓冲区中的位置和长度。重复出现的名称（如 index.js、__init__.py）只保存一份，
+      路径在遍历时由名称拼出。tree_snapshot.Snapshot 使用同样的列，遍历方法也来自这里
+作者：Ryan Joo
+"""
+
+import os
+from array import array
+
+from tree_core import TreeNode, more_node, render_lines
+from tree_sort import entry_key
+
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_ERROR = 2  # 无法读取的目录
+KIND_MORE = 3  # 省略标记（见 tree_core.more_node）
+
+GROUPS = (1, 0, 0, 2)  # 各类型在同一目录中的先后（下标为 KIND_*）：目录在前，省略标记在最后
+
+INTERN_MAX = 65536  # 最多记住多少个不同的名称用于去重（常见名称总是很早出现）
+
+
+class ColumnTree:
+    """按列保存的先序目录树，下标 0 为根目录（CompactTree 与 tree_snapshot.Snapshot 的基类）
+
+    子类提供：
+        count: 条目数
+        root_path: 根目录路径
+        parents: 父目录下标（根目录为 -1）
+        ends: 子树结束位置，子孙条目的下标为 (i, ends[i])
+        kinds: KIND_* 常量
+        sizes: 文件大小，未知为 -1；省略标记为省略的条目数；
+               files 不为 None 时，目录为其中所有文件的总大小
+        mtimes: 修改时间（纳秒时间戳），未知为 -1
+        files: 统计过大小时为目录中（递归）的文件数，否则为 None
+        links: 下标 -> 只显示的符号链接的目标（见 TreeNode.link），可为 None
+        name(i), error(i)
+
+    order 为保存时同一目录中子项的顺序（tree_sort.SORT_MODES），按其他方式输出时见 order_key。
+    """
+    files = None
+    links = None
+    order = 'name'
+    _ranks = None  # 排序方式 -> 各条目按该方式整体排序后的名次
+
+    def __len__(self):
+        return self.count
+
+    def path(self, i):
+        """条目完整路径"""
+        parts = []
+        while i > 0:
+            parts.append(self.name(i))
+            i = self.parents[i]
+        return os.path.join(self.root_path, *reversed(parts))
+
+    def depth(self, i):
+        """条目深度（根目录为 0）"""
+        depth = 0
+        while i > 0:
+            i = self.parents[i]
+            depth += 1
+        return depth
+
+    def is_dir(self, i):
+        return self.kinds[i] in (KIND_DIR, KIND_ERROR)
+
+    def children(self, i):
+        """依次产出目录的直接子项下标"""
+        j = i + 1
+        end = self.ends[i]
+        ends = self.ends
+        while j < end:
+            yield j
+            j = ends[j]
+
+    def size_key(self, i):
+        """按大小排序的键（用于 iter_nodes 的 key）：从大到小，省略标记始终在最后"""
+        if self.kinds[i] == KIND_MORE:
+            return True, 0
+        return False, -max(self.sizes[i], 0)
+
+    def order_key(self, mode):
+        """返回按 mode（见 tree_sort.SORT_MODES）排列同一目录中子项的键函数，用于 iter_nodes 的 key；
+        与保存时的顺序相同时返回 None
+
+        每个条目的排序键只计算一次：逐个目录将子项按（目录在前、省略标记在最后，再按 mode）排序，
+        记下各自在父目录中的名次（每个条目 4 字节）；之后再切换回这一方式时直接复用。
+        统计过大小时 'size' 按总大小从大到小，目录与文件混排（见 size_key）。
+        """
+        if mode == self.order:
+            return None
+        if mode == 'size' and self.files is not None:
+            return self.size_key
+        if self._ranks is None:
+            self._ranks = {}
+        ranks = self._ranks.get(mode)
+        if ranks is None:
+            key = entry_key(mode)
+            kinds, sizes, mtimes, name_of = self.kinds, self.sizes, self.mtimes, self.name
+            groups = GROUPS
+
+            def rank_key(i):
+                kind = kinds[i]
+                size = sizes[i] if kind == KIND_FILE and sizes[i] >= 0 else None
+                mtime = mtimes[i] if mtimes[i] >= 0 else None
+                return groups[kind], key(name_of(i), size, mtime)
+            ranks = array('i', bytes(4 * self.count))
+            for i in range(self.count):
+                if kinds[i] == KIND_DIR:
+                    for rank, j in enumerate(sorted(self.children(i), key=rank_key)):
+                        ranks[j] = rank
+            self._ranks[mode] = ranks
+        return ranks.__getitem__
+
+    def iter_nodes(self, start=0, key=None, max_depth=None):
+        """按先序产出条目 start 及其子树的 TreeNode，可直接交给 render_lines 或导出函数
+
+        参数：
+            start: 子树根的下标，默认为整棵树
+            key: 可选的函数 (下标) -> 排序键，同一目录中的子项按其排序（如 size_key、order_key 的结果），
+                 默认保持保存时的顺序
+            max_depth: 只输出到这一深度，更深的子项以一个省略标记代替；
+                       统计过大小时省略标记带有该目录的总大小和文件数
+        """
+        kinds, sizes, mtimes, files = self.kinds, self.sizes, self.mtimes, self.files
+        links = self.links
+        name_of = self.name
+        join = os.path.join
+        if start:
+            first = (start, name_of(start), self.path(start), self.depth(start), True)
+        else:
+            first = (0, name_of(0), self.root_path, 0, True)
+        stack = [first]  # 尚未输出的条目：(下标, 名称, 路径, 深度, 是否最后一项)
+        while stack:
+            i, name, path, depth, is_last = stack.pop()
+            kind = kinds[i]
+            if kind == KIND_MORE:
+                yield TreeNode(name, None, False, depth, is_last, more=sizes[i])
+                continue
+            size = sizes[i]
+            mtime = mtimes[i]
+            node = TreeNode(name, path, kind != KIND_FILE, depth, is_last,
+                            mtime=mtime if mtime >= 0 else None)
+            if kind == KIND_FILE:
+                node.size = size if size >= 0 else None
+                if links:
+                    node.link = links.get(i)
+            elif files is not None:
+                node.size = size
+                node.files = files[i]
+            if kind == KIND_ERROR:
+                node.error = self.error(i)
+            yield node
+            if kind != KIND_DIR:
+                continue
+
+            items = list(self.children(i))
+            if not items:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                count = sum(sizes[j] if kinds[j] == KIND_MORE else 1 for j in items)
+                marker = more_node(count, depth + 1)
+                marker.size = node.size
+                marker.files = node.files
+                yield marker
+                continue
+            if key is not None:
+                items.sort(key=key)
+            last = items[-1]
+            depth += 1
+            for j in reversed(items):
+                child = name_of(j)
+                stack.append((j, child, join(path, child), depth, j == last))
+
+    def iter_lines(self, with_nodes=False, renderer=None, key=None, max_depth=None):
+        """渲染整棵树，逐行产出目录树文本（参数见 iter_nodes 和 tree_core.render_lines）"""
+        return render_lines(self.iter_nodes(0, key, max_depth), with_nodes, renderer)
+
+
+class CompactTree(ColumnTree):
+    """在内存中按列保存的目录树
+
+    用法：
+        tree = CompactTree.from_nodes(walk_tree(root_path, lister=list_dir_stat))
+        tree.aggregate()  # 可选：统计目录的总大小和文件数
+        for line in tree.iter_lines(key=tree.size_key):
+            ...
+
+    名称以 UTF-8 编码（无法解码的字节按 surrogateescape 保留）保存在共享缓冲区 names 中，
+    每个条目记录起始位置 name_off 和长度 name_len；最先出现的 INTERN_MAX 个不同名称会被记住，
+    再次出现时直接引用已有的那一份。
+    """
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.count = 0
+        self.truncated = False  # 是否含有省略标记（扫描不完整）
+        self.parents = array('i')
+        self.ends = array('i')
+        self.kinds = bytearray()
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.name_off = array('I')
+        self.name_len = array('H')
+        self.names = bytearray()
+        self._intern = {}  # 名称 -> (起始位置, 长度)
+        self._stack = []  # 尚未结束的目录：(深度, 下标)
+        self._errors = {}  # 下标 -> 读取目录时的异常
+        self.links = {}
+
+    @classmethod
+    def from_nodes(cls, nodes, root_path=None):
+        """由先序节点流（walk_tree、Snapshot.iter_nodes 等）建立，root_path 默认为根节点的路径"""
+        tree = None
+        for node in nodes:
+            if tree is None:
+                tree = cls(node.path if root_path is None else root_path)
+            tree.add(node)
+        if tree is None:
+            raise ValueError("empty tree")
+        tree.finish()
+        return tree
+
+    def record(self, nodes):
+        """原样产出先序节点流，同时逐个追加到本树，节点流结束后调用 finish（边遍历边输出时保留扫描结果）"""
+        for node in nodes:
+            self.add(node)
+            yield node
+        self.finish()
+
+    def add(self, node):
+        """追加下一个节点（按先序）"""
+        index = self.count
+        stack = self._stack
+        ends = self.ends
+        while stack and stack[-1][0] >= node.depth:
+            ends[stack.pop()[1]] = index
+
+        if node.more:
+            kind, size = KIND_MORE, node.more
+            self.truncated = True
+        elif node.error is not None:
+            kind, size = KIND_ERROR, 0
+            self._errors[index] = node.error
+        elif node.is_dir:
+            kind, size = KIND_DIR, 0  # 目录的大小在 aggregate 时汇总
+        else:
+            kind = KIND_FILE
+            size = -1 if node.size is None else node.size
+            if node.link is not None:
+                self.links[index] = node.link
+        self.parents.append(stack[-1][1] if stack else -1)
+        ends.append(index + 1)
+        self.kinds.append(kind)
+        self.sizes.append(size)
+        self.mtimes.append(-1 if node.mtime is None else node.mtime)
+
+        name = node.name
+        interned = self._intern.get(name)
+        if interned is None:
+            data = name.encode('utf-8', 'surrogateescape')
+            interned = (len(self.names), len(data))
+            self.names += data
+            if len(self._intern) < INTERN_MAX:
+                self._intern[name] = interned
+        self.name_off.append(interned[0])
+        self.name_len.append(interned[1])
+
+        if kind == KIND_DIR:
+            stack.append((node.depth, index))
+        self.count += 1
+
+    def finish(self):
+        """结束追加：确定仍未结束的目录的子树范围"""
+        while self._stack:
+            self.ends[self._stack.pop()[1]] = self.count
+
+    def name(self, i):
+        """条目名称"""
+        start = self.name_off[i]
+        return self.names[start:start + self.name_len[i]].decode('utf-8', 'surrogateescape')
+
+    def error(self, i):
+        """读取该目录时发生的异常"""
+        return self._errors[i]
+
+    def aggregate(self):
+        """自底向上汇总每个目录的总大小（写入 sizes）和文件数（files）
+
+        子孙的下标总是大于祖先，因此从后向前扫描一遍即可；
+        大小未知的文件只计入文件数，省略标记的内容未知，不计入。
+        """
+        if self.files is not None:
+            return  # 已经汇总过
+        self._ranks = None  # 目录的大小改变了
+        kinds, sizes, parents = self.kinds, self.sizes, self.parents
+        files = array('q', bytes(8 * self.count))
+        for i in range(self.count - 1, 0, -1):
+            kind = kinds[i]
+            if kind == KIND_MORE:
+                continue
+            parent = parents[i]
+            if kind == KIND_FILE:
+                files[parent] += 1
+                size = sizes[i]
+                if size > 0:
+                    sizes[parent] += size
+            else:
+                files[parent] += files[i]
+                sizes[parent] += sizes[i]
+        self.files = files
+
+    def nbytes(self):
+        """各列和名称缓冲区占用的字节数（不含去重用的名称表和错误信息）"""
+        columns = (self.parents, self.ends, self.sizes, self.mtimes, self.name_off, self.name_len)
+        return (sum(len(c) * c.itemsize for c in columns) + len(self.kinds) + len(self.names))
@@ -0,0 +1,158 @@
+"""
+扫描诊断 - tree_profile.py
+功能：统计一次扫描的计数（目录、条目、stat 调用、错误）和各阶段耗时（读取目录、渲染、等待界面、插入文本框），
+      并可用 cProfile 记录后台线程的调用情况，保存为 pstats 文件
+说明：只有传入 ScanProfile 时才会包装读取函数和行生成器，不启用时没有任何额外开销；
+      stat 调用数按读取结果估算：遍历在读取每个目录之前 stat 一次（检测循环，见 tree_core._read_dir），
+      附带大小的读取函数每个条目一次，扫描缓存每个目录再一次（校验 mtime）
+作者：Ryan Joo
+"""
+
+import threading
+import time
+
+PHASES = ('read', 'render', 'wait', 'insert', 'index')
+
+
+class ScanProfile:
+    """一次扫描的诊断数据（由后台线程和读取目录的线程写入，可在主线程中随时读取）
+
+    属性：
+        dirs: 成功读取的目录数
+        entries: 读取到的条目数
+        stat_calls: 估算的 stat 调用数
+        errors: 读取失败的目录数
+        lines: 生成的文本行数
+        phases: 阶段名称（见 PHASES）-> 累计耗时（秒）：
+            read 读取目录（含 scandir、stat 和排序；并行扫描时为各线程之和），
+            render 遍历和渲染文本行（不含在同一线程中读取目录的时间；并行扫描时包括等待预取结果），
+            wait 后台线程等待界面消费（队列已满），
+            insert 插入文本框，index 更新搜索索引
+        profiler: 可选的 cProfile.Profile，在后台线程迭代行生成器期间启用
+    """
+    __slots__ = ('dirs', 'entries', 'stat_calls', 'errors', 'lines', 'phases', 'profiler',
+                 'started', 'finished', '_lock', '_inline_read', '_thread')
+
+    def __init__(self, profiler=None):
+        self.dirs = 0
+        self.entries = 0
+        self.stat_calls = 0
+        self.errors = 0
+        self.lines = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.profiler = profiler
+        self.started = time.perf_counter()
+        self.finished = None
+        self._lock = threading.Lock()
+        self._inline_read = 0.0  # 在生成文本行的线程中读取目录的时间
+        self._thread = None  # 生成文本行的线程
+
+    def add(self, phase, seconds):
+        """累加一个阶段的耗时"""
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def wrap_lister(self, lister, stat_per_dir=False):
+        """返回计时并计数的读取函数，签名同 lister
+
+        参数：
+            lister: 读取单个目录的函数（见 tree_core.list_dir）
+            stat_per_dir: lister 是否对每个目录额外 stat 一次（如扫描缓存）
+
+        walk_tree 在调用 lister 之前总会 stat 目录本身一次，这一次也计入 stat_calls。
+        """
+        dir_stats = 1 + stat_per_dir
+
+        def profiled_lister(dir_path):
+            start = time.perf_counter()
+            try:
+                dirs, files = lister(dir_path)
+            except Exception:
+                self._add_read(time.perf_counter() - start, 0, dir_stats, error=True)
+                raise
+            elapsed = time.perf_counter() - start
+            count = len(dirs) + len(files)
+            item = dirs[0] if dirs else files[0] if files else ()
+            stats = (count if len(item) > 2 else 0) + dir_stats
+            self._add_read(elapsed, count, stats)
+            return dirs, files
+        return profiled_lister
+
+    def _add_read(self, elapsed, count, stats, error=False):
+        with self._lock:
+            self.phases['read'] += elapsed
+            if threading.get_ident() == self._thread:
+                self._inline_read += elapsed
+            self.stat_calls += stats
+            if error:
+                self.errors += 1
+            else:
+                self.dirs += 1
+                self.entries += count
+
+    def wrap_lines(self, lines):
+        """在当前线程中迭代行生成器并计时，逐项原样产出；profiler 在迭代期间启用"""
+        self._thread = threading.get_ident()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enable()
+        try:
+            it = iter(lines)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    self.phases['render'] += time.perf_counter() - start
+                self.lines += 1
+                yield item
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            with self._lock:
+                self.phases['render'] -= self._inline_read
+                self._inline_read = 0.0
+
+    def finish(self):
+        """记录结束时间"""
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        """从开始到结束（尚未结束时到现在）的秒数"""
+        return (self.finished or time.perf_counter()) - self.started
+
+    def dump_stats(self, file_path):
+        """将 cProfile 结果保存为 pstats 文件（可用 python -m pstats 或 snakeviz 查看）
+
+        异常：
+            ValueError: 没有启用 cProfile
+        """
+        if self.profiler is None:
+            raise ValueError("no cProfile data recorded")
+        self.profiler.dump_stats(file_path)
+
+    def summary(self, counts_fmt, phases_fmt):
+        """格式化的诊断文本
+
+        参数：
+            counts_fmt: 计数的格式，按顺序填入目录数、条目数、stat 调用数、错误数
+            phases_fmt: 耗时的格式，按名称填入 PHASES 中各阶段和 total（已格式化的文本）
+        """
+        with self._lock:
+            phases = dict(self.phases)
+            inline = self._inline_read
+        phases['render'] -= inline  # 迭代尚未结束时，渲染时间中仍包含在同一线程中读取目录的时间
+        phases['total'] = self.elapsed
+        times = {name: format_seconds(max(value, 0.0)) for name, value in phases.items()}
+        counts = counts_fmt.format(self.dirs, self.entries, self.stat_calls, self.errors)
+        return f"{counts} | {phases_fmt.format(**times)}"
+
+
+def format_seconds(seconds):
+    """将秒数格式化为便于阅读的文本，如 85 ms、1.25 s"""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.2f} s"
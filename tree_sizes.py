@@ -0,0 +1,67 @@
+"""
+目录大小统计 - tree_sizes.py
+功能：在一次遍历中自底向上汇总每个目录的总大小和文件数，并可按大小排序子项
+说明：只使用读取目录时已经得到的大小（见 tree_core.list_dir_stat），不会再次遍历或额外 stat；
+      目录的总数要等其子树遍历完才能确定，因此整棵树先以紧凑的列式结构保存在内存中
+      （见 tree_model.CompactTree，每个条目几十字节），遍历结束后再按先序输出
+作者：Ryan Joo
+"""
+
+from tree_core import ScanLimits, list_dir_stat, node_label, walk_tree
+from tree_model import CompactTree
+from tree_sort import SORT_MODES
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
+def format_size(size):
+    """将字节数格式化为便于阅读的文本，如 512 B、1.5 MB"""
+    if size < 1024:
+        return f"{size} B"
+    value = float(size)
+    for unit in SIZE_UNITS[1:]:
+        value /= 1024
+        if value < 1024 or unit == SIZE_UNITS[-1]:
+            return f"{value:.1f} {unit}"
+
+
+def size_label(node):
+    """BoxRenderer 的 label：名称后标注大小，目录和省略标记另外标注文件数"""
+    name = node_label(node)
+    if node.size is None:
+        return name
+    if node.files is None:
+        return f"{name} ({format_size(node.size)})"
+    files = "1 file" if node.files == 1 else f"{node.files} files"
+    return f"{name} ({format_size(node.size)}, {files})"
+
+
+def walk_sizes(root_path, stats=None, cancel=None, workers=1, lister=list_dir_stat,
+               limits=None, sort='name', tree=None):
+    """遍历目录树并统计大小，按先序产出带有总数的 TreeNode
+
+    参数：
+        root_path: 根目录路径
+        stats, cancel, workers: 见 tree_core.walk_tree
+        lister: 读取单个目录的函数，每一项须附带大小（见 list_dir_stat）
+        limits: 可选的 ScanLimits。深度限制只作用于输出：更深的目录照常遍历，
+                以便上层目录的总数准确，输出时每个目录的子项以一个带有总数的省略标记代替；
+                条目数和时间预算仍然限制遍历本身
+        sort: 同一目录中子项的顺序（见 tree_sort.SORT_MODES），
+              'size' 按总大小从大到小排列，'name' 保持遍历顺序
+        tree: 可选的空 CompactTree，扫描结果保存在其中，之后可重新排序输出而无需再次扫描
+
+    产出：
+        TreeNode，目录和省略标记的 size/files 为总数
+    """
+    if sort not in SORT_MODES:
+        raise ValueError(f"unknown sort mode: {sort}")
+    if limits is None:
+        limits = ScanLimits()
+    if tree is None:
+        tree = CompactTree(root_path)
+    walk_limits = ScanLimits(None, limits.max_entries, limits.time_budget, limits.one_filesystem)
+    for node in walk_tree(root_path, stats, cancel, workers, lister, walk_limits):
+        tree.add(node)
+    tree.finish()
+    tree.aggregate()
+    yield from tree.iter_nodes(key=tree.order_key(sort), max_depth=limits.max_depth)
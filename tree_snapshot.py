@@ -0,0 +1,315 @@
+"""
+扫描快照 - tree_snapshot.py
+功能：以紧凑的二进制列式格式保存一次扫描的结果，并通过 mmap 按需读取
+说明：写入时边遍历边追加到各列的临时文件，内存占用与目录树大小无关；
+      读取时各列直接映射为数组视图，打开百万条目的快照无需解析；
+      图形界面的树形视图可直接浏览快照（见 tree_view.SnapshotTreeModel）
+作者：Ryan Joo
+
+文件格式（小端序，条目按先序排列，下标 0 为根目录）：
+    头部 64 字节：魔数 b'DTVSNAP\\0'、版本、保留、条目数 N、名称区字节数、元数据字节数
+    之后依次为以下各区，每区起始位置按 8 字节对齐：
+        parent    int32[N]    父目录下标（根目录为 -1）
+        end       int32[N]    子树结束位置：子孙条目的下标为 (i, end[i])
+        kind      uint8[N]    KIND_* 常量
+        size      int64[N]    文件大小（字节），未知为 -1；省略标记为省略的条目数
+        mtime     int64[N]    修改时间（纳秒时间戳），未知为 -1
+        name_off  int64[N+1]  名称在名称区中的起止位置
+        names     bytes       名称（UTF-8，无法解码的字节按 surrogateescape 保留）
+        meta      bytes       UTF-8 JSON：根目录路径、创建时间、读取失败的目录及错误信息等
+"""
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from tree_core import NotFollowed
+from tree_model import KIND_DIR, KIND_ERROR, KIND_FILE, KIND_MORE, ColumnTree
+
+MAGIC = b'DTVSNAP\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqqq')  # 魔数、版本、保留、条目数、名称区字节数、元数据字节数
+HEADER_SIZE = 64
+EXTENSION = '.treesnap'
+
+# 各列的名称和数组类型码，顺序即文件中的顺序（name_off 比其他列多一项）
+COLUMNS = (('parent', 'i'), ('end', 'i'), ('kind', 'B'),
+           ('size', 'q'), ('mtime', 'q'), ('name_off', 'q'))
+CHUNK = 65536  # 每列在内存中缓冲的条目数
+
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(count, names_size):
+    """计算各区在文件中的起始位置，返回 ({列名: (起始位置, 类型码, 项数)}, 名称区起始, 元数据起始)"""
+    offset = HEADER_SIZE
+    columns = {}
+    for name, code in COLUMNS:
+        n = count + 1 if name == 'name_off' else count
+        columns[name] = (offset, code, n)
+        offset = _align(offset + n * array(code).itemsize)
+    names_start = offset
+    return columns, names_start, _align(names_start + names_size)
+
+
+class SnapshotWriter:
+    """按先序逐个接收 TreeNode，写出快照文件
+
+    用法：
+        writer = SnapshotWriter(file_path, root_path)
+        for node in walk_tree(root_path, lister=list_dir_stat):
+            writer.add(node)
+        writer.close()
+    """
+
+    def __init__(self, file_path, root_path):
+        self.file_path = file_path
+        self.root_path = root_path
+        self.count = 0
+        self.names_size = 0
+        self.truncated = False
+        self._flushed = 0  # 已写入临时文件的条目数
+        self._buffers = {name: array(code) for name, code in COLUMNS}
+        self._files = {name: tempfile.TemporaryFile() for name, _ in COLUMNS}
+        self._names = tempfile.TemporaryFile()
+        self._name_chunks = []
+        self._stack = []  # 尚未结束的目录：(深度, 下标)
+        self._end_patches = {}  # 已写入临时文件、需要回填 end 的条目：下标 -> end
+        self._errors = {}  # 下标 -> [异常类名, 错误信息]
+        self._links = {}  # 下标 -> 只显示的符号链接的目标
+
+    def add(self, node):
+        """追加下一个节点"""
+        index = self.count
+        stack = self._stack
+        while stack and stack[-1][0] >= node.depth:
+            self._set_end(stack.pop()[1], index)
+        buffers = self._buffers
+
+        if node.more:
+            kind, size = KIND_MORE, node.more
+            self.truncated = True
+        elif node.error is not None:
+            kind, size = KIND_ERROR, -1
+            self._errors[index] = [type(node.error).__name__, str(node.error)]
+        else:
+            kind = KIND_DIR if node.is_dir else KIND_FILE
+            size = -1 if node.size is None else node.size
+            if node.link is not None:
+                self._links[index] = node.link
+        buffers['parent'].append(stack[-1][1] if stack else -1)
+        buffers['end'].append(index + 1)
+        buffers['kind'].append(kind)
+        buffers['size'].append(size)
+        buffers['mtime'].append(-1 if node.mtime is None else node.mtime)
+        buffers['name_off'].append(self.names_size)
+        name = node.name.encode('utf-8', 'surrogateescape')
+        self._name_chunks.append(name)
+        self.names_size += len(name)
+
+        if kind == KIND_DIR:
+            stack.append((node.depth, index))
+        self.count += 1
+        if len(buffers['parent']) >= CHUNK:
+            self._flush()
+
+    def _set_end(self, index, end):
+        if index >= self._flushed:
+            self._buffers['end'][index - self._flushed] = end
+        else:
+            self._end_patches[index] = end
+
+    def _flush(self):
+        """将各列的缓冲写入临时文件"""
+        for name, buffer in self._buffers.items():
+            if _BIG_ENDIAN:
+                buffer.byteswap()
+            buffer.tofile(self._files[name])
+            del buffer[:]
+        self._names.write(b''.join(self._name_chunks))
+        self._name_chunks = []
+        self._flushed = self.count
+
+    def close(self):
+        """写出快照文件（先写入临时文件，完成后替换目标文件）"""
+        while self._stack:
+            self._set_end(self._stack.pop()[1], self.count)
+        self._buffers['name_off'].append(self.names_size)
+        self._flush()
+        # 回填已写入临时文件的目录的 end
+        end_file = self._files['end']
+        for index, end in sorted(self._end_patches.items()):
+            end_file.seek(index * 4)
+            end_file.write(struct.pack('<i', end))
+
+        meta = json.dumps({
+            'root': self.root_path,
+            'created': time.time(),
+            'truncated': self.truncated,
+            'errors': self._errors,
+            'links': self._links,
+        }, ensure_ascii=True).encode('ascii')
+        columns, names_start, meta_start = _layout(self.count, self.names_size)
+        tmp_path = f"{self.file_path}.part"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, self.count, self.names_size, len(meta)))
+                for name, _ in COLUMNS:
+                    self._copy(self._files[name], f, columns[name][0])
+                self._copy(self._names, f, names_start)
+                f.write(b'\0' * (meta_start - f.tell()))
+                f.write(meta)
+            os.replace(tmp_path, self.file_path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        finally:
+            self._close_temp()
+
+    @staticmethod
+    def _copy(src, dst, offset):
+        """补齐到 offset 后复制临时文件的全部内容"""
+        dst.write(b'\0' * (offset - dst.tell()))
+        src.seek(0)
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        self._close_temp()
+
+    def _close_temp(self):
+        for f in self._files.values():
+            f.close()
+        self._names.close()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def write_snapshot(file_path, root_path, nodes):
+    """将先序节点流写入快照文件；中途出错或被取消时不会留下文件"""
+    writer = SnapshotWriter(file_path, root_path)
+    try:
+        for node in nodes:
+            writer.add(node)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer.count
+
+
+class Snapshot(ColumnTree):
+    """只读打开快照文件，各列映射为数组视图（parents、ends、kinds、sizes、mtimes），
+    遍历方法见 tree_model.ColumnTree
+
+    用法：
+        with Snapshot(path) as snap:
+            for line in render_lines(snap.iter_nodes()):
+                ...
+    """
+
+    def __init__(self, path):
+        """
+        异常：
+            OSError: 文件无法读取时抛出
+            ValueError: 文件不是快照或版本不受支持时抛出
+        """
+        self.file_path = path
+        self._file = open(path, 'rb')
+        self._mmap = None
+        self._views = []
+        try:
+            self._open(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, path):
+        """检查头部和文件大小，映射文件并建立各列的视图（出错时由 __init__ 释放已建立的部分）"""
+        header = self._file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise ValueError(f"not a tree snapshot: {path}")
+        _, version, _, count, names_size, meta_size = HEADER.unpack_from(header)
+        if version != VERSION:
+            raise ValueError(f"unsupported snapshot version {version}: {path}")
+        if count < 0 or names_size < 0 or meta_size < 0:
+            raise ValueError(f"corrupt snapshot header: {path}")
+        columns, names_start, meta_start = _layout(count, names_size)
+        if os.fstat(self._file.fileno()).st_size < meta_start + meta_size:
+            raise ValueError(f"truncated snapshot: {path}")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = count
+        buf = memoryview(self._mmap)
+        self._views.append(buf)
+        for name, (offset, code, n) in columns.items():
+            setattr(self, name + 's' if name != 'name_off' else name,
+                    self._column(buf, offset, code, n))
+        self.names = buf[names_start:names_start + names_size]
+        self._views.append(self.names)
+        try:
+            self.meta = json.loads(bytes(buf[meta_start:meta_start + meta_size]).decode('ascii'))
+            self.root_path = self.meta['root']
+            self.errors = {int(k): v for k, v in self.meta['errors'].items()}
+            self.links = {int(k): v for k, v in self.meta.get('links', {}).items()}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # JSON 或编码错误（均为 ValueError）、缺少字段或字段类型不对
+            raise ValueError(f"corrupt snapshot metadata: {path}") from e
+
+    def _column(self, buf, offset, code, n):
+        """返回一列的数组视图；大端序平台上复制并转换字节序"""
+        size = array(code).itemsize
+        view = buf[offset:offset + n * size]
+        if _BIG_ENDIAN:
+            column = array(code, view.tobytes())
+            column.byteswap()
+            return column
+        view = view.cast(code)
+        self._views.append(view)
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """释放所有视图并关闭文件"""
+        for name, _ in COLUMNS:
+            setattr(self, name + 's' if name != 'name_off' else name, None)
+        self.names = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def name(self, i):
+        """条目名称"""
+        return bytes(self.names[self.name_off[i]:self.name_off[i + 1]]).decode(
+            'utf-8', 'surrogateescape')
+
+    def error(self, i):
+        """还原读取失败的目录的异常（用于 tree_core.format_error）"""
+        cls_name, message = self.errors[i]
+        if cls_name == 'PermissionError':
+            return PermissionError(message)
+        if cls_name == 'NotFollowed':
+            return NotFollowed(message)
+        return OSError(message)
@@ -0,0 +1,101 @@
+"""
+排序方式 - tree_sort.py
+功能：同一目录中子项的排序方式（名称、自然顺序、不区分大小写、扩展名、修改时间、大小）及其排序键
+说明：每个条目的排序键只计算一次（list.sort 的 key 对每一项只调用一次；
+      紧凑树模型中则整体排序一遍后记下名次，见 tree_model.ColumnTree.order_key）；
+      目录总在文件之前，读取目录时已一次分为 dirs 和 files 两组，各组分别排序即可
+作者：Ryan Joo
+"""
+
+import os
+import re
+
+# name 为按名称逐字符比较（默认，与快照和比较结果的顺序一致）
+SORT_MODES = ('name', 'natural', 'nocase', 'ext', 'mtime', 'size')
+STAT_SORTS = ('mtime', 'size')  # 需要附带大小和修改时间的读取函数（见 tree_core.list_dir_stat）
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def natural_key(name):
+    """自然顺序的排序键：数字部分按数值比较（file2 在 file10 之前），其余部分不区分大小写
+
+    名称拆分后文本与数字交替出现（第一段总是文本），因此同一位置上的类型总是相同；
+    拆分结果相同时（如 a01 和 a1）再按原名称比较，保证顺序确定。
+    """
+    parts = _DIGITS.split(name.casefold())
+    parts[1::2] = map(int, parts[1::2])
+    return parts, name
+
+
+def _name_key(name, size, mtime):
+    return name
+
+
+def _nocase_key(name, size, mtime):
+    return name.casefold(), name
+
+
+def _natural_key(name, size, mtime):
+    return natural_key(name)
+
+
+def _ext_key(name, size, mtime):
+    stem, ext = os.path.splitext(name)
+    return ext.casefold(), natural_key(stem)
+
+
+def _mtime_key(name, size, mtime):
+    # 新的在前，时间未知的在最后
+    return mtime is None, -(mtime or 0), name
+
+
+def _size_key(name, size, mtime):
+    # 大的在前，大小未知的（如目录）在最后
+    return size is None, -(size or 0), name
+
+
+ENTRY_KEYS = {
+    'name': _name_key,
+    'natural': _natural_key,
+    'nocase': _nocase_key,
+    'ext': _ext_key,
+    'mtime': _mtime_key,
+    'size': _size_key,
+}
+
+
+def entry_key(mode):
+    """返回排序键函数 (名称, 大小, 修改时间) -> 键；大小和时间未知时为 None
+
+    异常：
+        ValueError: 未知的排序方式
+    """
+    try:
+        return ENTRY_KEYS[mode]
+    except KeyError:
+        raise ValueError(f"unknown sort mode: {mode}") from None
+
+
+def item_key(mode):
+    """返回 list_dir/list_dir_stat 结果中各项的排序键函数"""
+    key = entry_key(mode)
+    if mode not in STAT_SORTS:
+        return lambda item: key(item[0], None, None)
+    return lambda item: key(item[0], item[2], item[3]) if len(item) > 2 else key(item[0], None, None)
+
+
+def sorted_lister(lister, mode):
+    """包装读取单个目录的函数，使 dirs 和 files 各自按 mode 排序；'name' 时原样返回
+
+    返回新的列表，不修改 lister 的结果（扫描缓存等可能复用它们）。
+    mtime 和 size 需要附带大小和修改时间的 lister，否则退化为按名称排序。
+    """
+    if mode == 'name':
+        return lister
+    key = item_key(mode)
+
+    def sorting_lister(dir_path):
+        dirs, files = lister(dir_path)
+        return sorted(dirs, key=key), sorted(files, key=key)
+    return sorting_lister
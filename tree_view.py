@@ -0,0 +1,617 @@
+"""
+虚拟化目录树视图 - tree_view.py
+功能：基于 Canvas 的目录树控件，只绘制视口内可见的行，子目录在展开时才读取
+说明：节点数据保存在紧凑的并行数组中，内存占用与已展开的内容成正比；
+      显示新的根目录时只读取根目录本身，视口中尚未读取的目录在后台提前读取（见 tree_listing），
+      因此首屏耗时与目录树的总大小无关，展开时通常无需等待；
+      也可以直接浏览快照文件（见 tree_snapshot），条目从映射的文件中按需读取
+作者：Ryan Joo
+"""
+
+import os
+import tkinter as tk
+from array import array
+from collections import defaultdict
+from tkinter import font as tkfont
+from tkinter import ttk
+
+from tree_core import format_error, list_dir
+from tree_listing import ListingCache
+
+# 节点类型
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_ERROR = 2  # 目录读取失败时显示的提示行
+KIND_MORE = 3  # 快照中的省略标记（与 tree_model 的 KIND_* 相同）
+
+INDENT = "    "
+COMPACT_MIN = 4096  # 被 refresh 替换下来的节点超过此数且超过总数一半时压缩数组
+
+
+# ======================== 数据模型 ========================
+class LazyTreeModel:
+    """惰性加载的目录树模型
+
+    所有节点按加载顺序编号，同一目录的子节点编号连续。
+    模型同时维护当前可见行（已展开节点的先序展开结果）的节点编号列表。
+
+    属性：
+        root_path: 根目录路径
+        rows: 可见行对应的节点编号
+    """
+
+    def __init__(self, root_path, lister=list_dir):
+        """
+        参数：
+            root_path: 根目录路径
+            lister: 读取单个目录的函数，返回 (dirs, files)，见 tree_core.list_dir
+        """
+        self.root_path = root_path
+        self.lister = lister
+        self.on_load = None  # 目录首次读取时的回调 on_load(路径)，用于加入监视
+        self.names = [os.path.basename(os.path.normpath(root_path)) or root_path]
+        self.parents = array('i', [-1])
+        self.depths = array('i', [0])
+        self.kinds = bytearray([KIND_DIR])
+        self.expanded = bytearray([0])
+        # 子节点区间：起始编号（-1 表示尚未读取）和数量
+        self.child_start = array('i', [-1])
+        self.child_count = array('i', [0])
+        self.rows = array('i', [0])
+        self._orphans = 0  # 被 refresh 替换、不再可到达的节点数
+
+    def loaded_paths(self):
+        """列出所有已读取目录的路径"""
+        for node in range(len(self.names)):
+            if self.child_start[node] >= 0:
+                yield self.path(node)
+
+    def __len__(self):
+        return len(self.names)
+
+    def is_dir(self, node):
+        return self.kinds[node] == KIND_DIR
+
+    def is_loaded(self, node):
+        return self.child_start[node] >= 0
+
+    def path(self, node):
+        """根据父节点链拼出节点的完整路径"""
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parents[node]
+        return os.path.join(self.root_path, *reversed(parts))
+
+    def children(self, node):
+        """返回已加载子节点的编号范围"""
+        start = self.child_start[node]
+        if start < 0:
+            return range(0)
+        return range(start, start + self.child_count[node])
+
+    def find(self, path):
+        """按路径查找已加载的节点，未加载时返回 -1"""
+        rel = os.path.relpath(path, self.root_path)
+        if rel == os.curdir:
+            return 0
+        if rel.startswith(os.pardir):
+            return -1
+        node = 0
+        for part in rel.split(os.sep):
+            for child in self.children(node):
+                if self.names[child] == part and self.kinds[child] == KIND_DIR:
+                    node = child
+                    break
+            else:
+                return -1
+        return node
+
+    def _read(self, node):
+        """读取目录内容，返回 (名称, 类型) 列表"""
+        path = self.path(node)
+        if self.on_load is not None:
+            self.on_load(path)
+        try:
+            dirs, files = self.lister(path)
+            items = [(item[0], KIND_DIR) for item in dirs]
+            items += [(item[0], KIND_FILE) for item in files]
+        except Exception as e:
+            items = [(format_error(e), KIND_ERROR)]
+        return items
+
+    def load(self, node):
+        """读取目录内容并追加为子节点（已读取过则直接返回）"""
+        if self.child_start[node] >= 0 or self.kinds[node] != KIND_DIR:
+            return
+        self._append_children(node, self._read(node))
+
+    def refresh(self, node):
+        """重新读取已加载的目录，保留仍然存在的子目录的加载和展开状态"""
+        if self.child_start[node] < 0:
+            return
+        replaced = len(self.children(node))
+        old = {(self.names[c], self.kinds[c]): c for c in self.children(node)
+               if self.kinds[c] == KIND_DIR}
+        self._append_children(node, self._read(node))
+
+        # 新节点沿用同名旧目录的子节点
+        for child in self.children(node):
+            prev = old.pop((self.names[child], self.kinds[child]), None)
+            if prev is None or self.child_start[prev] < 0:
+                continue
+            self.child_start[child] = self.child_start[prev]
+            self.child_count[child] = self.child_count[prev]
+            self.expanded[child] = self.expanded[prev]
+            for grandchild in self.children(prev):
+                self.parents[grandchild] = child
+        # 旧的子节点，以及已删除目录中加载过的后代，都不再可到达
+        self._orphans += replaced + sum(map(self._loaded_size, old.values()))
+
+        # 目录可见且已展开时，替换其可见子树
+        if self.expanded[node]:
+            try:
+                row = self.rows.index(node)
+            except ValueError:
+                row = -1  # 某个祖先已折叠
+            if row >= 0:
+                self.rows[row + 1:self._subtree_end(row)] = self._visible_descendants(node)
+        if self._orphans > max(COMPACT_MIN, len(self.names) // 2):
+            self._compact()
+
+    def _loaded_size(self, node):
+        """node 的已加载后代数"""
+        count = 0
+        stack = [node]
+        while stack:
+            children = self.children(stack.pop())
+            count += len(children)
+            stack.extend(children)
+        return count
+
+    def _compact(self):
+        """丢弃不再可到达的节点：从根目录起按层重新编号，同一目录的子节点仍然连续
+
+        监视模式下每次 refresh 都会追加一组新的子节点，压缩后数组大小重新与已加载的内容成正比。
+        """
+        new_id = array('i', [-1]) * len(self.names)
+        new_id[0] = 0
+        order = array('i', [0])
+        child_start = array('i')
+        i = 0
+        while i < len(order):
+            node = order[i]
+            i += 1
+            if self.child_start[node] < 0:
+                child_start.append(-1)
+                continue
+            child_start.append(len(order))
+            for child in self.children(node):
+                new_id[child] = len(order)
+                order.append(child)
+        self.names = [self.names[n] for n in order]
+        self.kinds = bytearray(self.kinds[n] for n in order)
+        parents = array('i', [-1])
+        parents.extend(new_id[self.parents[n]] for n in order[1:])
+        self.parents = parents
+        self.depths = array('i', (self.depths[n] for n in order))
+        self.expanded = bytearray(self.expanded[n] for n in order)
+        self.child_count = array('i', (self.child_count[n] for n in order))
+        self.child_start = child_start
+        self.rows = array('i', (new_id[n] for n in self.rows))
+        self._orphans = 0
+
+    def _append_children(self, node, items):
+        """将 (名称, 类型) 列表追加为 node 的子节点"""
+        start = len(self.names)
+        count = len(items)
+        depth = self.depths[node] + 1
+        self.names.extend(name for name, _ in items)
+        self.kinds.extend(kind for _, kind in items)
+        self.parents.extend([node] * count)
+        self.depths.extend([depth] * count)
+        self.expanded.extend(bytes(count))
+        self.child_start.extend([-1] * count)
+        self.child_count.extend([0] * count)
+        self.child_start[node] = start
+        self.child_count[node] = count
+
+    def _visible_descendants(self, node):
+        """按先序列出 node 展开后应显示的所有后代节点"""
+        result = array('i')
+        stack = list(reversed(self.children(node)))
+        while stack:
+            child = stack.pop()
+            result.append(child)
+            if self.expanded[child]:
+                stack.extend(reversed(self.children(child)))
+        return result
+
+    def _subtree_end(self, row):
+        """返回 row 行节点的可见子树之后的第一行"""
+        depth = self.depths[self.rows[row]]
+        end = row + 1
+        rows, depths = self.rows, self.depths
+        while end < len(rows) and depths[rows[end]] > depth:
+            end += 1
+        return end
+
+    def expand(self, row):
+        """展开可见行 row 对应的目录"""
+        node = self.rows[row]
+        if self.kinds[node] != KIND_DIR or self.expanded[node]:
+            return
+        self.load(node)
+        self.expanded[node] = 1
+        self.rows[row + 1:row + 1] = self._visible_descendants(node)
+
+    def collapse(self, row):
+        """折叠可见行 row 对应的目录"""
+        node = self.rows[row]
+        if not self.expanded[node]:
+            return
+        del self.rows[row + 1:self._subtree_end(row)]
+        self.expanded[node] = 0
+
+    def toggle(self, row):
+        """切换展开/折叠状态"""
+        if self.expanded[self.rows[row]]:
+            self.collapse(row)
+        else:
+            self.expand(row)
+
+    def parent_row(self, row):
+        """返回父节点所在的可见行（根节点返回 -1）"""
+        depth = self.depths[self.rows[row]]
+        while row > 0:
+            row -= 1
+            if self.depths[self.rows[row]] < depth:
+                return row
+        return -1
+
+    def row_text(self, row):
+        """可见行的显示文本"""
+        node = self.rows[row]
+        kind = self.kinds[node]
+        indent = INDENT * self.depths[node]
+        if kind == KIND_DIR:
+            marker = "▾ " if self.expanded[node] else "▸ "
+            return f"{indent}{marker}{self.names[node]}/"
+        return f"{indent}  {self.names[node]}"
+
+
+class SnapshotTreeModel(LazyTreeModel):
+    """以快照文件（tree_snapshot.Snapshot）为数据的只读目录树模型
+
+    节点编号即快照中的条目下标，名称、类型和子项直接从映射的各列中读取，
+    不为条目建立 Python 对象：展开目录时只访问其直接子项，操作系统按需将用到的页面读入内存，
+    因此打开千万级条目的快照与打开小快照一样快，内存占用只与展开过的目录有关。
+    """
+
+    def __init__(self, snapshot):
+        """
+        参数：
+            snapshot: 已打开的 tree_snapshot.Snapshot（由调用方负责关闭）
+        """
+        self.snapshot = snapshot
+        self.root_path = snapshot.root_path
+        self.on_load = None
+        self.kinds = snapshot.kinds
+        # 只记录出现过的节点：深度在列出子项时得到，展开状态默认为 0
+        self.depths = {0: 0}
+        self.expanded = defaultdict(int)
+        self.rows = array('i', [0])
+
+    def loaded_paths(self):
+        return iter(())  # 快照中的内容不会变化，没有需要监视的目录
+
+    def __len__(self):
+        return self.snapshot.count
+
+    def is_loaded(self, node):
+        return True
+
+    def path(self, node):
+        return self.snapshot.path(node)
+
+    def children(self, node):
+        """返回子项的编号（沿子树结束位置跳过每个子项的子树）"""
+        if self.kinds[node] != KIND_DIR:
+            return []
+        children = list(self.snapshot.children(node))
+        depth = self.depths[node] + 1
+        depths = self.depths
+        for child in children:
+            depths[child] = depth
+        return children
+
+    def find(self, path):
+        """按路径查找目录，不存在时返回 -1"""
+        rel = os.path.relpath(path, self.root_path)
+        if rel == os.curdir:
+            return 0
+        if rel.startswith(os.pardir):
+            return -1
+        name = self.snapshot.name
+        node = 0
+        for part in rel.split(os.sep):
+            for child in self.children(node):
+                if self.kinds[child] == KIND_DIR and name(child) == part:
+                    node = child
+                    break
+            else:
+                return -1
+        return node
+
+    def load(self, node):
+        pass  # 快照中已包含全部内容
+
+    def refresh(self, node):
+        pass
+
+    def row_text(self, row):
+        """可见行的显示文本"""
+        node = self.rows[row]
+        snapshot = self.snapshot
+        kind = self.kinds[node]
+        indent = INDENT * self.depths[node]
+        name = snapshot.name(node)
+        if kind == KIND_DIR:
+            marker = "▾ " if self.expanded[node] else "▸ "
+            return f"{indent}{marker}{name}/"
+        if kind == KIND_ERROR:
+            return f"{indent}  {name}/ {format_error(snapshot.error(node))}"
+        link = snapshot.links.get(node) if kind == KIND_FILE else None
+        if link is not None:
+            return f"{indent}  {name} -> {link}"
+        return f"{indent}  {name}"
+
+
+# ======================== 视图控件 ========================
+class VirtualTreeView(ttk.Frame):
+    """只绘制可见行的目录树控件
+
+    画布上只保留与视口行数相同的文本项，滚动时复用这些文本项，
+    因此无论目录树有多大，Tk 中的对象数量都保持不变。
+    """
+
+    def __init__(self, master, font=('Consolas', 10), **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = None
+        self.listing = None  # 当前根目录的 tree_listing.ListingCache
+        self.top = 0  # 视口中第一行的行号
+        self.selected = -1  # 选中行的行号
+
+        self.font = tkfont.Font(font=font)
+        self.row_height = self.font.metrics('linespace') + 2
+
+        v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        h_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL)
+        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.v_scrollbar = v_scrollbar
+
+        self.canvas = tk.Canvas(self, background='white', highlightthickness=0,
+                                xscrollcommand=h_scrollbar.set, takefocus=1)
+        self.canvas.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        h_scrollbar.config(command=self.canvas.xview)
+
+        self._items = []  # 复用的文本项
+        self._highlight = self.canvas.create_rectangle(
+            0, 0, 0, 0, fill='#cce4f7', outline='', state=tk.HIDDEN)
+
+        self.canvas.bind('<Configure>', lambda e: self.redraw())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Double-Button-1>', self._on_double_click)
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda e: self.yview('scroll', -3, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.yview('scroll', 3, 'units'))
+        self.canvas.bind('<Up>', lambda e: self._move_selection(-1))
+        self.canvas.bind('<Down>', lambda e: self._move_selection(1))
+        self.canvas.bind('<Prior>', lambda e: self._move_selection(-self._page_rows()))
+        self.canvas.bind('<Next>', lambda e: self._move_selection(self._page_rows()))
+        self.canvas.bind('<Right>', self._on_right)
+        self.canvas.bind('<Left>', self._on_left)
+        self.canvas.bind('<Return>', lambda e: self._toggle_selected())
+        self.canvas.bind('<space>', lambda e: self._toggle_selected())
+
+    # ---------- 公共接口 ----------
+    def set_root(self, root_path, lister=list_dir):
+        """显示新的根目录（只读取根目录本身，其子目录随后在后台预取）"""
+        self._close_source()
+        self.listing = ListingCache(lister)
+        self.model = LazyTreeModel(root_path, self.listing.list_dir)
+        self._show_model()
+
+    def set_snapshot(self, snapshot):
+        """显示快照文件中保存的目录树（已打开的 tree_snapshot.Snapshot，之后由视图负责关闭）"""
+        self._close_source()
+        self.model = SnapshotTreeModel(snapshot)
+        self._show_model()
+
+    def _show_model(self):
+        """展开新模型的根目录并从头显示"""
+        self.model.expand(0)
+        self.top = 0
+        self.selected = 0
+        self.canvas.xview_moveto(0)
+        self.redraw()
+
+    def refresh(self, paths):
+        """重新读取发生变化的目录（只处理已加载的目录）"""
+        if self.listing is None:
+            return  # 未显示目录，或显示的是快照
+        for path in sorted(paths, key=len):
+            self.listing.invalidate(path)
+            node = self.model.find(path)
+            if node >= 0:
+                self.model.refresh(node)
+        self.selected = min(self.selected, len(self.model.rows) - 1)
+        self.redraw()
+
+    def clear(self):
+        """清空视图"""
+        self._close_source()
+        self.model = None
+        self.top = 0
+        self.selected = -1
+        self.redraw()
+
+    def yview(self, *args):
+        """滚动条回调：支持 moveto 和 scroll 两种操作"""
+        if self.model is None:
+            return
+        total = len(self.model.rows)
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self._page_rows()
+            self.top += amount
+        self.redraw()
+
+    def redraw(self):
+        """重新绘制视口内的行"""
+        page = self._page_rows()
+        rows = self.model.rows if self.model is not None else ()
+        total = len(rows)
+        self.top = max(0, min(self.top, total - page))
+
+        # 文本项数量与视口行数保持一致
+        while len(self._items) < page + 1:
+            self._items.append(self.canvas.create_text(
+                0, 0, anchor=tk.NW, font=self.font, text=''))
+
+        x = 10
+        for i, item in enumerate(self._items):
+            row = self.top + i
+            if row < total:
+                self.canvas.itemconfigure(item, text=self.model.row_text(row), state=tk.NORMAL)
+                self.canvas.coords(item, x, i * self.row_height)
+            else:
+                self.canvas.itemconfigure(item, text='', state=tk.HIDDEN)
+
+        self._draw_highlight()
+
+        # 水平滚动范围取当前可见行的最大宽度
+        bbox = self.canvas.bbox(tk.ALL)
+        width = max(bbox[2] + x if bbox else 0, self.canvas.winfo_width())
+        self.canvas.configure(scrollregion=(0, 0, width, self.canvas.winfo_height()))
+
+        if total:
+            self.v_scrollbar.set(self.top / total, min(1.0, (self.top + page) / total))
+        else:
+            self.v_scrollbar.set(0, 1)
+        self._prefetch_visible(page)
+
+    # ---------- 内部处理 ----------
+    def _close_source(self):
+        """关闭当前内容的来源：目录列表缓存或快照文件"""
+        if self.listing is not None:
+            self.listing.close()
+            self.listing = None
+        if isinstance(self.model, SnapshotTreeModel):
+            self.model.snapshot.close()
+
+    def _prefetch_visible(self, page):
+        """在后台读取视口中尚未读取的目录，离选中行近的优先（取代之前尚未开始的预取）"""
+        if self.listing is None:
+            return
+        model = self.model
+        rows = model.rows
+        visible = range(self.top, min(self.top + page + 1, len(rows)))
+        cursor = self.selected if self.selected in visible else self.top
+        pending = [row for row in visible
+                   if model.is_dir(rows[row]) and not model.is_loaded(rows[row])]
+        pending.sort(key=lambda row: abs(row - cursor))
+        self.listing.prefetch(model.path(rows[row]) for row in pending)
+
+    def _page_rows(self):
+        """视口可容纳的完整行数"""
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _draw_highlight(self):
+        """绘制选中行的背景"""
+        offset = self.selected - self.top
+        if self.model is None or self.selected < 0 or not 0 <= offset <= self._page_rows():
+            self.canvas.itemconfigure(self._highlight, state=tk.HIDDEN)
+            return
+        y = offset * self.row_height
+        x0 = self.canvas.canvasx(0)
+        self.canvas.coords(self._highlight, x0, y, x0 + self.canvas.winfo_width(), y + self.row_height)
+        self.canvas.itemconfigure(self._highlight, state=tk.NORMAL)
+        self.canvas.tag_lower(self._highlight)
+
+    def _row_at(self, y):
+        """返回画布 y 坐标处的行号（无行时返回 -1）"""
+        if self.model is None:
+            return -1
+        row = self.top + int(y // self.row_height)
+        return row if row < len(self.model.rows) else -1
+
+    def _select(self, row):
+        """选中一行并确保其可见"""
+        if self.model is None or not self.model.rows:
+            return
+        row = max(0, min(row, len(self.model.rows) - 1))
+        self.selected = row
+        page = self._page_rows()
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + page:
+            self.top = row - page + 1
+        self.redraw()
+
+    def _move_selection(self, delta):
+        self._select(self.selected + delta)
+
+    def _toggle_selected(self):
+        if self.model is not None and self.selected >= 0:
+            self.model.toggle(self.selected)
+            self.redraw()
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = self._row_at(event.y)
+        if row < 0:
+            return
+        self._select(row)
+        # 点击展开标记时切换展开状态
+        node = self.model.rows[row]
+        marker_x = 10 + self.font.measure(INDENT * self.model.depths[node])
+        x = self.canvas.canvasx(event.x)
+        if self.model.is_dir(node) and marker_x <= x <= marker_x + self.font.measure("▸ "):
+            self._toggle_selected()
+
+    def _on_double_click(self, event):
+        if self._row_at(event.y) >= 0:
+            self._toggle_selected()
+
+    def _on_right(self, event):
+        """右方向键：展开目录，已展开则移到第一个子项"""
+        if self.model is None or self.selected < 0:
+            return
+        node = self.model.rows[self.selected]
+        if not self.model.is_dir(node):
+            return
+        if self.model.expanded[node]:
+            self._move_selection(1)
+        else:
+            self._toggle_selected()
+
+    def _on_left(self, event):
+        """左方向键：折叠目录，已折叠则移到父目录"""
+        if self.model is None or self.selected < 0:
+            return
+        if self.model.expanded[self.model.rows[self.selected]]:
+            self._toggle_selected()
+        else:
+            parent = self.model.parent_row(self.selected)
+            if parent >= 0:
+                self._select(parent)
+
+    def _on_mousewheel(self, event):
+        # Windows 上每格 delta 为 120，macOS 上为 1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.yview('scroll', -3 * step, 'units')
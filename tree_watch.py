@@ -0,0 +1,314 @@
+"""
+目录监视 - tree_watch.py
+功能：监视目录树中条目的增删/重命名（可选文件内容的变化），合并短时间内的大量变化后回调变化的目录
+说明：Linux 上通过 ctypes 使用 inotify，其他平台或 inotify 不可用时退回定时轮询目录 mtime；
+      修改文件内容不会改变所在目录的 mtime，需要时（如显示了大小）轮询改为比较目录中各文件的大小和 mtime
+作者：Ryan Joo
+"""
+
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from tree_core import list_dir
+
+DEBOUNCE = 0.3  # 最后一次变化之后等待的静默时间（秒）
+MAX_DELAY = 2.0  # 持续变化时最长的合并时间（秒）
+POLL_INTERVAL = 2.0  # 轮询模式下检查目录 mtime 的间隔（秒）
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+CONTENT_MASK = IN_CLOSE_WRITE | IN_ATTRIB  # 文件写入完成、mtime 等属性变化（报告所在目录）
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def iter_subdirs(root_path, lister=list_dir, device=None):
+    """列出根目录及其下所有会显示在目录树中的目录
+
+    同一目录（相同的 st_dev 和 st_ino，如经符号链接再次到达）只列出一次，因此跟随符号链接时不会陷入循环。
+
+    参数：
+        device: 只列出位于这一设备（st_dev）上的目录，None 表示不限制
+    """
+    stack = [root_path]
+    visited = set()
+    while stack:
+        path = stack.pop()
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if device is not None and st.st_dev != device:
+            continue
+        if st.st_ino:  # 某些文件系统不提供 inode 编号（为 0），无法判断
+            ident = (st.st_dev, st.st_ino)
+            if ident in visited:
+                continue
+            visited.add(ident)
+        yield path
+        try:
+            dirs, _ = lister(path)
+        except OSError:
+            continue
+        stack.extend(item[1] for item in reversed(dirs))
+
+
+class _Inotify:
+    """inotify 后端：为每个目录添加监视，新建的目录会自动加入"""
+
+    def __init__(self, device=None, contents=False):
+        self.device = device  # 只监视这一设备上的目录（见 iter_subdirs）
+        self.mask = WATCH_MASK | CONTENT_MASK if contents else WATCH_MASK
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # wd -> 目录路径
+
+    def add(self, path):
+        """为单个目录添加监视；监视数达到系统上限时抛出 OSError"""
+        wd = self._add_watch(self.fd, os.fsencode(path), self.mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno in (28, 24):  # ENOSPC / EMFILE：超出 max_user_watches 等限制
+                raise OSError(errno, os.strerror(errno))
+            return  # 目录已被删除等情况，忽略
+        self.paths[wd] = path
+
+    def add_tree(self, root_path, lister):
+        """监视目录及其所有子目录，返回加入监视的目录列表"""
+        added = list(iter_subdirs(root_path, lister, self.device))
+        for path in added:
+            self.add(path)
+        return added
+
+    def read(self, timeout, lister, recursive=True):
+        """等待事件，返回发生变化的目录集合"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(None)  # 事件丢失，需要整体刷新
+                continue
+            path = self.paths.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.paths[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue  # 由父目录的事件负责
+            changed.add(path)
+            if recursive and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # 新目录在加入监视之前可能已有内容，因此整棵新子树都视为已变化
+                child = os.path.join(path, os.fsdecode(name))
+                try:
+                    changed.update(self.add_tree(child, lister))
+                except OSError:
+                    pass
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poller:
+    """轮询后端：定时比较每个目录的 mtime（contents 为 True 时还比较其中各文件的大小和 mtime）"""
+
+    def __init__(self, device=None, contents=False):
+        self.device = device  # 只监视这一设备上的目录（见 iter_subdirs）
+        self.contents = contents
+        self.mtimes = {}  # 目录路径 -> 状态（见 _state）
+
+    def _state(self, path):
+        """目录的 st_mtime_ns；contents 为 True 时再加上各文件 (名称, 大小, mtime) 的哈希"""
+        mtime = os.stat(path).st_mtime_ns
+        if not self.contents:
+            return mtime
+        files = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not entry.is_dir():
+                        st = entry.stat()
+                        files.append((entry.name, st.st_size, st.st_mtime_ns))
+                except OSError:
+                    continue
+        return mtime, hash(frozenset(files))
+
+    def add(self, path):
+        try:
+            self.mtimes[path] = self._state(path)
+        except OSError:
+            pass
+
+    def add_tree(self, root_path, lister):
+        """监视目录及其所有子目录，返回加入监视的目录列表"""
+        added = list(iter_subdirs(root_path, lister, self.device))
+        for path in added:
+            self.add(path)
+        return added
+
+    def read(self, timeout, lister, recursive=True):
+        time.sleep(timeout)
+        changed = set()
+        for path, mtime in list(self.mtimes.items()):
+            try:
+                current = self._state(path)
+            except OSError:
+                del self.mtimes[path]  # 目录已删除，由父目录的变化体现
+                continue
+            if current != mtime:
+                self.mtimes[path] = current
+                changed.add(path)
+        # 变化的目录中可能新增了子目录，新子树整体视为已变化
+        for path in list(changed) if recursive else ():
+            try:
+                dirs, _ = lister(path)
+            except OSError:
+                continue
+            for item in dirs:
+                child = item[1]
+                if child not in self.mtimes:
+                    changed.update(self.add_tree(child, lister))
+        return changed
+
+    def close(self):
+        self.mtimes.clear()
+
+
+class DirectoryWatcher:
+    """在后台线程中监视目录树，合并短时间内的变化后调用回调
+
+    回调在监视线程中执行，参数为发生变化的目录路径集合；
+    集合中包含 None 表示事件丢失，调用方应整体刷新。
+    """
+
+    def __init__(self, root_path, callback, lister=list_dir, use_inotify=True, recursive=True,
+                 one_filesystem=False, contents=False):
+        """
+        参数：
+            root_path: 根目录路径
+            callback: 回调函数 callback(changed_dirs)
+            lister: 读取单个目录的函数，决定哪些子目录需要监视
+            use_inotify: 是否优先使用 inotify
+            recursive: 为 False 时只监视根目录和通过 add 加入的目录（用于惰性加载的视图）
+            one_filesystem: 是否只监视与根目录位于同一文件系统上的目录
+            contents: 是否也报告文件内容和 mtime 的变化（所在目录视为已变化），
+                      用于显示了大小或按大小、修改时间排序的内容；轮询时每次都要 stat 所有文件
+        """
+        self.root_path = root_path
+        self.callback = callback
+        self.lister = lister
+        self.use_inotify = use_inotify
+        self.recursive = recursive
+        self.one_filesystem = one_filesystem
+        self.contents = contents
+        self.backend_name = None
+        self._added = queue.SimpleQueue()  # 其他线程请求加入监视的目录
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止监视（不等待线程结束）"""
+        self._stop.set()
+
+    def add(self, path):
+        """加入一个需要监视的目录（可在任意线程调用）"""
+        self._added.put(path)
+
+    def _open_backend(self):
+        """优先使用 inotify，失败（非 Linux、超出监视数上限等）时改为轮询"""
+        device = None
+        if self.one_filesystem:
+            try:
+                device = os.stat(self.root_path).st_dev
+            except OSError:
+                pass
+        if self.use_inotify:
+            backend = None
+            try:
+                backend = _Inotify(device, self.contents)
+                self._add_initial(backend)
+                self.backend_name = 'inotify'
+                return backend
+            except (OSError, AttributeError):
+                if backend is not None:
+                    backend.close()
+        backend = _Poller(device, self.contents)
+        self._add_initial(backend)
+        self.backend_name = 'polling'
+        return backend
+
+    def _add_initial(self, backend):
+        if self.recursive:
+            backend.add_tree(self.root_path, self.lister)
+        else:
+            backend.add(self.root_path)
+
+    def _run(self):
+        backend = self._open_backend()
+        timeout = 0.2 if self.backend_name == 'inotify' else POLL_INTERVAL
+        pending = set()
+        first_change = last_change = 0.0
+        try:
+            while not self._stop.is_set():
+                while not self._added.empty():
+                    try:
+                        backend.add(self._added.get_nowait())
+                    except OSError:
+                        pass  # 超出监视数上限时只是不再监视新目录
+                changed = backend.read(timeout, self.lister, self.recursive)
+                now = time.monotonic()
+                if changed:
+                    if not pending:
+                        first_change = now
+                    pending |= changed
+                    last_change = now
+                # 静默一段时间或累计过久后统一回调（合并 git checkout、构建输出等突发变化）
+                if pending and (now - last_change >= DEBOUNCE or now - first_change >= MAX_DELAY):
+                    if not self._stop.is_set():
+                        self.callback(pending)
+                    pending = set()
+        finally:
+            backend.close()